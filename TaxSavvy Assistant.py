@@ -4,141 +4,20 @@
 # In[ ]:
 
 
-import streamlit as st
-
-# --- Tax Calculation Logic ---
-
-# Income Tax Slabs for FY 2024-25 (AY 2025-26)
-
-def calculate_tax_new_regime(gross_total_income):
-    """
-    Calculates income tax as per the New Tax Regime for FY 2024-25.
-    Includes Standard Deduction for salaried individuals and Section 87A rebate.
-    """
-    # Standard Deduction (only for salaried income, but applied to GTI for simplicity in this calculator)
-    # In a real scenario, Standard Deduction is only on Salary Income.
-    # For this calculator, we apply it to GTI to simplify the flow.
-    taxable_income = max(0, gross_total_income - 50000) # Apply standard deduction of 50,000
-
-    tax = 0
-    if taxable_income <= 300000:
-        tax = 0
-    elif taxable_income <= 600000:
-        tax = (taxable_income - 300000) * 0.05
-    elif taxable_income <= 900000:
-        tax = (300000 * 0.05) + (taxable_income - 600000) * 0.10
-    elif taxable_income <= 1200000:
-        tax = (300000 * 0.05) + (300000 * 0.10) + (taxable_income - 900000) * 0.15
-    elif taxable_income <= 1500000:
-        tax = (300000 * 0.05) + (300000 * 0.10) + (300000 * 0.15) + (taxable_income - 1200000) * 0.20
-        tax += (taxable_income - 1500000) * 0.30
-    else:
-        tax = (300000 * 0.05) + (300000 * 0.10) + (300000 * 0.15) + (300000 * 0.20)
-        tax += (taxable_income - 1500000) * 0.30 # For income > 15 lakhs, 30% on excess
-
-    # Section 87A Rebate (for New Regime: up to 25,000 if total income <= 7,00,000)
-    rebate = 0
-    if gross_total_income <= 700000: # Note: rebate is on 'total income' before standard deduction
-        rebate = min(tax, 25000) # Rebate is lesser of tax payable or 25,000
-
-    net_tax_before_surcharge_cess = tax - rebate
-    return max(0, net_tax_before_surcharge_cess) # Ensure tax is not negative
-
-def calculate_tax_old_regime(gross_total_income, age_group, deductions):
-    """
-    Calculates income tax as per the Old Tax Regime for FY 2024-25.
-    Accounts for various deductions.
-    """
-    total_deductions = 0
+import uuid
 
-    # Chapter VI-A Deductions
-    total_deductions += min(deductions.get('80C', 0), 150000) # Max 1.5 Lakh
-    
-    # 80D - Health Insurance (simplified max)
-    max_80d_deduction = 25000 # Self, spouse, dependent children
-    if age_group in ["60 to 80 years", "Above 80 years"]:
-        max_80d_deduction = 50000 # Senior citizens
-    total_deductions += min(deductions.get('80D', 0), max_80d_deduction)
-
-    total_deductions += min(deductions.get('80CCD(1B)', 0), 50000) # NPS additional
-    total_deductions += min(deductions.get('80E', 0), gross_total_income) # Education Loan Interest (no max limit, but limited by interest paid)
-    total_deductions += min(deductions.get('80G', 0), gross_total_income) # Donations (limits apply based on donee)
-    total_deductions += min(deductions.get('80TTA', 0), 10000) # Savings interest (for non-seniors)
-    if age_group in ["60 to 80 years", "Above 80 years"]:
-        total_deductions += min(deductions.get('80TTB', 0), 50000) # Savings/FD interest (for seniors)
-
-    # Section 24(b) - Home Loan Interest (deduction from House Property Income, but here treated as general deduction for simplicity)
-    total_deductions += min(deductions.get('24b_interest', 0), 200000) # Max 2 Lakh
-
-    taxable_income = max(0, gross_total_income - total_deductions)
-
-    tax = 0
-    if age_group == "Below 60 years":
-        if taxable_income <= 250000:
-            tax = 0
-        elif taxable_income <= 500000:
-            tax = (taxable_income - 250000) * 0.05
-        elif taxable_income <= 1000000:
-            tax = (250000 * 0.05) + (taxable_income - 500000) * 0.20
-        else:
-            tax = (250000 * 0.05) + (500000 * 0.20) + (taxable_income - 1000000) * 0.30
-    elif age_group == "60 to 80 years": # Senior Citizen
-        if taxable_income <= 300000:
-            tax = 0
-        elif taxable_income <= 500000:
-            tax = (taxable_income - 300000) * 0.05
-        elif taxable_income <= 1000000:
-            tax = (200000 * 0.05) + (taxable_income - 500000) * 0.20
-        else:
-            tax = (200000 * 0.05) + (500000 * 0.20) + (taxable_income - 1000000) * 0.30
-    elif age_group == "Above 80 years": # Super Senior Citizen
-        if taxable_income <= 500000:
-            tax = 0
-        elif taxable_income <= 1000000:
-            tax = (taxable_income - 500000) * 0.20
-        else:
-            tax = (500000 * 0.20) + (taxable_income - 1000000) * 0.30
-    
-    # Section 87A Rebate (for Old Regime: up to 12,500 if total income <= 5,00,000)
-    rebate = 0
-    if gross_total_income <= 500000: # Note: rebate is on 'total income' before deductions
-        rebate = min(tax, 12500)
-
-    net_tax_before_surcharge_cess = tax - rebate
-    return max(0, net_tax_before_surcharge_cess) # Ensure tax is not negative
-
-
-def calculate_surcharge(tax_amount, income, regime):
-    """
-    Calculates surcharge based on income and regime.
-    New Regime has capped surcharge at 25% for highest income bracket.
-    """
-    surcharge_rate = 0
-    if income > 50000000: # Above 5 Crore
-        surcharge_rate = 0.37 if regime == "Old Tax Regime" else 0.25 # New regime capped at 25%
-    elif income > 20000000: # Above 2 Crore up to 5 Crore
-        surcharge_rate = 0.25
-    elif income > 10000000: # Above 1 Crore up to 2 Crore
-        surcharge_rate = 0.15
-    elif income > 5000000: # Above 50 Lakhs up to 1 Crore
-        surcharge_rate = 0.10
-    
-    return tax_amount * surcharge_rate
+import streamlit as st
 
-def calculate_cess(tax_plus_surcharge):
-    """
-    Calculates Health and Education Cess at 4%.
-    """
-    return tax_plus_surcharge * 0.04
+import metrics
+from knowledge import COMMON_TAX_SAVING_SECTIONS_MD, TAX_SAVING_INVESTMENT_OPTIONS_MD, DISCLAIMER_HTML
+from tax_calculator import DEFAULT_FINANCIAL_YEAR, SENIOR_AGE_GROUPS, financial_years
+from tax_graph import CALCULATOR_INPUTS, calculator_graph
 
-# --- Streamlit UI ---
-def main():
-    # >>> IMPORTANT: st.set_page_config MUST be the very first Streamlit command <<<
-    st.set_page_config(page_title="TaxSavvy Assistant", layout="centered") 
+# --- Static Content ---
+# Rendered outside the fragments below, so it is only sent on full app reruns.
 
-    # --- Custom CSS for Eye-Catching GUI ---
-    st.markdown(
-        """
+# --- Custom CSS for Eye-Catching GUI ---
+APP_CSS = """
         <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap'); /* Added 800 weight */
 
@@ -289,434 +168,591 @@ def main():
             border-bottom: 3px solid #FFC107; /* Amber underline for active tab */
         }
         </style>
-        """,
-        unsafe_allow_html=True
-    )
+        """
 
-    # --- Header Section ---
-    st.markdown('<div class="header-container">', unsafe_allow_html=True)
-    st.markdown('<p class="header-title">💰 TaxSavvy Assistant</p>', unsafe_allow_html=True) 
-    st.markdown('<p class="header-subtitle">Your Smart Guide to Indian Income Tax</p>', unsafe_allow_html=True) 
-    st.markdown('</div>', unsafe_allow_html=True)
+# Widgets whose starting value isn't the widget's own default (0, the first option)
+WIDGET_DEFAULTS = {
+    'gross_salary_input': 750000,
+    'investment_budget_input': 100000,
+    'financial_year_input': DEFAULT_FINANCIAL_YEAR,
+}
 
-    st.write("---") # Visual separator
 
-    # --- Tabbed Interface ---
-    tab1, tab2, tab3 = st.tabs(["📊 Tax Calculator", "📝 Detailed Old Regime Inputs", "💡 Tax Saving & Investment Insights"])
+def widget_key(key):
+    """
+    Session state key for an input widget. Reset bumps the session's input
+    generation, so every input gets a fresh key and starts from its default;
+    Streamlit drops the old generation's widget state on the rerun.
+    """
+    generation = st.session_state.get('input_generation', 0)
+    return f'{key}#{generation}' if generation else key
+
+
+# Widget key for each input of the calculator's dependency graph (see tax_graph)
+TAX_GRAPH_INPUT_KEYS = {
+    'gross_salary': 'gross_salary_input',
+    'regime': 'tax_regime_radio',
+    'age_group': 'age_group_radio',
+    'financial_year': 'financial_year_input',
+    'hp_gross_rent': 'hp_gross_rent',
+    'hp_municipal_tax': 'hp_municipal_tax',
+    'hp_interest_loan': 'hp_interest_loan_input',
+    'income_ltcg': 'income_ltcg_input',
+    'income_stcg': 'income_stcg_input',
+    'pnbp': 'pnbp_input',
+    'interest_income': 'interest_income_input',
+    'dividend_income': 'dividend_income_input',
+    'casual_income': 'casual_income_input',
+    'deduction_80C': 'deduction_80c_input',
+    'deduction_80D': 'deduction_80d_input',
+    'deduction_80CCD(1B)': 'deduction_80ccd1b_input',
+    'deduction_24b_interest': 'deduction_24b_input',
+    'deduction_80E': 'deduction_80e_input',
+    'deduction_80G': 'deduction_80g_input',
+    'deduction_80TTA': 'deduction_80tta_input',
+    'deduction_80TTB': 'deduction_80ttb_input',
+}
+
+
+# Graph nodes shown in the calculator tab (the summary, regime comparison and investment planner)
+CALCULATOR_TAB_NODES = ('breakdown', 'claimed_deductions')
+
+
+def sync_tax_graph():
+    """
+    This session's calculator graph, updated with the current widget values.
+    Only the derived values that depend on a changed input are recomputed.
+    """
+    graph = st.session_state.get('tax_graph')
+    if graph is None:
+        graph = st.session_state['tax_graph'] = calculator_graph()
+    # Widgets not rendered yet (e.g. on the first run) are at their defaults
+    graph.update({
+        name: st.session_state.get(widget_key(key), WIDGET_DEFAULTS.get(key, CALCULATOR_INPUTS[name]))
+        for name, key in TAX_GRAPH_INPUT_KEYS.items()
+    })
+    return graph
 
-    # --- Tab 1: Tax Calculator ---
-    with tab1:
-        with st.container():
-            st.markdown('<div class="input-section">', unsafe_allow_html=True)
-            st.subheader("Your Income Details")
-
-            # Basic Income Input
-            gross_salary = st.number_input(
-                "Gross Salary Income (₹)",
-                min_value=0,
-                value=750000,
-                step=10000,
-                format="%d",
-                key="gross_salary_input"
-            )
 
-            tax_regime = st.radio(
-                "Choose Tax Regime:",
-                ("New Tax Regime", "Old Tax Regime"),
-                index=0,
-                key="tax_regime_radio"
-            )
+# --- Streamlit UI ---
+# Each interactive tab is a fragment: changing one of its inputs reruns only
+# that tab, not the CSS, header, other tabs and static insights.
+
+@metrics.instrument('ui.results')
+def render_results(graph):
+    breakdown = graph.get('breakdown')
+    st.markdown('<div class="result-section">', unsafe_allow_html=True)
+    st.markdown('<h3><center>✅ Your Tax Calculation Summary</center></h3>', unsafe_allow_html=True)
+    
+    st.metric(label="Total Tax Payable", value=f"₹{breakdown.total:,.2f}")
 
-            age_group = "Below 60 years" # Default for New Regime, will be used if Old Regime is selected
-            deductions = {} # Dictionary to store deduction values
-            other_income_sources = {} # Dictionary to store other income sources
-
-            if tax_regime == "Old Tax Regime":
-                st.info("For Old Tax Regime, you can claim various deductions and exemptions. Please fill in the applicable amounts in the 'Detailed Old Regime Inputs' tab.")
-                age_group = st.radio(
-                    "Select Your Age Group:",
-                    ("Below 60 years", "60 to 80 years", "Above 80 years"),
-                    index=0,
-                    key="age_group_radio"
-                )
-            
-            st.markdown('</div>', unsafe_allow_html=True) # Close input-section div
-
-        # Initialize session state for detailed inputs if not already present
-        # This ensures values persist when switching tabs
-        if 'hp_gross_rent' not in st.session_state: st.session_state['hp_gross_rent'] = 0
-        if 'hp_municipal_tax' not in st.session_state: st.session_state['hp_municipal_tax'] = 0
-        if 'hp_interest_loan_input' not in st.session_state: st.session_state['hp_interest_loan_input'] = 0
-        if 'income_ltcg_input' not in st.session_state: st.session_state['income_ltcg_input'] = 0
-        if 'income_stcg_input' not in st.session_state: st.session_state['income_stcg_input'] = 0
-        if 'pnbp_input' not in st.session_state: st.session_state['pnbp_input'] = 0
-        if 'interest_income_input' not in st.session_state: st.session_state['interest_income_input'] = 0
-        if 'dividend_income_input' not in st.session_state: st.session_state['dividend_income_input'] = 0
-        if 'casual_income_input' not in st.session_state: st.session_state['casual_income_input'] = 0
-
-        if 'deduction_80c_input' not in st.session_state: st.session_state['deduction_80c_input'] = 0
-        if 'deduction_80d_input' not in st.session_state: st.session_state['deduction_80d_input'] = 0
-        if 'deduction_80ccd1b_input' not in st.session_state: st.session_state['deduction_80ccd1b_input'] = 0
-        if 'deduction_24b_input' not in st.session_state: st.session_state['deduction_24b_input'] = 0
-        if 'deduction_80e_input' not in st.session_state: st.session_state['deduction_80e_input'] = 0
-        if 'deduction_80g_input' not in st.session_state: st.session_state['deduction_80g_input'] = 0
-        if 'deduction_80tta_input' not in st.session_state: st.session_state['deduction_80tta_input'] = 0
-        if 'deduction_80ttb_input' not in st.session_state: st.session_state['deduction_80ttb_input'] = 0 # Only for seniors
-        
-        # Populate deductions and other_income_sources from session state for calculation
-        if tax_regime == "Old Tax Regime":
-            # Income Sources
-            other_income_sources['house_property'] = st.session_state['hp_gross_rent'] - st.session_state['hp_municipal_tax'] - st.session_state['hp_interest_loan_input'] # Simplified HP income
-            other_income_sources['capital_gains_long_term'] = st.session_state['income_ltcg_input']
-            other_income_sources['capital_gains_short_term'] = st.session_state['income_stcg_input']
-            other_income_sources['pnbp_income'] = st.session_state['pnbp_input']
-            other_income_sources['interest_income'] = st.session_state['interest_income_input']
-            other_income_sources['dividend_income'] = st.session_state['dividend_income_input']
-            other_income_sources['casual_income'] = st.session_state['casual_income_input']
-
-            # Deductions
-            deductions['80C'] = st.session_state['deduction_80c_input']
-            deductions['80D'] = st.session_state['deduction_80d_input']
-            deductions['80CCD(1B)'] = st.session_state['deduction_80ccd1b_input']
-            deductions['24b_interest'] = st.session_state['deduction_24b_input']
-            deductions['80E'] = st.session_state['deduction_80e_input']
-            deductions['80G'] = st.session_state['deduction_80g_input']
-            deductions['80TTA'] = st.session_state['deduction_80tta_input']
-            if age_group in ["60 to 80 years", "Above 80 years"]:
-                deductions['80TTB'] = st.session_state['deduction_80ttb_input']
-
-
-        # Calculate Gross Total Income based on regime and inputs
-        if tax_regime == "Old Tax Regime":
-            total_gross_income = gross_salary + \
-                                 other_income_sources.get('house_property', 0) + \
-                                 other_income_sources.get('capital_gains_long_term', 0) + \
-                                 other_income_sources.get('capital_gains_short_term', 0) + \
-                                 other_income_sources.get('pnbp_income', 0) + \
-                                 other_income_sources.get('interest_income', 0) + \
-                                 other_income_sources.get('dividend_income', 0) + \
-                                 other_income_sources.get('casual_income', 0)
-        else:
-            total_gross_income = gross_salary 
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Calculate Tax", key="calculate_button"):
-                gross_tax = 0
-                surcharge = 0
-                cess = 0
-                total_tax_payable = 0
-                rebate_amount = 0 
-
-                if tax_regime == "New Tax Regime":
-                    gross_tax_initial = calculate_tax_new_regime(total_gross_income)
-                    
-                    # To show the rebate amount, we need to re-calculate tax without rebate first.
-                    temp_tax_without_rebate = 0
-                    temp_taxable_income = max(0, total_gross_income - 50000) # Apply standard deduction
-                    if temp_taxable_income <= 300000: temp_tax_without_rebate = 0
-                    elif temp_taxable_income <= 600000: temp_tax_without_rebate = (temp_taxable_income - 300000) * 0.05
-                    elif temp_taxable_income <= 900000: temp_tax_without_rebate = (300000 * 0.05) + (temp_taxable_income - 600000) * 0.10
-                    elif temp_taxable_income <= 1200000: temp_tax_without_rebate = (300000 * 0.05) + (300000 * 0.10) + (temp_taxable_income - 900000) * 0.15
-                    elif temp_taxable_income <= 1500000: temp_tax_without_rebate = (300000 * 0.05) + (300000 * 0.10) + (300000 * 0.15) + (temp_taxable_income - 1200000) * 0.20
-                    else: temp_tax_without_rebate = (300000 * 0.05) + (300000 * 0.10) + (300000 * 0.15) + (300000 * 0.20) + (temp_taxable_income - 1500000) * 0.30
-                    
-                    if total_gross_income <= 700000:
-                        rebate_amount = min(temp_tax_without_rebate, 25000)
-                        gross_tax = max(0, temp_tax_without_rebate - rebate_amount) # Gross tax for surcharge/cess is after rebate
-                    else:
-                        gross_tax = gross_tax_initial # If no rebate, gross_tax is simply the calculated tax
-
-                    surcharge = calculate_surcharge(gross_tax, total_gross_income, tax_regime)
-                    tax_plus_surcharge = gross_tax + surcharge
-                    cess = calculate_cess(tax_plus_surcharge)
-                    total_tax_payable = tax_plus_surcharge + cess
-                    
-                else: # Old Tax Regime
-                    gross_tax_initial = calculate_tax_old_regime(total_gross_income, age_group, deductions)
-                    
-                    # To show rebate amount, need to calculate tax without rebate first
-                    temp_tax_without_rebate = 0
-                    temp_total_deductions_old = 0
-                    temp_total_deductions_old += min(deductions.get('80C', 0), 150000)
-                    max_80d_deduction = 25000
-                    if age_group in ["60 to 80 years", "Above 80 years"]: max_80d_deduction = 50000
-                    temp_total_deductions_old += min(deductions.get('80D', 0), max_80d_deduction)
-                    temp_total_deductions_old += min(deductions.get('80CCD(1B)', 0), 50000)
-                    temp_total_deductions_old += min(deductions.get('80E', 0), total_gross_income)
-                    temp_total_deductions_old += min(deductions.get('80G', 0), total_gross_income)
-                    temp_total_deductions_old += min(deductions.get('80TTA', 0), 10000)
-                    if age_group in ["60 to 80 years", "Above 80 years"]:
-                        temp_total_deductions_old += min(deductions.get('80TTB', 0), 50000)
-                    temp_total_deductions_old += min(deductions.get('24b_interest', 0), 200000)
-
-                    temp_taxable_income_old = max(0, total_gross_income - temp_total_deductions_old)
-
-                    if age_group == "Below 60 years":
-                        if temp_taxable_income_old <= 250000: temp_tax_without_rebate = 0
-                        elif temp_taxable_income_old <= 500000: temp_tax_without_rebate = (temp_taxable_income_old - 250000) * 0.05
-                        elif temp_taxable_income_old <= 1000000: temp_tax_without_rebate = (250000 * 0.05) + (temp_taxable_income_old - 500000) * 0.20
-                        else: temp_tax_without_rebate = (250000 * 0.05) + (500000 * 0.20) + (temp_taxable_income_old - 1000000) * 0.30
-                    elif age_group == "60 to 80 years":
-                        if temp_taxable_income_old <= 300000: temp_tax_without_rebate = 0
-                        elif temp_taxable_income_old <= 500000: temp_tax_without_rebate = (temp_taxable_income_old - 300000) * 0.05
-                        elif temp_taxable_income_old <= 1000000: temp_tax_without_rebate = (200000 * 0.05) + (temp_taxable_income_old - 500000) * 0.20
-                        else: temp_tax_without_rebate = (200000 * 0.05) + (500000 * 0.20) + (temp_taxable_income_old - 1000000) * 0.30
-                    elif age_group == "Above 80 years":
-                        if temp_taxable_income_old <= 500000: temp_tax_without_rebate = 0
-                        elif temp_taxable_income_old <= 1000000: temp_tax_without_rebate = (temp_taxable_income_old - 500000) * 0.20
-                        else: temp_tax_without_rebate = (500000 * 0.20) + (temp_taxable_income_old - 1000000) * 0.30
-                    
-                    if total_gross_income <= 500000:
-                         rebate_amount = min(temp_tax_without_rebate, 12500)
-                         gross_tax = max(0, temp_tax_without_rebate - rebate_amount)
-                    else:
-                        gross_tax = gross_tax_initial
-
-                    surcharge = calculate_surcharge(gross_tax, total_gross_income, tax_regime)
-                    tax_plus_surcharge = gross_tax + surcharge
-                    cess = calculate_cess(tax_plus_surcharge)
-                    total_tax_payable = tax_plus_surcharge + cess
-
-                # Store results in session state to persist after rerun
-                st.session_state['results'] = {
-                    'regime': tax_regime,
-                    'gross_total_income': total_gross_income,
-                    'age_group': age_group,
-                    'deductions': deductions, # Store full deductions dict
-                    'other_income_sources': other_income_sources, # Store other income sources
-                    'gross_tax': gross_tax,
-                    'rebate_amount': rebate_amount,
-                    'surcharge': surcharge,
-                    'cess': cess,
-                    'total_tax_payable': total_tax_payable
-                }
-        with col2:
-            if st.button("Reset", key="reset_button"):
-                # Clear session state and rerun to reset inputs
-                for key in st.session_state.keys():
-                    if key.endswith("_input") or key.endswith("_radio") or key == 'results' or key.endswith("_info"):
-                        del st.session_state[key]
-                st.rerun()
-
-        # --- Display Results Section (only if calculation has been performed) ---
-        if 'results' in st.session_state:
-            results = st.session_state['results']
-            st.markdown('<div class="result-section">', unsafe_allow_html=True)
-            st.markdown('<h3><center>✅ Your Tax Calculation Summary</center></h3>', unsafe_allow_html=True)
-            
-            st.metric(label="Total Tax Payable", value=f"₹{results['total_tax_payable']:,.2f}")
-
-            st.write(f"**Selected Regime:** {results['regime']}")
-            st.write(f"**Gross Total Income:** ₹{results['gross_total_income']:,.2f}")
-            
-            if results['regime'] == "Old Tax Regime":
-                st.write(f"**Selected Age Group:** {results['age_group']}")
-                st.write(f"**Income from Other Sources:**")
-                for source_name, source_val in results['other_income_sources'].items():
-                    if source_val > 0:
-                        st.write(f"  - {source_name.replace('_', ' ').title()}: ₹{source_val:,.2f}")
-                st.write(f"**Total Deductions Considered:**")
-                for ded_name, ded_val in results['deductions'].items():
-                    if ded_val > 0:
-                        st.write(f"  - {ded_name}: ₹{ded_val:,.2f}")
-
-            st.write(f"**Tax (before Surcharge & Cess):** ₹{results['gross_tax']:,.2f}")
-            if results['rebate_amount'] > 0:
-                st.write(f"**Less: Rebate u/s 87A:** ₹{results['rebate_amount']:,.2f}")
-            st.write(f"**Add: Surcharge:** ₹{results['surcharge']:,.2f}")
-            st.write(f"**Add: Health & Education Cess (4%):** ₹{results['cess']:,.2f}")
-            
-            st.markdown('</div>', unsafe_allow_html=True) # Close result-section div
+    st.write(f"**Financial Year:** FY {breakdown.financial_year}")
+    st.write(f"**Selected Regime:** {breakdown.regime}")
+    st.write(f"**Gross Total Income:** ₹{breakdown.gross_total_income:,.2f}")
+    
+    if breakdown.regime == "Old Tax Regime":
+        st.write(f"**Selected Age Group:** {graph.get('age_group_applied')}")
+        st.write(f"**Income from Other Sources:**")
+        for source_name, source_val in graph.get('other_income_sources').items():
+            if source_val > 0:
+                st.write(f"  - {source_name.replace('_', ' ').title()}: ₹{source_val:,.2f}")
+        st.write(f"**Total Deductions Considered:**")
+        for ded_name, ded_val in breakdown.deductions.items():
+            if ded_val > 0:
+                st.write(f"  - {ded_name}: ₹{ded_val:,.2f}")
+
+    st.write(f"**Tax (before Surcharge & Cess):** ₹{breakdown.tax:,.2f}")
+    if breakdown.rebate > 0:
+        st.write(f"**Less: Rebate u/s 87A:** ₹{breakdown.rebate:,.2f}")
+    st.write(f"**Add: Surcharge:** ₹{breakdown.surcharge:,.2f}")
+    st.write(f"**Add: Health & Education Cess (4%):** ₹{breakdown.cess:,.2f}")
+    
+    st.markdown('</div>', unsafe_allow_html=True) # Close result-section div
 
-    # --- Tab 2: Detailed Old Regime Inputs ---
-    with tab2:
+
+@st.fragment
+@metrics.instrument('ui.tab.calculator')
+def render_calculator_tab():
+    with st.container():
         st.markdown('<div class="input-section">', unsafe_allow_html=True)
-        st.markdown('<h2><center>📝 Detailed Income & Deduction Inputs (Old Regime Only)</center></h2>', unsafe_allow_html=True)
-        st.markdown("""
-        **This section is primarily relevant for the Old Tax Regime.** If you've chosen the New Tax Regime, most of these deductions and separate income calculations are not applicable.
-        """)
+        st.subheader("Your Income Details")
+
+        years = financial_years()
+        st.selectbox(
+            "Financial Year:",
+            years,
+            index=years.index(WIDGET_DEFAULTS['financial_year_input']),
+            format_func=lambda year: f"FY {year}",
+            key=widget_key("financial_year_input")
+        )
+
+        # Basic Income Input
+        st.number_input(
+            "Gross Salary Income (₹)",
+            min_value=0,
+            step=10000,
+            format="%d",
+            value=WIDGET_DEFAULTS['gross_salary_input'],
+            key=widget_key("gross_salary_input")
+        )
+
+        tax_regime = st.radio(
+            "Choose Tax Regime:",
+            ("New Tax Regime", "Old Tax Regime"),
+            index=0,
+            key=widget_key("tax_regime_radio")
+        )
 
-        with st.expander("Enter Specific Income Sources (Old Regime)"):
-            st.subheader("Income from House Property")
-            st.number_input(
-                "Gross Rental Income (₹)",
-                min_value=0, value=st.session_state.get('hp_gross_rent', 0), step=1000, format="%d", key="hp_gross_rent"
-            )
-            st.number_input(
-                "Municipal Taxes Paid (₹)",
-                min_value=0, value=st.session_state.get('hp_municipal_tax', 0), step=1000, format="%d", key="hp_municipal_tax"
+        if tax_regime == "Old Tax Regime":
+            st.info("For Old Tax Regime, you can claim various deductions and exemptions. Please fill in the applicable amounts in the 'Detailed Old Regime Inputs' tab.")
+            st.radio(
+                "Select Your Age Group:",
+                ("Below 60 years", "60 to 80 years", "Above 80 years"),
+                index=0,
+                key=widget_key("age_group_radio")
             )
-            nav = max(0, st.session_state.get('hp_gross_rent', 0) - st.session_state.get('hp_municipal_tax', 0))
-            st.write(f"Net Annual Value (NAV): ₹{nav:,.2f}")
-            hp_standard_deduction = nav * 0.30
-            st.write(f"Standard Deduction (30% of NAV): ₹{hp_standard_deduction:,.2f}")
+        
+        st.markdown('</div>', unsafe_allow_html=True) # Close input-section div
 
-            st.number_input(
-                "Interest on Home Loan for House Property (₹)",
-                min_value=0, value=st.session_state.get('hp_interest_loan_input', 0), step=1000, format="%d", key="hp_interest_loan_input"
-            )
-            st.markdown("*(Note: Home loan interest deduction is also separately available under Section 24(b) in the deductions section below, up to ₹2,00,000 for self-occupied property.)*")
+    # Income sources, deductions, GTI and the tax are nodes of a dependency graph: only
+    # the ones affected by a changed input are recomputed, and the summary updates live.
+    with metrics.timed('ui.calculation'):
+        graph = sync_tax_graph()
+        for node in CALCULATOR_TAB_NODES:
+            graph.get(node)
+    st.session_state['calculator_tick'] = graph.tick
+
+    # The 80TTB input in the detailed inputs tab depends on the age group. That tab
+    # is a separate fragment, so rerun the whole app when its visibility changes.
+    show_80ttb = graph.get('age_group_applied') in SENIOR_AGE_GROUPS
+    if st.session_state.get('show_80ttb_flag', False) != show_80ttb:
+        st.session_state['show_80ttb_flag'] = show_80ttb
+        st.rerun()
+
+    if st.button("Reset", key="reset_button"):
+        # New keys for every input instead of deleting each old one
+        st.session_state['input_generation'] = st.session_state.get('input_generation', 0) + 1
+        st.rerun()
+
+    render_results(graph)
+    render_regime_comparison(graph)
+    render_investment_planner(graph)
+
+
+@metrics.instrument('ui.investment_planner')
+def render_investment_planner(graph):
+    st.markdown('<h3>🧮 Plan New Tax-Saving Investments</h3>', unsafe_allow_html=True)
+    if not st.toggle("Suggest how to invest a savings budget", key="planner_toggle"):
+        return
+    # Imported on demand, like the regime comparison
+    from deduction_optimizer import optimize_deductions
+
+    budget = st.number_input(
+        "Amount you can invest this year (₹)",
+        min_value=0, step=10000, format="%d",
+        value=WIDGET_DEFAULTS['investment_budget_input'], key=widget_key("investment_budget_input")
+    )
+    plan = optimize_deductions(
+        graph.get('gross_total_income'), budget, graph.get('age_group_applied'),
+        graph.get('claimed_deductions'), graph.get('financial_year'),
+    )
 
-            st.subheader("Capital Gains")
-            st.number_input(
-                "Long Term Capital Gains (LTCG) (₹)",
-                min_value=0, value=st.session_state.get('income_ltcg_input', 0), step=1000, format="%d", key="income_ltcg_input"
-            )
-            st.number_input(
-                "Short Term Capital Gains (STCG) (₹)",
-                min_value=0, value=st.session_state.get('income_stcg_input', 0), step=1000, format="%d", key="income_stcg_input"
-            )
-            st.markdown("*(Taxation of capital gains is complex and depends on asset type, holding period, and specific sections. This calculator only takes the amount as input.)*")
+    if plan.recommended_regime == "New Tax Regime":
+        st.info(
+            f"The New Tax Regime is cheaper even after investing: {_format_rupees(plan.new_regime_total)} "
+            f"vs {_format_rupees(plan.old_regime_total_after)} under the Old Tax Regime with the best allocation. "
+            "Investing this budget would not lower your tax."
+        )
+        return
+    for section, amount in plan.allocation.items():
+        if amount > 0:
+            st.markdown(f"- Invest **{_format_rupees(amount)}** under Section {section}")
+    if plan.invest_total < budget:
+        st.caption(f"Investing more than {_format_rupees(plan.invest_total)} would not reduce your tax further.")
+    st.success(
+        f"Old Tax Regime: total tax {_format_rupees(plan.recommended_total)}, "
+        f"saving {_format_rupees(plan.tax_saved)} compared with not investing."
+    )
 
-            st.subheader("Profits and Gains from Business or Profession (PGBP)")
-            st.number_input(
-                "Net Income from Business/Profession (₹)",
-                min_value=0, value=st.session_state.get('pnbp_input', 0), step=1000, format="%d", key="pnbp_input"
-            )
-            st.markdown("*(This is a highly complex head. Please enter your net taxable income after all applicable business expenses and depreciation.)*")
 
-            st.subheader("Income from Other Sources")
-            st.number_input(
-                "Interest Income (Savings, FDs, etc.) (₹)",
-                min_value=0, value=st.session_state.get('interest_income_input', 0), step=1000, format="%d", key="interest_income_input"
-            )
-            st.number_input(
-                "Dividend Income (₹)",
-                min_value=0, value=st.session_state.get('dividend_income_input', 0), step=1000, format="%d", key="dividend_income_input"
-            )
+# Upper ends of the comparison chart's income axis, in rupees
+COMPARISON_RANGES = {
+    "₹25 lakh": 2500000,
+    "₹50 lakh": 5000000,
+    "₹1 crore": 10000000,
+    "₹5 crore": 50000000,
+}
+COMPARISON_CHART_POINTS = 2000 # Enough to draw every kink and cliff clearly at any range
+
+
+def _format_rupees(amount):
+    return f"₹{amount:,.0f}"
+
+
+@metrics.instrument('ui.regime_comparison')
+def render_regime_comparison(graph):
+    st.markdown('<h3>📈 New vs Old Regime Across Incomes</h3>', unsafe_allow_html=True)
+    if not st.toggle("Compare both regimes at every income", key="comparison_toggle"):
+        return
+    # Imported on demand: tax_sweep pulls in numpy, which the calculator doesn't otherwise need
+    from tax_sweep import SWEEP_STEP, break_even_incomes, income_sweep
+
+    # Always the deductions from the detailed inputs tab, whichever regime is selected above
+    age_group = graph.get('age_group_applied')
+    deductions = graph.get('claimed_deductions')
+    financial_year = graph.get('financial_year') or DEFAULT_FINANCIAL_YEAR
+    range_label = st.select_slider("Income range", options=list(COMPARISON_RANGES), value="₹50 lakh", key="comparison_range")
+    stop = COMPARISON_RANGES[range_label]
+
+    with metrics.timed('ui.regime_comparison.sweep'):
+        # The break-evens are exact; the chart only needs enough points to show the curves' shape
+        step = max(SWEEP_STEP, -(-stop // COMPARISON_CHART_POINTS // SWEEP_STEP) * SWEEP_STEP)
+        sweep = income_sweep(stop=stop, step=step, age_group=age_group, deductions=deductions, financial_year=financial_year)
+        break_evens = break_even_incomes(age_group, deductions, stop=stop, financial_year=financial_year)
+
+    st.line_chart(
+        {
+            'Gross total income (₹)': sweep['income'],
+            'New regime tax (₹)': sweep['New Tax Regime'],
+            'Old regime tax (₹)': sweep['Old Tax Regime'],
+        },
+        x='Gross total income (₹)',
+        y=['New regime tax (₹)', 'Old regime tax (₹)'],
+    )
+    st.caption(f"FY {financial_year} rules. Old regime uses your detailed inputs ({age_group}); totals include surcharge and cess.")
+
+    if not break_evens:
+        st.info(f"The cheaper regime doesn't change between ₹0 and {range_label}.")
+    for break_even in break_evens:
+        below = break_even.cheaper_below or "Neither regime"
+        above = break_even.cheaper_above or "neither regime (they cost the same)"
+        st.markdown(f"- Up to **{_format_rupees(break_even.income)}**: {below} is cheaper; above it, {above}.")
+
+
+def _use_ledger_gains(ltcg, stcg):
+    # Runs before the rerun, so the inputs can still be set
+    st.session_state[widget_key("income_ltcg_input")] = round(ltcg)
+    st.session_state[widget_key("income_stcg_input")] = round(stcg)
+
+
+@metrics.instrument('ui.ledger_gains')
+def render_ledger_gains(ledger, financial_year):
+    # Imported on demand: the engine pulls in pandas and pyarrow
+    from capital_gains import ledger_chunks, match_ledger, taxable_capital_gains, CapitalGains
+
+    # Matched once per uploaded file, not on every rerun
+    cached = st.session_state.get('ledger_gains')
+    if cached is None or cached[0] != ledger.file_id:
+        try:
+            gains = match_ledger(ledger_chunks(ledger, name=ledger.name)).gains
+        except ValueError as exc:
+            st.error(f"Couldn't read the ledger: {exc}")
+            return
+        cached = st.session_state['ledger_gains'] = (ledger.file_id, gains)
+
+    year_gains = cached[1].get(financial_year, CapitalGains(0.0, 0.0))
+    ltcg, stcg = taxable_capital_gains(year_gains)
+    st.write(f"FY {financial_year}, matched first in, first out: net long-term ₹{year_gains.long_term:,.2f}, "
+             f"net short-term ₹{year_gains.short_term:,.2f}.")
+    st.write(f"After setting off losses: LTCG ₹{ltcg:,.2f}, STCG ₹{stcg:,.2f}.")
+    st.button("Use these figures", key="use_ledger_gains", on_click=_use_ledger_gains, args=(ltcg, stcg))
+
+
+@st.fragment
+@metrics.instrument('ui.tab.detailed_inputs')
+def render_detailed_inputs_tab():
+    # Changed widget values are already in session state when the fragment starts
+    graph = sync_tax_graph()
+    st.markdown('<div class="input-section">', unsafe_allow_html=True)
+    st.markdown('<h2><center>📝 Detailed Income & Deduction Inputs (Old Regime Only)</center></h2>', unsafe_allow_html=True)
+    st.markdown("""
+    **This section is primarily relevant for the Old Tax Regime.** If you've chosen the New Tax Regime, most of these deductions and separate income calculations are not applicable.
+    """)
+
+    with st.expander("Enter Specific Income Sources (Old Regime)"):
+        st.subheader("Income from House Property")
+        st.number_input(
+            "Gross Rental Income (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("hp_gross_rent")
+        )
+        st.number_input(
+            "Municipal Taxes Paid (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("hp_municipal_tax")
+        )
+        st.write(f"Net Annual Value (NAV): ₹{graph.get('net_annual_value'):,.2f}")
+        st.write(f"Standard Deduction (30% of NAV): ₹{graph.get('house_property_standard_deduction'):,.2f}")
+
+        st.number_input(
+            "Interest on Home Loan for House Property (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("hp_interest_loan_input")
+        )
+        st.markdown("*(Note: Home loan interest deduction is also separately available under Section 24(b) in the deductions section below, up to ₹2,00,000 for self-occupied property.)*")
+
+        st.subheader("Capital Gains")
+        st.number_input(
+            "Long Term Capital Gains (LTCG) (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("income_ltcg_input")
+        )
+        st.number_input(
+            "Short Term Capital Gains (STCG) (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("income_stcg_input")
+        )
+        ledger = st.file_uploader(
+            "Or work them out from your trade ledger (CSV or Parquet: date, security, side, quantity, price)",
+            type=["csv", "parquet"], key=widget_key("trade_ledger")
+        )
+        if ledger is not None:
+            render_ledger_gains(ledger, graph.get('financial_year') or DEFAULT_FINANCIAL_YEAR)
+        st.markdown("*(Taxation of capital gains is complex and depends on asset type, holding period, and specific sections. This calculator only takes the amount as input.)*")
+
+        st.subheader("Profits and Gains from Business or Profession (PGBP)")
+        st.number_input(
+            "Net Income from Business/Profession (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("pnbp_input")
+        )
+        st.markdown("*(This is a highly complex head. Please enter your net taxable income after all applicable business expenses and depreciation.)*")
+
+        st.subheader("Income from Other Sources")
+        st.number_input(
+            "Interest Income (Savings, FDs, etc.) (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("interest_income_input")
+        )
+        st.number_input(
+            "Dividend Income (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("dividend_income_input")
+        )
+        st.number_input(
+            "Casual Income (Lottery, Gambling, etc.) (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("casual_income_input")
+        )
+        st.markdown("*(Note: Casual income is taxed at a flat 30% without deductions.)*")
+    
+    with st.expander("Enter Specific Deductions (Old Regime)"):
+        st.subheader("Detailed Deductions (Old Regime)")
+        st.markdown("*(Enter amounts for applicable deductions. Max limits apply.)*")
+
+        st.number_input(
+            "Deduction u/s 80C (Max ₹1,50,000)",
+            min_value=0, max_value=150000, step=1000, format="%d", key=widget_key("deduction_80c_input")
+        )
+        st.number_input(
+            "Deduction u/s 80D (Health Insurance - Max ₹25k/50k)",
+            min_value=0, max_value=50000, step=1000, format="%d", key=widget_key("deduction_80d_input")
+        )
+        st.number_input(
+            "Deduction u/s 80CCD(1B) (NPS - Max ₹50,000)",
+            min_value=0, max_value=50000, step=1000, format="%d", key=widget_key("deduction_80ccd1b_input")
+        )
+        st.number_input(
+            "Deduction u/s 24(b) (Home Loan Interest - Max ₹2,00,000)",
+            min_value=0, max_value=200000, step=1000, format="%d", key=widget_key("deduction_24b_input")
+        )
+        st.number_input(
+            "Deduction u/s 80E (Education Loan Interest)",
+            min_value=0, step=1000, format="%d", key=widget_key("deduction_80e_input")
+        )
+        st.number_input(
+            "Deduction u/s 80G (Donations - Limits Apply)",
+            min_value=0, step=1000, format="%d", key=widget_key("deduction_80g_input")
+        )
+        st.number_input(
+            "Deduction u/s 80TTA (Savings A/C Interest - Max ₹10,000)",
+            min_value=0, max_value=10000, step=100, format="%d", key=widget_key("deduction_80tta_input")
+        )
+        if st.session_state.get('show_80ttb_flag', False):
             st.number_input(
-                "Casual Income (Lottery, Gambling, etc.) (₹)",
-                min_value=0, value=st.session_state.get('casual_income_input', 0), step=1000, format="%d", key="casual_income_input"
+                "Deduction u/s 80TTB (Senior Citizen Savings/FD Interest - Max ₹50,000)",
+                min_value=0, max_value=50000, step=1000, format="%d", key=widget_key("deduction_80ttb_input")
             )
-            st.markdown("*(Note: Casual income is taxed at a flat 30% without deductions.)*")
         
-        with st.expander("Enter Specific Deductions (Old Regime)"):
-            st.subheader("Detailed Deductions (Old Regime)")
-            st.markdown("*(Enter amounts for applicable deductions. Max limits apply.)*")
+    with st.expander("Exemptions (for info - typically reduce Gross Salary)"):
+        st.subheader("Exempt Income & Allowances (Not part of GTI)")
+        st.markdown("*(These are usually excluded from Gross Salary before tax calculation. Ensure your 'Gross Salary Income' input reflects this if applicable.)*")
+        st.number_input(
+            "HRA Exemption (as per rules) (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("hra_exemption_info")
+        )
+        st.number_input(
+            "LTA Exemption (as per rules) (₹)",
+            min_value=0, step=1000, format="%d", key=widget_key("lta_exemption_info")
+        )
+
+    st.markdown('</div>', unsafe_allow_html=True) # Close input-section div
+
+    # The calculator tab is a separate fragment: rerun the app so its live summary,
+    # comparison and plan pick up a change made here
+    for node in CALCULATOR_TAB_NODES:
+        graph.get(node)
+    if any(graph.changed_at(node) > st.session_state.get('calculator_tick', 0) for node in CALCULATOR_TAB_NODES):
+        st.rerun()
+
+
+@metrics.instrument('ui.tab.insights')
+def render_insights_tab():
+    st.markdown('<div class="info-section">', unsafe_allow_html=True) # Reusing info-section style
+    st.markdown('<h2><center>💡 Tax Saving & Investment Insights</center></h2>', unsafe_allow_html=True)
+
+    with st.expander("Common Tax Saving Sections"):
+        st.markdown(COMMON_TAX_SAVING_SECTIONS_MD)
+
+    with st.expander("Popular Tax-Saving Investment Options"):
+        st.markdown(TAX_SAVING_INVESTMENT_OPTIONS_MD)
+    st.markdown('</div>', unsafe_allow_html=True) # Close info-section div
+
+    render_investment_projection()
+    render_assistant()
+
+
+SIMULATION_SEED = 2024 # Fixed, so the same inputs always show the same projection
+
+
+@st.fragment
+@metrics.instrument('ui.investment_projection')
+def render_investment_projection():
+    st.markdown('<h3>🎲 Projected Wealth from Each Option</h3>', unsafe_allow_html=True)
+    if not st.toggle("Simulate post-tax wealth for each option", key="projection_toggle"):
+        return
+    # Imported on demand: the simulator pulls in numpy
+    from investment_simulator import DEFAULT_PATHS, median_wealth_by_year, project_investments, summarize
+
+    # Tax saved is worked out from your income, regime and deductions on the calculator tabs
+    graph = sync_tax_graph()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        annual_investment = st.number_input("Invested each year (₹)", min_value=1000, value=150000, step=10000, key="projection_amount")
+    with col2:
+        horizon = st.slider("Years", min_value=3, max_value=40, value=15, key="projection_horizon")
+    with col3:
+        age = st.number_input("Your age", min_value=18, max_value=75, value=30, step=1, key="projection_age")
+
+    inputs = (
+        annual_investment, horizon, age, graph.get('gross_total_income'), graph.get('regime'),
+        graph.get('age_group_applied'), tuple(sorted(graph.get('applied_deductions').items())), graph.get('financial_year'),
+    )
+    # Simulated once per set of inputs; only the summary is kept, not every path
+    cached = st.session_state.get('investment_projection')
+    if cached is None or cached[0] != inputs:
+        projection = project_investments(
+            annual_investment, graph.get('gross_total_income'), graph.get('regime'), graph.get('age_group_applied'),
+            graph.get('applied_deductions'), graph.get('financial_year'), horizon=horizon, age=age,
+            paths=DEFAULT_PATHS, seed=SIMULATION_SEED,
+        )
+        chart = {'Year': projection.years.tolist()}
+        for instrument, wealth in zip(projection.instruments, median_wealth_by_year(projection)):
+            chart[instrument.name] = wealth.tolist()
+        cached = st.session_state['investment_projection'] = (inputs, summarize(projection), chart)
+    _, summary, chart = cached
+
+    st.line_chart(chart, x='Year', y=[row['instrument'] for row in summary], y_label="Median post-tax wealth (₹)")
+    st.dataframe(
+        [
+            {
+                'Option': f"{row['instrument']} ({row['section']})",
+                'Tax saved / year': _format_rupees(row['yearly_tax_saved']),
+                'Pessimistic (5%)': _format_rupees(row['p5']),
+                'Median': _format_rupees(row['p50']),
+                'Optimistic (95%)': _format_rupees(row['p95']),
+                'Chance of losing money': f"{row['loss_probability']:.0%}",
+                'Still locked in': f"{row['locked_share']:.0%}",
+            }
+            for row in summary
+        ],
+        hide_index=True,
+    )
+    st.caption(
+        f"{DEFAULT_PATHS:,} simulated return paths. Wealth after {horizon} years is what you'd get on withdrawing "
+        f"(after ELSS capital gains tax; FD interest is taxed yearly) plus the tax saved each year, not reinvested. "
+        f"Returns are assumptions, not predictions. Under the New Tax Regime these deductions save no tax."
+    )
 
-            st.number_input(
-                "Deduction u/s 80C (Max ₹1,50,000)",
-                min_value=0, max_value=150000, value=st.session_state.get('deduction_80c_input', 0), step=1000, format="%d", key="deduction_80c_input"
-            )
-            st.number_input(
-                "Deduction u/s 80D (Health Insurance - Max ₹25k/50k)",
-                min_value=0, max_value=50000, value=st.session_state.get('deduction_80d_input', 0), step=1000, format="%d", key="deduction_80d_input"
-            )
-            st.number_input(
-                "Deduction u/s 80CCD(1B) (NPS - Max ₹50,000)",
-                min_value=0, max_value=50000, value=st.session_state.get('deduction_80ccd1b_input', 0), step=1000, format="%d", key="deduction_80ccd1b_input"
-            )
-            st.number_input(
-                "Deduction u/s 24(b) (Home Loan Interest - Max ₹2,00,000)",
-                min_value=0, max_value=200000, value=st.session_state.get('deduction_24b_input', 0), step=1000, format="%d", key="deduction_24b_input"
-            )
-            st.number_input(
-                "Deduction u/s 80E (Education Loan Interest)",
-                min_value=0, value=st.session_state.get('deduction_80e_input', 0), step=1000, format="%d", key="deduction_80e_input"
-            )
-            st.number_input(
-                "Deduction u/s 80G (Donations - Limits Apply)",
-                min_value=0, value=st.session_state.get('deduction_80g_input', 0), step=1000, format="%d", key="deduction_80g_input"
-            )
-            st.number_input(
-                "Deduction u/s 80TTA (Savings A/C Interest - Max ₹10,000)",
-                min_value=0, max_value=10000, value=st.session_state.get('deduction_80tta_input', 0), step=100, format="%d", key="deduction_80tta_input"
-            )
-            if st.session_state.get('age_group_radio', 'Below 60 years') in ["60 to 80 years", "Above 80 years"]:
-                st.number_input(
-                    "Deduction u/s 80TTB (Senior Citizen Savings/FD Interest - Max ₹50,000)",
-                    min_value=0, max_value=50000, value=st.session_state.get('deduction_80ttb_input', 0), step=1000, format="%d", key="deduction_80ttb_input"
-                )
-            
-        with st.expander("Exemptions (for info - typically reduce Gross Salary)"):
-            st.subheader("Exempt Income & Allowances (Not part of GTI)")
-            st.markdown("*(These are usually excluded from Gross Salary before tax calculation. Ensure your 'Gross Salary Income' input reflects this if applicable.)*")
-            st.number_input(
-                "HRA Exemption (as per rules) (₹)",
-                min_value=0, value=st.session_state.get('hra_exemption_info', 0), step=1000, format="%d", key="hra_exemption_info"
-            )
-            st.number_input(
-                "LTA Exemption (as per rules) (₹)",
-                min_value=0, value=st.session_state.get('lta_exemption_info', 0), step=1000, format="%d", key="lta_exemption_info"
-            )
 
-        st.markdown('</div>', unsafe_allow_html=True) # Close input-section div
+@st.cache_resource(show_spinner="Loading the tax knowledge index...")
+def get_tax_assistant():
+    # Loaded once per server process and shared by every session. Imported here so the
+    # ML stack (numpy, faiss, the models) stays out of the calculator's cold start.
+    import tax_assistant
+
+    return tax_assistant.load_assistant()
+
+
+@st.fragment
+@metrics.instrument('ui.assistant')
+def render_assistant():
+    st.markdown('<h3>🤖 Ask the Tax Assistant</h3>', unsafe_allow_html=True)
+    with st.form("assistant_form"):
+        question = st.text_input("Your question", placeholder="e.g. Which deductions are allowed for senior citizens?", key="assistant_question")
+        asked = st.form_submit_button("Ask")
+
+    if not asked or not question.strip():
+        return
+    try:
+        assistant = get_tax_assistant()
+    except FileNotFoundError as e:
+        st.warning(str(e))
+        return
+    from tax_assistant import InferenceBusy # Already imported by get_tax_assistant()
+
+    # Identifies this browser session so the shared model queue can serve sessions in turn
+    session = st.session_state.setdefault('assistant_session', uuid.uuid4().hex)
+    queued_notice = st.empty()
+    if assistant.inference.is_busy():
+        queued_notice.info("The assistant is answering other questions; yours is queued and will start shortly.")
+    with metrics.timed('ui.assistant.answer'):
+        # About the year selected on the calculator tabs
+        financial_year = sync_tax_graph().get('financial_year') or DEFAULT_FINANCIAL_YEAR
+        answer = assistant.answer_stream(question, session, financial_year)
+        try:
+            st.write_stream(_clear_on_first_piece(answer, queued_notice))
+        except InferenceBusy as e:
+            queued_notice.empty()
+            st.warning(str(e))
+            return
+    caption = f"Sources: {', '.join(dict.fromkeys(answer.sources))}"
+    if answer.cached:
+        caption += " · answered from cache"
+    st.caption(caption)
+
+
+def _clear_on_first_piece(pieces, placeholder):
+    """Passes `pieces` through, clearing `placeholder` once the first one arrives."""
+    for i, piece in enumerate(pieces):
+        if i == 0:
+            placeholder.empty()
+        yield piece
+
+
+def main():
+    # >>> IMPORTANT: st.set_page_config MUST be the very first Streamlit command <<<
+    st.set_page_config(page_title="TaxSavvy Assistant", layout="centered") 
+    metrics.start_from_env()
+
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+
+    # --- Header Section ---
+    st.markdown('<div class="header-container">', unsafe_allow_html=True)
+    st.markdown('<p class="header-title">💰 TaxSavvy Assistant</p>', unsafe_allow_html=True) 
+    st.markdown('<p class="header-subtitle">Your Smart Guide to Indian Income Tax</p>', unsafe_allow_html=True) 
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    st.write("---") # Visual separator
+
+    # --- Tabbed Interface ---
+    tab1, tab2, tab3 = st.tabs(["📊 Tax Calculator", "📝 Detailed Old Regime Inputs", "💡 Tax Saving & Investment Insights"])
+
+    # --- Tab 1: Tax Calculator ---
+    with tab1:
+        render_calculator_tab()
+
+    # --- Tab 2: Detailed Old Regime Inputs ---
+    with tab2:
+        render_detailed_inputs_tab()
 
     # --- Tab 3: Tax Saving & Investment Insights ---
     with tab3:
-        st.markdown('<div class="info-section">', unsafe_allow_html=True) # Reusing info-section style
-        st.markdown('<h2><center>💡 Tax Saving & Investment Insights</center></h2>', unsafe_allow_html=True)
-
-        with st.expander("Common Tax Saving Sections"):
-            st.markdown("""
-            The Indian Income Tax Act offers various sections under which you can claim deductions to reduce your taxable income. Here are some of the most common ones:
-
-            * **Section 80C (Max ₹1,50,000):** This is one of the most popular sections. Investments and expenses covered include:
-                * Provident Fund (PF) / Employee Provident Fund (EPF)
-                * Public Provident Fund (PPF)
-                * Life Insurance Premiums
-                * Equity Linked Savings Schemes (ELSS) - Mutual Funds
-                * Home Loan Principal Repayment
-                * Children's Tuition Fees (up to 2 children)
-                * Fixed Deposits (5-year tax-saving FDs)
-                * National Savings Certificate (NSC)
-                * Sukanya Samriddhi Yojana (SSY)
-            * **Section 80D (Health Insurance):** Deductions for health insurance premiums for yourself, spouse, dependent children, and parents. Limits vary based on age (senior citizens get higher limits).
-            * **Section 80CCD(1B) (NPS):** An additional deduction of up to ₹50,000 for contributions to the National Pension System (NPS), over and above the 80C limit.
-            * **Section 24(b) (Home Loan Interest):** Deduction for interest paid on housing loans (up to ₹2,00,000 for self-occupied property).
-            * **Section 80E (Education Loan Interest):** Deduction for interest paid on education loans. No upper limit, but limited to interest paid.
-            * **Section 80G (Donations):** Deductions for donations to certain approved charitable institutions. Limits and eligibility apply.
-            * **Section 80TTA/80TTB (Savings Interest):** Deduction for interest from savings accounts. 80TTA (Max ₹10,000) for general, 80TTB (Max ₹50,000) for senior citizens (replaces 80TTA for them).
-            * **Section 80EEA (Affordable Housing Loan Interest):** Additional deduction for interest on housing loans for affordable housing, over and above Section 24(b) (conditions apply).
-
-            *Note: The New Tax Regime generally does not allow these deductions, except for the Standard Deduction for salaried individuals and employer's contribution to NPS.*
-            """)
-
-        with st.expander("Popular Tax-Saving Investment Options"):
-            st.markdown("""
-            Investing in tax-saving instruments not only helps you save tax but also aids in wealth creation.
-
-            * **Equity Linked Savings Schemes (ELSS):**
-                * **Type:** Mutual Funds (Equity)
-                * **Lock-in:** 3 years (shortest among 80C options)
-                * **Potential:** High growth potential, market-linked returns.
-                * **Suitability:** For investors with a moderate to high-risk appetite.
-            * **Public Provident Fund (PPF):**
-                * **Type:** Government-backed savings scheme
-                * **Lock-in:** 15 years (with partial withdrawals allowed after 7 years)
-                * **Potential:** Guaranteed, tax-free returns, low risk.
-                * **Suitability:** For conservative investors seeking long-term, safe growth.
-            * **National Pension System (NPS):**
-                * **Type:** Retirement savings scheme
-                * **Lock-in:** Until retirement (age 60)
-                * **Potential:** Market-linked returns, dual tax benefits (80C and 80CCD(1B)).
-                * **Suitability:** For long-term retirement planning, moderate risk.
-            * **Tax-Saving Fixed Deposits (FDs):**
-                * **Type:** Bank Fixed Deposits
-                * **Lock-in:** 5 years
-                * **Potential:** Guaranteed returns, low risk.
-                * **Suitability:** For conservative investors preferring fixed returns.
-            * **Life Insurance Policies:**
-                * **Type:** Various plans (Term, Endowment, ULIPs)
-                * **Lock-in:** Varies by policy
-                * **Potential:** Provides life cover; returns vary (ULIPs are market-linked).
-                * **Suitability:** For financial protection and long-term savings.
-
-            **Always consider your financial goals, risk tolerance, and liquidity needs before choosing any investment option.**
-            """)
-        st.markdown('</div>', unsafe_allow_html=True) # Close info-section div
-
+        render_insights_tab()
 
     # --- Disclaimer ---
-    st.markdown(
-        """
-        <div class="disclaimer">
-        <p><strong>Disclaimer:</strong> This calculator is for informational purposes only and is based on the Income Tax Act, 1961 (as amended for FY 2024-25 / AY 2025-26) for resident individuals. It provides a simplified calculation and does not account for all possible income sources, deductions, exemptions, or complex tax scenarios. It is not a substitute for professional tax advice. Please consult a qualified tax advisor for accurate tax planning and filing.</p>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(DISCLAIMER_HTML, unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
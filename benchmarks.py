@@ -0,0 +1,409 @@
+"""
+Benchmark suite for the tax calculation core and the Streamlit UI.
+
+Covers:
+  * scalar calculators across every slab and surcharge tier
+  * the vectorized batch engine over synthetic payrolls (10k, 1M, 10M rows),
+    in float rupees and in exact integer paise
+  * the Monte Carlo investment projection at the app's path count, 40 years
+  * one full script run of the Streamlit app, headless via AppTest
+  * cold start: the app's first run in a fresh process (time, peak RSS and
+    whether any of the ML stack was imported), checked against a budget
+  * bytes held per user session after a typical interaction, split into the
+    app's own session state and Streamlit's widget bookkeeping
+
+Results are written as JSON so runs can be compared between commits:
+
+    python benchmarks.py --output bench.json
+    python benchmarks.py --compare bench.json --threshold 0.10
+
+With --compare, any benchmark more than `threshold` slower than the baseline
+is reported and the exit status is 1, as is a session footprint that grew by
+more than `threshold`. The exit status is also 1 if the cold start exceeds
+COLD_START_BUDGET or imports any of HEAVY_MODULES.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import types
+
+import numpy as np
+
+from tax_calculator import (
+    NEW_REGIME,
+    OLD_REGIME,
+    OLD_REGIME_SLABS,
+    NEW_REGIME_SLABS,
+    SURCHARGE_TIERS,
+    calculate_tax_new_regime,
+    calculate_tax_old_regime,
+    calculate_surcharge,
+    calculate_cess,
+)
+from tax_batch import calculate_tax_batch
+from tax_paise import calculate_tax_batch_paise, calculate_tax_paise, to_paise, to_paise_batch
+from investment_simulator import DEFAULT_PATHS, median_wealth_by_year, project_investments, summarize
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TaxSavvy Assistant.py")
+DEFAULT_BATCH_SIZES = (10000, 1000000, 10000000)
+REPEATS = 5
+
+# Rendering the calculator must not pull these in; they are loaded on first use of the assistant
+HEAVY_MODULES = ('numpy', 'faiss', 'ollama', 'torch', 'transformers', 'sentence_transformers')
+COLD_START_BUDGET = {'seconds': 2.0, 'peak_rss_mib': 150}
+COLD_START_RUNS = 3
+
+# Run in a fresh interpreter so nothing is already imported or cached
+_COLD_START_SCRIPT = """
+import json, resource, sys, time
+
+def peak_rss_kib():
+    # ru_maxrss survives fork+exec and would include the parent; VmHWM is this address space only
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+seconds = time.perf_counter() - start
+print(json.dumps({
+    'seconds': seconds,
+    'peak_rss_kib': peak_rss_kib(),
+    'heavy_modules': [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+    'exception': bool(app.exception),
+}))
+"""
+
+
+def _incomes_for_slabs(slabs, offset=0):
+    """One income inside every slab, plus the slab boundaries themselves."""
+    lower_bounds = [lower for lower, _ in slabs]
+    incomes = []
+    for lower, upper in zip(lower_bounds, lower_bounds[1:] + [lower_bounds[-1] * 2]):
+        incomes += [lower + offset, (lower + upper) // 2 + offset]
+    return incomes
+
+
+def _time_scalar(func, args_list):
+    """
+    Median seconds per call of `func` over `args_list`, using timeit's autorange.
+    """
+    def run():
+        for args in args_list:
+            func(*args)
+
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    runs = timer.repeat(repeat=REPEATS, number=number)
+    return statistics.median(runs) / (number * len(args_list))
+
+
+def bench_scalar():
+    """Per-call latency of each scalar calculator across all tiers."""
+    new_regime_incomes = _incomes_for_slabs(NEW_REGIME_SLABS, offset=50000) # Offset by the standard deduction
+    surcharge_incomes = [threshold + delta for threshold, _ in SURCHARGE_TIERS[OLD_REGIME] for delta in (0, 1)] + [1000000]
+    deductions = {'80C': 150000, '80D': 30000, '80CCD(1B)': 50000, '24b_interest': 200000, '80TTB': 20000}
+
+    results = {
+        'scalar.calculate_tax_new_regime': _time_scalar(calculate_tax_new_regime, [(income,) for income in new_regime_incomes]),
+        'scalar.calculate_surcharge': _time_scalar(
+            calculate_surcharge,
+            [(100000, income, regime) for income in surcharge_incomes for regime in (NEW_REGIME, OLD_REGIME)],
+        ),
+        'scalar.calculate_cess': _time_scalar(calculate_cess, [(tax,) for tax in (0, 12500.5, 1e7)]),
+    }
+    for age_group, slabs in OLD_REGIME_SLABS.items():
+        args = [(income, age_group, deductions) for income in _incomes_for_slabs(slabs, offset=500000)]
+        results[f'scalar.calculate_tax_old_regime[{age_group}]'] = _time_scalar(calculate_tax_old_regime, args)
+    # The exact paise path over the same old regime inputs, for comparison with the float calculators
+    paise_deductions = {section: to_paise(amount) for section, amount in deductions.items()}
+    results['scalar.calculate_tax_paise'] = _time_scalar(calculate_tax_paise, [
+        (to_paise(income), OLD_REGIME, age_group, paise_deductions)
+        for age_group, slabs in OLD_REGIME_SLABS.items() for income in _incomes_for_slabs(slabs, offset=500000)
+    ])
+    return {name: {'seconds': seconds, 'unit': 'per call'} for name, seconds in results.items()}
+
+
+def synthetic_payroll(size, seed=0):
+    """Random incomes spanning every slab and surcharge tier, mixed regimes and ages."""
+    rng = np.random.default_rng(seed)
+    # Log-uniform incomes from 1 lakh to 10 crore
+    incomes = np.round(np.exp(rng.uniform(np.log(1e5), np.log(1e8), size)))
+    regimes = np.where(rng.random(size) < 0.5, NEW_REGIME, OLD_REGIME).astype(object)
+    age_groups = rng.choice(np.array(list(OLD_REGIME_SLABS), dtype=object), size)
+    deductions = {
+        '80C': rng.integers(0, 200000, size).astype(np.float64),
+        '80D': rng.integers(0, 60000, size).astype(np.float64),
+        '24b_interest': rng.integers(0, 250000, size).astype(np.float64),
+    }
+    return incomes, regimes, age_groups, deductions
+
+
+def bench_batch(sizes):
+    """Wall time of calculate_tax_batch and calculate_tax_batch_paise over synthetic payrolls of each size."""
+    results = {}
+    for size in sizes:
+        incomes, regimes, age_groups, deductions = synthetic_payroll(size)
+        paise_deductions = {name: to_paise_batch(values) for name, values in deductions.items()}
+        variants = (
+            (calculate_tax_batch, incomes, deductions),
+            (calculate_tax_batch_paise, to_paise_batch(incomes), paise_deductions),
+        )
+        repeats = REPEATS if size <= 1000000 else 1
+        for func, size_incomes, size_deductions in variants:
+            runs = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                func(size_incomes, regimes, age_groups, size_deductions)
+                runs.append(time.perf_counter() - start)
+            seconds = statistics.median(runs)
+            results[f'batch.{func.__name__}[{size}]'] = {
+                'seconds': seconds,
+                'unit': 'per batch',
+                'rows_per_second': size / seconds,
+            }
+    return results
+
+
+def bench_investment_projection(horizon=40):
+    """Wall time of a full five-instrument projection and the summaries the app shows."""
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        projection = project_investments(150000, 1500000, OLD_REGIME, horizon=horizon, paths=DEFAULT_PATHS, seed=0)
+        summarize(projection)
+        median_wealth_by_year(projection)
+        runs.append(time.perf_counter() - start)
+    return {f'investment_projection[{DEFAULT_PATHS} paths, {horizon} years]': {
+        'seconds': statistics.median(runs),
+        'unit': 'per projection',
+    }}
+
+
+def bench_app_rerun():
+    """Wall time of one full script run of the Streamlit app, headless."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run() # Warm up imports and caches
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        app.run()
+        runs.append(time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(f"App raised during benchmark: {app.exception}")
+    return {'app.full_rerun': {'seconds': statistics.median(runs), 'unit': 'per rerun'}}
+
+
+def bench_cold_start():
+    """
+    First run of the Streamlit app in a fresh process: wall time (median of
+    COLD_START_RUNS), peak RSS and any heavy modules it imported.
+    Linux only: peak RSS is read from /proc in kilobytes.
+    """
+    runs = []
+    for _ in range(COLD_START_RUNS):
+        completed = subprocess.run(
+            [sys.executable, '-c', _COLD_START_SCRIPT, APP_PATH, json.dumps(HEAVY_MODULES)],
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    if any(run['exception'] for run in runs):
+        raise RuntimeError("App raised during the cold start benchmark")
+    return {'app.cold_start': {
+        'seconds': statistics.median(run['seconds'] for run in runs),
+        'unit': 'first run',
+        'peak_rss_mib': max(run['peak_rss_kib'] for run in runs) / 1024,
+        'heavy_modules': sorted({name for run in runs for name in run['heavy_modules']}),
+    }}
+
+
+# Shared by every session (or not data at all), so not counted in a session's footprint
+_NOT_SESSION_DATA = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Bytes reachable from `obj`: containers, instance dicts and slots. Objects
+    whose id is in `seen` are skipped, so pass shared structures there. An
+    upper bound, since small ints and strings that are really shared still count.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen or isinstance(obj, _NOT_SESSION_DATA):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    for name in getattr(type(obj), '__slots__', ()):
+        if hasattr(obj, name):
+            size += deep_sizeof(getattr(obj, name), seen)
+    return size
+
+
+def bench_session_footprint():
+    """
+    Bytes one session holds after a typical interaction (salary, old regime, a
+    deduction, house property rent), for sizing servers by concurrent users.
+    `app_bytes` is what the app keeps in session state; `widget_state_bytes`
+    is Streamlit's own per-session bookkeeping of widget values and ids.
+    """
+    from streamlit.testing.v1 import AppTest
+    from tax_graph import CALCULATOR_GRAPH
+
+    app = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    app.number_input(key='gross_salary_input').set_value(1500000).run()
+    app.radio(key='tax_regime_radio').set_value(OLD_REGIME).run()
+    app.number_input(key='deduction_80c_input').set_value(150000).run()
+    app.number_input(key='hp_gross_rent').set_value(240000).run()
+    if app.exception:
+        raise RuntimeError(f"App raised during the footprint benchmark: {app.exception}")
+
+    shared = {id(CALCULATOR_GRAPH)}
+    app_bytes = sum(deep_sizeof(app.session_state[key], shared) for key in app.session_state.keys())
+    # Streamlit's SessionState (private API): widget values before/after the run and the key -> widget id map
+    state = app.session_state._state._state
+    widget_state_bytes = sum(
+        deep_sizeof(getattr(state, name), shared)
+        for name in ('_old_state', '_new_session_state', '_new_widget_state', '_key_id_mapper')
+        if hasattr(state, name)
+    )
+    return {'app.session_footprint': {
+        'bytes': app_bytes + widget_state_bytes,
+        'unit': 'per session',
+        'app_bytes': app_bytes,
+        'widget_state_bytes': widget_state_bytes,
+        'keys': len(app.session_state.keys()),
+    }}
+
+
+def check_cold_start(result, budget=COLD_START_BUDGET):
+    """Returns a list of ways the cold start result breaks the budget (empty if within it)."""
+    problems = []
+    if result['seconds'] > budget['seconds']:
+        problems.append(f"took {result['seconds']:.2f}s, budget {budget['seconds']:.2f}s")
+    if result['peak_rss_mib'] > budget['peak_rss_mib']:
+        problems.append(f"peak RSS {result['peak_rss_mib']:.0f} MiB, budget {budget['peak_rss_mib']} MiB")
+    if result['heavy_modules']:
+        problems.append(f"imported {', '.join(result['heavy_modules'])}")
+    return problems
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(APP_PATH),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns (name, baseline seconds, current seconds) for each benchmark
+    that is more than `threshold` (a fraction) slower than the baseline.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and current['seconds'] > previous['seconds'] * (1 + threshold):
+            regressions.append((name, previous['seconds'], current['seconds']))
+    return regressions
+
+
+def compare_footprint(footprint, baseline, threshold):
+    """
+    Returns (name, baseline bytes, current bytes) for each footprint more than
+    `threshold` (a fraction) larger than the baseline.
+    """
+    return [
+        (name, baseline[name]['bytes'], current['bytes'])
+        for name, current in footprint.items()
+        if name in baseline and current['bytes'] > baseline[name]['bytes'] * (1 + threshold)
+    ]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the tax calculators and the Streamlit app.")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs baseline, as a fraction (default: %(default)s)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES), help="Batch sizes (default: %(default)s)")
+    parser.add_argument("--skip-app", action="store_true", help="Skip the Streamlit rerun, cold start and footprint benchmarks")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    results = {}
+    footprint = {}
+    results.update(bench_scalar())
+    results.update(bench_batch(args.sizes))
+    results.update(bench_investment_projection())
+    if not args.skip_app:
+        results.update(bench_app_rerun())
+        results.update(bench_cold_start())
+        footprint.update(bench_session_footprint())
+
+    for name, result in results.items():
+        print(f"{name:<60} {result['seconds'] * 1e6:>14,.2f} µs {result['unit']}")
+    for name, result in footprint.items():
+        print(f"{name:<60} {result['bytes']:>14,} B  {result['unit']} "
+              f"(app {result['app_bytes']:,} B, widget state {result['widget_state_bytes']:,} B)")
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+        'footprint': footprint,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if 'app.cold_start' in results:
+        cold_start = results['app.cold_start']
+        print(f"Cold start peak RSS: {cold_start['peak_rss_mib']:,.1f} MiB")
+        for problem in check_cold_start(cold_start):
+            print(f"COLD START OVER BUDGET: {problem}")
+            failed = True
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_report = json.load(f)
+        regressions = compare(results, baseline_report['results'], args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1e6:,.2f} µs -> {after * 1e6:,.2f} µs ({after / before - 1:+.1%})")
+        growth = compare_footprint(footprint, baseline_report.get('footprint', {}), args.threshold)
+        for name, before, after in growth:
+            print(f"REGRESSION {name}: {before:,} B -> {after:,} B ({after / before - 1:+.1%})")
+        if regressions or growth:
+            failed = True
+        else:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
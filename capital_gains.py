@@ -0,0 +1,344 @@
+"""
+Capital gains from a trade ledger, by FIFO lot matching.
+
+Works out the LTCG and STCG figures the calculator takes as inputs from the
+trades themselves. The ledger is read as a stream of chunks in date order.
+Every sale is matched against the oldest open purchase lots of the same
+security (first in, first out). Each matched piece is long-term if the
+lot was held for more than LONG_TERM_MONTHS of its asset class, and is
+counted in the financial year of the sale.
+
+Matching is vectorized per chunk instead of looping over trades. Within a
+security, purchases and sales are laid out as consecutive ranges on one
+axis of cumulative quantity. The breakpoints of both sets of ranges split
+the sales into pieces that each come from exactly one lot. Only the lots
+still open carry over to the next chunk, so memory is bounded by the chunk
+size plus the open lots, not by the length of the ledger. Millions of
+trades take a few seconds.
+
+Quantities are matched in exact integer thousandths of a unit (mutual fund
+units have three decimals). Cost is the actual purchase price plus the
+purchase charges. Grandfathering of pre-2018 gains and indexation are not
+applied.
+
+Usage:
+    python capital_gains.py trades.csv
+    python capital_gains.py trades.parquet --realized realized.parquet
+
+Ledger columns: `date`, `security`, `side` (BUY or SELL), `quantity`,
+`price` (per unit), and optionally `charges` (brokerage, STT etc. for the
+whole trade) and `asset_class` (a key of LONG_TERM_MONTHS, default equity).
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from tabular_io import ChunkWriter, is_parquet, peak_rss_bytes
+
+DEFAULT_CHUNK_SIZE = 500000
+QUANTITY_SCALE = 1000 # Quantities are matched in thousandths of a unit
+
+# Held for more than this many months is long-term, per asset class
+LONG_TERM_MONTHS = {
+    'equity': 12, # Listed shares and equity-oriented mutual funds
+    'other': 24, # Unlisted shares, debt funds bought before April 2023, gold, etc.
+}
+DEFAULT_ASSET_CLASS = 'equity'
+
+LEDGER_COLUMNS = ('date', 'security', 'side', 'quantity', 'price')
+LEDGER_CSV_DTYPES = {'security': str, 'side': str, 'asset_class': str}
+
+REALIZED_COLUMNS = (
+    'security', 'buy_date', 'sell_date', 'quantity', 'cost', 'proceeds', 'gain', 'long_term', 'financial_year',
+)
+
+# Net gains (negative for a net loss) realized in one financial year
+CapitalGains = namedtuple('CapitalGains', ['long_term', 'short_term'])
+
+
+def taxable_capital_gains(gains):
+    """
+    (LTCG, STCG) to enter in the calculator after setting off losses within the
+    head: a short-term loss reduces long-term gains, a long-term loss only
+    long-term gains. Losses left over are carried forward, so not included.
+    """
+    short_term_loss = max(-gains.short_term, 0)
+    return max(gains.long_term - short_term_loss, 0), max(gains.short_term, 0)
+
+
+def _long_term_after(buy_dates, months):
+    """The last date on which a lot bought on `buy_dates` is still short-term."""
+    month = buy_dates.astype('datetime64[M]')
+    day = buy_dates - month.astype('datetime64[D]')
+    target = month + months
+    # Bought on the 31st, held 12 months: short-term until the end of a 30-day month
+    month_end = (target + 1).astype('datetime64[D]') - np.timedelta64(1, 'D')
+    return np.minimum(target.astype('datetime64[D]') + day, month_end)
+
+
+def _financial_year_starts(dates):
+    """Calendar year in which each date's financial year (April to March) starts."""
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return years - (months < 4)
+
+
+def _financial_year_label(start_year):
+    return f'{start_year}-{(start_year + 1) % 100:02d}'
+
+
+class FifoMatcher:
+    """
+    Matches a trade ledger's sales against its open lots, one chunk at a time.
+    Feed chunks in date order to process(); `gains` then holds the net
+    CapitalGains per financial year of sale, and open_lots() what is still held.
+    """
+
+    def __init__(self):
+        self.trades = 0
+        self._gains = {} # Financial year start -> [long-term, short-term]
+        self._last_date = None
+        self._security_codes = {} # Security -> integer code, in order of first appearance
+        self._securities = []
+        # Open lots, oldest first within each security
+        self._security = np.empty(0, dtype=np.int64)
+        self._quantity = np.empty(0, dtype=np.int64)
+        self._unit_cost = np.empty(0, dtype=np.float64)
+        self._buy_date = np.empty(0, dtype='datetime64[D]')
+        self._long_term_after = np.empty(0, dtype='datetime64[D]')
+
+    @property
+    def gains(self):
+        """Financial year ('2024-25') -> CapitalGains, for every year with a sale."""
+        return {
+            _financial_year_label(start): CapitalGains(long_term, short_term)
+            for start, (long_term, short_term) in sorted(self._gains.items())
+        }
+
+    def open_lots(self):
+        """The lots still held, as a DataFrame, oldest first within each security."""
+        return pd.DataFrame({
+            'security': self._security_labels(self._security),
+            'quantity': self._quantity / QUANTITY_SCALE,
+            'unit_cost': self._unit_cost,
+            'buy_date': self._buy_date,
+        })
+
+    def _security_labels(self, codes):
+        return np.asarray(self._securities, dtype=object)[codes]
+
+    def _read_chunk(self, chunk):
+        missing = [column for column in LEDGER_COLUMNS if column not in chunk]
+        if missing:
+            raise ValueError(f"Ledger is missing columns: {', '.join(missing)}")
+        dates = pd.to_datetime(chunk['date']).to_numpy(dtype='datetime64[D]')
+        if len(dates) and (np.any(dates[1:] < dates[:-1]) or (self._last_date is not None and dates[0] < self._last_date)):
+            raise ValueError("Ledger must be sorted by date")
+        side = chunk['side'].astype(str).str.upper().to_numpy(dtype=object)
+        buy, sell = side == 'BUY', side == 'SELL'
+        if not np.all(buy | sell):
+            raise ValueError("'side' must be BUY or SELL")
+        units = chunk['quantity'].to_numpy(dtype=np.float64)
+        if np.any(units < 0) or np.any(np.isnan(units)):
+            raise ValueError("'quantity' must be a non-negative number")
+        quantity = np.rint(units * QUANTITY_SCALE).astype(np.int64)
+
+        # Charges are spread over the units traded: added to cost on a purchase, taken off the proceeds of a sale
+        price = chunk['price'].to_numpy(dtype=np.float64)
+        if 'charges' in chunk:
+            charges = chunk['charges'].fillna(0).to_numpy(dtype=np.float64)
+            per_unit = np.divide(charges, units, out=np.zeros(len(units)), where=units > 0)
+            price = np.where(buy, price + per_unit, price - per_unit)
+
+        if 'asset_class' in chunk:
+            months = chunk['asset_class'].fillna(DEFAULT_ASSET_CLASS).astype(str).str.lower().map(LONG_TERM_MONTHS)
+            if months.isna().any():
+                raise ValueError(f"'asset_class' must be one of {', '.join(LONG_TERM_MONTHS)}")
+            months = months.to_numpy(dtype=np.int64)
+        else:
+            months = np.full(len(chunk), LONG_TERM_MONTHS[DEFAULT_ASSET_CLASS], dtype=np.int64)
+
+        if len(dates):
+            self._last_date = dates[-1]
+        # Codes persist across chunks, so open lots never have to be hashed again
+        chunk_codes, securities = pd.factorize(chunk['security'])
+        if np.any(chunk_codes < 0):
+            raise ValueError("Every trade needs a 'security'")
+        codes = np.empty(len(securities), dtype=np.int64)
+        for i, name in enumerate(securities):
+            code = self._security_codes.get(name)
+            if code is None:
+                code = self._security_codes[name] = len(self._securities)
+                self._securities.append(name)
+            codes[i] = code
+        security = codes[chunk_codes]
+        traded = quantity > 0
+        return security, dates, buy & traded, sell & traded, quantity, price, months
+
+    def process(self, chunk, realized=False):
+        """
+        Matches one chunk of the ledger (a DataFrame with LEDGER_COLUMNS).
+        With `realized`, returns a DataFrame of REALIZED_COLUMNS with one row per
+        piece of a sale matched to one lot (None if there is nothing to match);
+        otherwise returns None.
+        """
+        security, dates, buy, sell, quantity, price, months = self._read_chunk(chunk)
+        self.trades += len(chunk)
+        positions = np.arange(len(chunk))
+
+        # Lots: the open lots (older than anything in this chunk) followed by this chunk's purchases
+        lot_code = np.concatenate([self._security, security[buy]])
+        lot_quantity = np.concatenate([self._quantity, quantity[buy]])
+        lot_cost = np.concatenate([self._unit_cost, price[buy]])
+        lot_date = np.concatenate([self._buy_date, dates[buy]])
+        lot_long_term_after = np.concatenate([self._long_term_after, _long_term_after(dates[buy], months[buy])])
+        lot_position = np.concatenate([np.full(len(self._quantity), -1), positions[buy]])
+
+        sale_code = security[sell]
+        lot_order = np.argsort(lot_code, kind='stable')
+        sale_order = np.argsort(sale_code, kind='stable')
+        lot_code, sale_code = lot_code[lot_order], sale_code[sale_order]
+        lot_quantity, lot_cost, lot_date = lot_quantity[lot_order], lot_cost[lot_order], lot_date[lot_order]
+        lot_long_term_after, lot_position = lot_long_term_after[lot_order], lot_position[lot_order]
+        sale_quantity = quantity[sell][sale_order]
+        sale_price = price[sell][sale_order]
+        sale_date = dates[sell][sale_order]
+        sale_position = positions[sell][sale_order]
+
+        # Each security's lots occupy [base, base + held) of the cumulative quantity axis,
+        # and its sales [base, base + sold): a sale takes the oldest units first
+        held = np.bincount(lot_code, weights=lot_quantity, minlength=len(self._securities)).astype(np.int64)
+        sold = np.bincount(sale_code, weights=sale_quantity, minlength=len(self._securities)).astype(np.int64)
+        oversold = np.flatnonzero(sold > held)
+        if len(oversold):
+            raise ValueError(f"Ledger sells more {self._securities[oversold[0]]} than it holds")
+        base = np.cumsum(held) - held
+        lot_end = np.cumsum(lot_quantity)
+        lot_start = lot_end - lot_quantity
+        sale_end = base[sale_code] + np.cumsum(sale_quantity) - (np.cumsum(sold) - sold)[sale_code]
+        sale_start = sale_end - sale_quantity
+
+        # Every piece between consecutive breakpoints inside a sale comes from a single lot
+        points = np.sort(np.concatenate([lot_start, lot_end, sale_start, sale_end]))
+        if not len(points):
+            return None # No open lots and nothing traded (a header-only or all zero-quantity chunk)
+        points = points[np.concatenate([[True], points[1:] != points[:-1]])]
+        starts, ends = points[:-1], points[1:]
+        sale = np.searchsorted(sale_end, starts, side='right')
+        inside = sale < len(sale_end)
+        inside[inside] = sale_start[sale[inside]] <= starts[inside]
+        starts, ends, sale = starts[inside], ends[inside], sale[inside]
+        lot = np.searchsorted(lot_end, starts, side='right')
+        early = lot_position[lot] > sale_position[sale]
+        if early.any():
+            raise ValueError(f"Ledger sells {self._securities[sale_code[sale[early][0]]]} before buying it")
+
+        units = (ends - starts) / QUANTITY_SCALE
+        cost = units * lot_cost[lot]
+        proceeds = units * sale_price[sale]
+        gain = proceeds - cost
+        long_term = sale_date[sale] > lot_long_term_after[lot]
+        year_start = _financial_year_starts(sale_date[sale])
+        years, year_index = np.unique(year_start, return_inverse=True)
+        long_term_gains = np.bincount(year_index, weights=np.where(long_term, gain, 0.0), minlength=len(years))
+        short_term_gains = np.bincount(year_index, weights=np.where(long_term, 0.0, gain), minlength=len(years))
+        for year, long_term_gain, short_term_gain in zip(years.tolist(), long_term_gains.tolist(), short_term_gains.tolist()):
+            totals = self._gains.setdefault(year, [0.0, 0.0])
+            totals[0] += long_term_gain
+            totals[1] += short_term_gain
+
+        # What is left of each lot past its security's sold range stays open
+        remaining = lot_end - np.maximum(lot_start, (base + sold)[lot_code])
+        still_open = remaining > 0
+        self._security = lot_code[still_open]
+        self._quantity = remaining[still_open]
+        self._unit_cost = lot_cost[still_open]
+        self._buy_date = lot_date[still_open]
+        self._long_term_after = lot_long_term_after[still_open]
+
+        if not realized:
+            return None
+        return pd.DataFrame({
+            'security': self._security_labels(sale_code[sale]),
+            'buy_date': lot_date[lot],
+            'sell_date': sale_date[sale],
+            'quantity': units,
+            'cost': cost,
+            'proceeds': proceeds,
+            'gain': gain,
+            'long_term': long_term,
+            'financial_year': np.array([_financial_year_label(year) for year in years.tolist()], dtype=object)[year_index],
+        }, columns=list(REALIZED_COLUMNS))
+
+
+def ledger_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, name=None):
+    """
+    Yields a CSV or Parquet ledger as DataFrames of at most `chunk_size` rows.
+    `source` is a path or a file object; `name` picks the format when it's a file object.
+    """
+    if is_parquet(name or source):
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        # Security codes are read as strings so numeric-looking ones keep leading zeros
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=LEDGER_CSV_DTYPES)
+
+
+def match_ledger(chunks, realized_path=None):
+    """
+    Runs a FifoMatcher over an iterable of ledger chunks and returns it.
+    With `realized_path`, the matched pieces are written there as they are found.
+    """
+    matcher = FifoMatcher()
+    if realized_path is None:
+        for chunk in chunks:
+            matcher.process(chunk)
+        return matcher
+    with ChunkWriter(realized_path) as writer:
+        for chunk in chunks:
+            realized = matcher.process(chunk, realized=True)
+            # An empty first frame would fix untyped (null) columns in the output's schema
+            if realized is not None and len(realized):
+                writer.write(realized)
+    return matcher
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compute capital gains from a trade ledger by FIFO lot matching.")
+    parser.add_argument("input", help="Ledger CSV or Parquet file, in date order")
+    parser.add_argument("--realized", help="Also write every matched lot to this CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Trades per chunk (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.chunk_size <= 0:
+        raise SystemExit("--chunk-size must be a positive number of trades")
+
+    start = time.perf_counter()
+    try:
+        matcher = match_ledger(ledger_chunks(args.input, args.chunk_size), args.realized)
+    except ValueError as exc:
+        raise SystemExit(f"Invalid ledger: {exc}")
+    elapsed = time.perf_counter() - start
+
+    print(f"{'FY':<9} {'LTCG':>16} {'STCG':>16} {'LTCG to enter':>16} {'STCG to enter':>16}")
+    for financial_year, gains in matcher.gains.items():
+        ltcg, stcg = taxable_capital_gains(gains)
+        print(f"{financial_year:<9} {gains.long_term:>16,.2f} {gains.short_term:>16,.2f} {ltcg:>16,.2f} {stcg:>16,.2f}")
+    trades_per_second = matcher.trades / elapsed if elapsed > 0 else float('inf')
+    print(f"Matched {matcher.trades:,} trades in {elapsed:,.2f}s ({trades_per_second:,.0f} trades/s); "
+          f"{len(matcher.open_lots()):,} lots still open")
+    peak_rss = peak_rss_bytes()
+    if peak_rss is not None:
+        print(f"Peak RSS: {peak_rss / (1024 * 1024):,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Deduction allocation optimizer.
+
+Given a budget for new tax-saving investments, decides how much to put into
+each investable section (80C, 80CCD(1B), 80D) and which regime to file under.
+
+Every rupee deducted lowers old-regime taxable income by one rupee, while
+the 87A rebate and the surcharge depend on gross income, which investing
+does not change. Old-regime tax is therefore convex and non-increasing in
+the amount invested: the optimum fills the sections' remaining headroom,
+but only down to the taxable income at which tax reaches zero. That
+zero-tax point is read from slab breakpoints precomputed once per
+financial year and age group rather than searched for. The result is then
+compared with the new regime, where deductions don't apply, and the cheaper
+regime is recommended. When the new regime wins, nothing is allocated.
+
+The batch functions advise a whole payroll at once (100k employees in well
+under a second); the scalar function wraps them for one taxpayer.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from metrics import instrument
+from tax_calculator import (
+    NEW_REGIME,
+    OLD_REGIME,
+    capped_deductions_old_regime,
+    rules_for,
+    taxable_income_for_slab_tax,
+)
+from tax_batch import DEDUCTION_COLUMNS, _as_float_array, _as_label_array, calculate_tax_batch
+
+# Sections a budget can be invested in, in the order they are filled (ties in tax effect go to the first)
+INVESTMENT_SECTIONS = ('80C', '80CCD(1B)', '80D')
+
+PLAN_COLUMNS = tuple(f'invest_{section}' for section in INVESTMENT_SECTIONS) + (
+    'invest_total',
+    'old_regime_total_before',
+    'old_regime_total_after',
+    'new_regime_total',
+    'recommended_regime',
+    'recommended_total',
+    'tax_saved',
+)
+
+DeductionPlan = namedtuple('DeductionPlan', [
+    'allocation', # Section -> amount to invest
+    'invest_total',
+    'old_regime_total_before', # Old regime total tax with existing deductions only
+    'old_regime_total_after', # ... and with the allocation
+    'new_regime_total',
+    'recommended_regime',
+    'recommended_total', # Total tax under the recommended regime
+    'tax_saved', # Versus the cheaper regime without investing
+])
+
+
+# Per age group of one financial year: section caps and zero-tax breakpoints
+InvestmentLimits = namedtuple('InvestmentLimits', ['section_caps', 'zero_tax_incomes'])
+
+
+def _section_caps(age_group, financial_year):
+    """Deduction cap per investable section for an age group, read from the calculator's own caps."""
+    unlimited = {section: float('inf') for section in INVESTMENT_SECTIONS}
+    capped = capped_deductions_old_regime(float('inf'), age_group, unlimited, financial_year)
+    return {section: capped[section] for section in INVESTMENT_SECTIONS}
+
+
+def _zero_tax_incomes(age_group, financial_year):
+    """
+    (highest taxable income with zero slab tax, highest with zero tax after the 87A rebate)
+    for an age group's old-regime slabs.
+    """
+    rules = rules_for(financial_year)
+    table = rules.old_regime_tables[age_group]
+    _, max_rebate = rules.rebate_87a[OLD_REGIME]
+    first_taxed = next(lower for lower, rate in zip(table.lower_bounds, table.rates) if rate > 0)
+    return first_taxed, taxable_income_for_slab_tax(table, max_rebate)
+
+
+_investment_limits = {}
+
+
+def investment_limits(financial_year=None):
+    """InvestmentLimits for a financial year, computed once per year."""
+    rules = rules_for(financial_year)
+    limits = _investment_limits.get(rules.financial_year)
+    if limits is None:
+        limits = _investment_limits[rules.financial_year] = InvestmentLimits(
+            section_caps={group: _section_caps(group, rules.financial_year) for group in rules.old_regime_tables},
+            zero_tax_incomes={group: _zero_tax_incomes(group, rules.financial_year) for group in rules.old_regime_tables},
+        )
+    return limits
+
+
+@instrument('optimize_deductions_batch')
+def optimize_deductions_batch(gross_total_income, budget, age_group="Below 60 years", deductions=None, financial_year=None):
+    """
+    Tax-minimising investment plan for many taxpayers at once.
+
+    `gross_total_income` and `budget` are arrays (or a scalar budget),
+    `age_group` a label or array of labels, and `deductions` the existing
+    claims keyed by DEDUCTION_COLUMNS, as for calculate_tax_batch, all under
+    the rules of one `financial_year`. Returns a
+    dict of arrays keyed by PLAN_COLUMNS; `recommended_regime` is an object
+    array of regime labels.
+    """
+    gross_total_income = np.asarray(gross_total_income, dtype=np.float64)
+    size = len(gross_total_income)
+    budget = np.maximum(_as_float_array(budget, size), 0)
+    age_group = _as_label_array(age_group, size)
+    deductions = {name: _as_float_array(values, size) for name, values in (deductions or {}).items()}
+
+    rules = rules_for(financial_year)
+    limits = investment_limits(rules.financial_year)
+    before = calculate_tax_batch(gross_total_income, OLD_REGIME, age_group, deductions, rules.financial_year)
+    new_regime_total = calculate_tax_batch(gross_total_income, NEW_REGIME, financial_year=rules.financial_year)['total']
+
+    # Investing beyond the point where taxable income reaches its zero-tax level saves nothing
+    zero_tax_income = np.zeros(size)
+    rebate_eligible = gross_total_income <= rules.rebate_87a[OLD_REGIME][0]
+    caps = {section: np.zeros(size) for section in INVESTMENT_SECTIONS}
+    for group in rules.old_regime_tables:
+        rows = age_group == group
+        if rows.any():
+            zero_slab, zero_after_rebate = limits.zero_tax_incomes[group]
+            zero_tax_income[rows] = np.where(rebate_eligible[rows], zero_after_rebate, zero_slab)
+            for section, cap in limits.section_caps[group].items():
+                caps[section][rows] = cap
+    remaining = np.minimum(budget, np.maximum(before['taxable_income'] - zero_tax_income, 0))
+
+    allocation = {}
+    for section in INVESTMENT_SECTIONS:
+        claimed = deductions.get(section, np.zeros(size))
+        headroom = np.maximum(caps[section] - claimed, 0)
+        allocation[section] = np.minimum(remaining, headroom)
+        remaining = remaining - allocation[section]
+
+    invested = dict(deductions)
+    for section in INVESTMENT_SECTIONS:
+        invested[section] = deductions.get(section, np.zeros(size)) + allocation[section]
+    old_regime_total_after = calculate_tax_batch(gross_total_income, OLD_REGIME, age_group, invested, rules.financial_year)['total']
+
+    # The new regime is preferred on a tie: no lock-in and nothing to invest
+    use_old = old_regime_total_after < new_regime_total
+    for section in INVESTMENT_SECTIONS:
+        allocation[section] = np.where(use_old, allocation[section], 0.0)
+    recommended_total = np.where(use_old, old_regime_total_after, new_regime_total)
+
+    plan = {f'invest_{section}': allocation[section] for section in INVESTMENT_SECTIONS}
+    plan['invest_total'] = sum(allocation[section] for section in INVESTMENT_SECTIONS)
+    plan['old_regime_total_before'] = before['total']
+    plan['old_regime_total_after'] = old_regime_total_after
+    plan['new_regime_total'] = new_regime_total
+    plan['recommended_regime'] = np.where(use_old, OLD_REGIME, NEW_REGIME).astype(object)
+    plan['recommended_total'] = recommended_total
+    plan['tax_saved'] = np.minimum(before['total'], new_regime_total) - recommended_total
+    return plan
+
+
+def optimize_deductions(gross_total_income, budget, age_group="Below 60 years", deductions=None, financial_year=None):
+    """
+    Tax-minimising investment plan for one taxpayer; returns a DeductionPlan.
+    """
+    plan = optimize_deductions_batch(
+        [gross_total_income], [budget], age_group,
+        {name: [value] for name, value in (deductions or {}).items()},
+        financial_year,
+    )
+    values = {name: column[0] for name, column in plan.items()}
+    allocation = {section: float(values.pop(f'invest_{section}')) for section in INVESTMENT_SECTIONS}
+    recommended_regime = values.pop('recommended_regime')
+    return DeductionPlan(
+        allocation=allocation,
+        recommended_regime=recommended_regime,
+        **{name: float(value) for name, value in values.items()},
+    )
+
+
+@instrument('optimize_deductions_frame')
+def optimize_deductions_frame(df, budget_column='investment_budget', income_column='gross_total_income',
+                              age_group_column='age_group', financial_year=None):
+    """
+    Runs optimize_deductions_batch over a pandas DataFrame with a budget column
+    and optional existing deduction columns, under the rules of `financial_year`.
+    Returns a DataFrame of PLAN_COLUMNS aligned to the input index.
+    """
+    age_group = df[age_group_column].fillna("Below 60 years").to_numpy(dtype=object) if age_group_column in df else "Below 60 years"
+    deductions = {name: df[name].fillna(0).to_numpy(dtype=np.float64) for name in DEDUCTION_COLUMNS if name in df}
+    plan = optimize_deductions_batch(
+        df[income_column].fillna(0).to_numpy(dtype=np.float64),
+        df[budget_column].fillna(0).to_numpy(dtype=np.float64),
+        age_group=age_group,
+        deductions=deductions,
+        financial_year=financial_year,
+    )
+    return pd.DataFrame(plan, index=df.index, columns=list(PLAN_COLUMNS))
@@ -0,0 +1,157 @@
+"""
+Fake ollama server for exercising the assistant without a model.
+
+Implements the parts of the ollama HTTP API the app uses (POST
+/api/generate, streamed or not, plus /api/tags and /api/version). It
+answers every prompt with a fixed reply, emitted one word at a time with a
+configurable delay, and records how many generations ran at once so tests
+can check the app's concurrency limit.
+
+    python fake_ollama.py --port 11435 --token-delay 0.05
+    OLLAMA_HOST=http://127.0.0.1:11435 streamlit run "TaxSavvy Assistant.py"
+
+In-process:
+    server = start_fake_ollama(token_delay=0.01)
+    OllamaGenerator(host=server.url) ...
+    server.max_concurrent  # peak simultaneous generations seen
+    server.shutdown()
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "Under Section 80C you can claim up to ₹1,50,000 a year in the old tax regime."
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, reply=DEFAULT_REPLY, token_delay=0.0, first_token_delay=0.0):
+        super().__init__(address, _FakeOllamaHandler)
+        self.reply = reply
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.requests = 0
+        self.active = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _enter(self):
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.max_concurrent = max(self.max_concurrent, self.active)
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/version':
+            self._send_json({'version': '0.0.0-fake'})
+        elif self.path == '/api/tags':
+            self._send_json({'models': []})
+        else:
+            self._send_json({'error': 'not found'}, status=404)
+
+    def do_POST(self):
+        if self.path != '/api/generate':
+            self._send_json({'error': 'not found'}, status=404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        model = request.get('model', 'fake')
+        server = self.server
+        server._enter()
+        try:
+            time.sleep(server.first_token_delay)
+            words = server.reply.split(' ')
+            pieces = [word if i == 0 else f' {word}' for i, word in enumerate(words)]
+            if not request.get('stream', True):
+                time.sleep(server.token_delay * len(pieces))
+                self._send_json(_part(model, server.reply, done=True))
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for piece in pieces:
+                self._write_chunk(_part(model, piece, done=False))
+                time.sleep(server.token_delay)
+            self._write_chunk(_part(model, '', done=True))
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass # Client stopped reading, e.g. the user reran the app mid-answer
+        finally:
+            server._exit()
+
+    def _write_chunk(self, data):
+        line = json.dumps(data).encode('utf-8') + b'\n'
+        self.wfile.write(f'{len(line):x}\r\n'.encode('ascii') + line + b'\r\n')
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _part(model, response, done):
+    part = {
+        'model': model,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'response': response,
+        'done': done,
+    }
+    if done:
+        part['done_reason'] = 'stop'
+    return part
+
+
+def start_fake_ollama(port=0, host='127.0.0.1', **options):
+    """Starts a FakeOllamaServer on a daemon thread (port 0 picks a free port) and returns it."""
+    server = FakeOllamaServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='fake-ollama', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake ollama API for testing the assistant.")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-delay", type=float, default=0.05, help="Seconds between streamed words (default: %(default)s)")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="Seconds before the first word (default: %(default)s)")
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    args = parser.parse_args(argv)
+
+    server = FakeOllamaServer(
+        ('127.0.0.1', args.port), reply=args.reply,
+        token_delay=args.token_delay, first_token_delay=args.first_token_delay,
+    )
+    print(f"Fake ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
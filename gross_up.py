@@ -0,0 +1,97 @@
+"""
+Reverse tax solver: the gross income for a target take-home or a target tax.
+
+Total tax is piecewise linear in gross income (see tax_sweep), so a
+TaxCurve stores one line per segment between breakpoints, fitted from
+exact evaluations of the batch engine. A query is then a binary search
+over the segments plus one linear solve, O(log n) and exact up to float
+rounding, for any number of targets at once.
+
+Tax never falls as income rises, but it jumps up at the 87A income limit
+and at each surcharge threshold (both inclusive: an income equal to the
+limit gets the lower tax). So take-home pay drops at those cliffs and some
+take-home amounts are reached at several incomes. The solvers therefore
+answer:
+  * gross_for_take_home: the smallest gross whose take-home is at least the target
+  * gross_for_tax: the largest gross whose total tax is at most the target
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from metrics import instrument
+from tax_calculator import NEW_REGIME, OLD_REGIME
+from tax_batch import calculate_tax_batch
+from tax_sweep import regime_breakpoints
+
+TaxCurve = namedtuple('TaxCurve', [
+    'starts', # Segment i covers gross incomes (starts[i], starts[i + 1]]; the last one is unbounded
+    'slopes', # Marginal total-tax rate inside each segment
+    'intercepts', # Total tax = intercepts[i] + slopes[i] * gross inside segment i
+    'tax_at_end', # Total tax at the (inclusive) end of each segment; +inf for the last
+    'take_home_max', # Highest take-home at or below the end of each segment (a running maximum)
+])
+
+
+@instrument('tax_curve')
+def tax_curve(regime=NEW_REGIME, age_group="Below 60 years", deductions=None, financial_year=None):
+    """
+    Compiles the total tax of one regime, taxpayer profile and financial year into a TaxCurve.
+    """
+    if regime != OLD_REGIME:
+        regime, age_group, deductions = NEW_REGIME, "Below 60 years", None
+    points = [point for point in regime_breakpoints(regime, age_group, deductions, financial_year) if point > 0]
+    starts = np.array([0.0] + points)
+    # The last segment is unbounded; probe it over an arbitrary finite width
+    ends = np.append(starts[1:], starts[-1] + max(starts[-1], 1e6))
+
+    def total_tax(incomes):
+        return calculate_tax_batch(incomes, regime, age_group, deductions, financial_year)['total']
+
+    # Tax is linear inside each segment: fit it from two interior evaluations
+    first, second = starts + (ends - starts) / 4, starts + 3 * (ends - starts) / 4
+    tax_first, tax_second = total_tax(first), total_tax(second)
+    slopes = (tax_second - tax_first) / (second - first)
+    intercepts = tax_first - slopes * first
+
+    tax_at_end = np.append(total_tax(starts[1:]), np.inf)
+    take_home_at_end = np.append(starts[1:] - tax_at_end[:-1], np.inf)
+    return TaxCurve(starts, slopes, intercepts, tax_at_end, np.maximum.accumulate(take_home_at_end))
+
+
+def _as_targets(targets):
+    targets = np.asarray(targets, dtype=np.float64)
+    return np.atleast_1d(targets), targets.ndim == 0
+
+
+def gross_for_take_home(curve, take_home):
+    """
+    Smallest gross income whose take-home (gross minus total tax) is at least
+    `take_home`. Accepts a scalar or an array of targets; returns the same shape.
+    """
+    targets, scalar = _as_targets(take_home)
+    # First segment whose best take-home reaches the target
+    i = np.searchsorted(curve.take_home_max, targets, side='left')
+    # Take-home is rising inside a segment: gross * (1 - slope) - intercept = target
+    gross = (targets + curve.intercepts[i]) / (1 - curve.slopes[i])
+    # Rounding can land a hair before the segment start; the answer is never below it
+    gross = np.where(targets <= 0, 0.0, np.maximum(gross, curve.starts[i]))
+    return gross[0] if scalar else gross
+
+
+def gross_for_tax(curve, tax):
+    """
+    Largest gross income whose total tax is at most `tax`. Accepts a scalar
+    or an array of targets; returns the same shape. Negative targets give NaN.
+    """
+    targets, scalar = _as_targets(tax)
+    # First segment whose tax at its end exceeds the target
+    i = np.searchsorted(curve.tax_at_end, targets, side='right')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inside = curve.starts[i] + (targets - (curve.intercepts[i] + curve.slopes[i] * curve.starts[i])) / curve.slopes[i]
+    # If the tax just after the segment start already exceeds the target, the segment starts with a cliff
+    jumps = curve.intercepts[i] + curve.slopes[i] * curve.starts[i] > targets
+    gross = np.where(jumps, curve.starts[i], inside)
+    gross = np.where(targets < 0, np.nan, gross)
+    return gross[0] if scalar else gross
@@ -0,0 +1,296 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+Drives N simulated user sessions at once, headless via Streamlit's AppTest,
+in one process, which is how a server running the app serves its users. Each
+session runs SESSION_STEPS: open the app, enter a salary, switch to the Old
+Tax Regime, fill the deduction inputs, read the live tax summary (checked
+against the calculator) and click Reset. Every step but the summary check
+is one rerun of the script.
+
+AppTest swaps process-wide runtime state on every run, so runs from
+different sessions can't overlap: each session runs on its own thread and
+takes RUN_LOCK for each rerun. That matches a single server process, where
+the GIL serializes script execution anyway. A rerun's latency includes the
+time spent waiting for the lock, which is the queueing this test measures.
+
+For each concurrency level it reports throughput (reruns/second),
+p50/p95/p99 rerun latency and the process RSS growth while the sessions are
+alive. Results are written as JSON so runs can be compared between commits:
+
+    python load_test.py --sessions 1 4 16 --output load.json
+    python load_test.py --sessions 1 4 16 --compare load.json --threshold 0.20
+
+With --compare, a level whose p95 latency grew or whose throughput fell by
+more than `threshold` is reported as a regression and the exit status is 1.
+It is also 1 if any session raised or showed a wrong tax.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+from tax_calculator import OLD_REGIME, calculate_tax_breakdown
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TaxSavvy Assistant.py")
+DEFAULT_SESSIONS = (1, 2, 4, 8)
+DEFAULT_ITERATIONS = 3
+APP_TIMEOUT = 120 # Seconds per rerun; generous, since reruns queue behind each other under load
+PERCENTILES = (50, 95, 99)
+
+RUN_LOCK = threading.Lock()
+
+# Old regime deductions each session enters, widget key -> amount
+SESSION_DEDUCTIONS = {
+    'deduction_80c_input': 150000,
+    'deduction_80d_input': 25000,
+    'deduction_80ccd1b_input': 50000,
+    'deduction_24b_input': 200000,
+}
+DEDUCTION_SECTIONS = {
+    'deduction_80c_input': '80C',
+    'deduction_80d_input': '80D',
+    'deduction_80ccd1b_input': '80CCD(1B)',
+    'deduction_24b_input': '24b_interest',
+}
+
+
+def _widget_key(app, key):
+    # Same as widget_key() in the app: Reset bumps the generation suffixed to every input's key
+    generation = app.session_state['input_generation'] if 'input_generation' in app.session_state else 0
+    return f'{key}#{generation}' if generation else key
+
+
+def _summary_total(app):
+    return app.metric[0].value
+
+
+def _format_total(total):
+    return f"₹{total:,.2f}"
+
+
+def _salary(session, iteration):
+    # Different incomes per session and iteration, so sessions don't all hit the same values
+    return 600000 + 50000 * session + 10000 * iteration
+
+
+def session_steps(session, iteration):
+    """
+    The (step name, action) pairs one session runs per iteration. An action
+    takes the AppTest and returns the element to rerun with, or None for a
+    check that doesn't rerun.
+    """
+    salary = _salary(session, iteration)
+    expected = _format_total(calculate_tax_breakdown(
+        salary, OLD_REGIME, "Below 60 years",
+        {section: SESSION_DEDUCTIONS[key] for key, section in DEDUCTION_SECTIONS.items()},
+    ).total)
+
+    def check_summary(app):
+        if _summary_total(app) != expected:
+            raise AssertionError(f"summary shows {_summary_total(app)}, expected {expected}")
+
+    steps = [
+        ('salary', lambda app: app.number_input(key=_widget_key(app, 'gross_salary_input')).set_value(salary)),
+        ('regime', lambda app: app.radio(key=_widget_key(app, 'tax_regime_radio')).set_value(OLD_REGIME)),
+    ]
+    for key, amount in SESSION_DEDUCTIONS.items():
+        steps.append((key, lambda app, key=key, amount=amount: app.number_input(key=_widget_key(app, key)).set_value(amount)))
+    steps += [
+        ('summary', check_summary),
+        ('reset', lambda app: app.button(key='reset_button').click()),
+    ]
+    return steps
+
+
+def run_session(session, iterations, start_barrier, latencies, errors, apps):
+    """
+    One simulated user: opens the app, then runs session_steps() `iterations` times.
+    Appends each rerun's seconds to `latencies` and any failure to `errors`.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    try:
+        app = AppTest.from_file(APP_PATH, default_timeout=APP_TIMEOUT)
+        apps.append(app) # Kept alive until memory is measured, like a connected user
+        start_barrier.wait()
+        _timed_run(app, latencies)
+        for iteration in range(iterations):
+            for name, action in session_steps(session, iteration):
+                element = action(app)
+                if element is not None:
+                    _timed_run(element, latencies)
+                if app.exception:
+                    raise RuntimeError(f"app raised at step '{name}': {app.exception[0].message}")
+    except threading.BrokenBarrierError:
+        pass # Another session failed to start, or the start timed out; run_level reports it
+    except Exception as exc:
+        errors.append(f"session {session}: {exc}")
+        # Don't leave the other sessions waiting for this one until the barrier times out
+        start_barrier.abort()
+
+
+def _timed_run(element, latencies):
+    start = time.perf_counter()
+    with RUN_LOCK:
+        element.run()
+    latencies.append(time.perf_counter() - start)
+
+
+def current_rss_bytes():
+    """Resident set size of this process, or None where /proc isn't available."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * percent // 100)) # Ceiling without floats
+    return sorted_values[rank - 1]
+
+
+def warm_up():
+    """One unmeasured run, so imports and caches don't count against the first level."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=APP_TIMEOUT).run()
+    if app.exception:
+        raise SystemExit(f"App raised during warm-up: {app.exception[0].message}")
+
+
+def run_level(sessions, iterations):
+    """Runs `sessions` concurrent sessions and returns this level's results."""
+    latencies, errors, apps = [], [], []
+    gc.collect()
+    rss_before = current_rss_bytes()
+
+    # Sessions start their first rerun together, once every AppTest is set up
+    start_barrier = threading.Barrier(sessions + 1, timeout=APP_TIMEOUT)
+    threads = [
+        threading.Thread(target=run_session, args=(session, iterations, start_barrier, latencies, errors, apps))
+        for session in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        start_barrier.wait()
+    except threading.BrokenBarrierError:
+        if not errors:
+            errors.append(f"sessions didn't all start within {APP_TIMEOUT}s")
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    rss_after = current_rss_bytes()
+    del apps[:]
+    gc.collect()
+
+    latencies.sort()
+    result = {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'seconds': seconds,
+        'reruns_per_second': len(latencies) / seconds if seconds > 0 else 0.0,
+        'errors': errors,
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_seconds'] = percentile(latencies, percent) if latencies else None
+    if rss_before is not None and rss_after is not None:
+        result['rss_growth_mib'] = (rss_after - rss_before) / (1024 * 1024)
+        result['rss_mib'] = rss_after / (1024 * 1024)
+    return result
+
+
+def compare(levels, baseline, threshold):
+    """
+    Returns (sessions, metric, baseline, current) for each level where p95 latency
+    is more than `threshold` (a fraction) higher, or throughput more than
+    `threshold` lower, than in the baseline.
+    """
+    previous_levels = {level['sessions']: level for level in baseline}
+    regressions = []
+    for level in levels:
+        previous = previous_levels.get(level['sessions'])
+        if not previous or level['reruns'] == 0:
+            continue
+        if level['p95_seconds'] > previous['p95_seconds'] * (1 + threshold):
+            regressions.append((level['sessions'], 'p95_seconds', previous['p95_seconds'], level['p95_seconds']))
+        if level['reruns_per_second'] < previous['reruns_per_second'] / (1 + threshold):
+            regressions.append((level['sessions'], 'reruns_per_second', previous['reruns_per_second'], level['reruns_per_second']))
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load test the Streamlit app with concurrent headless sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=list(DEFAULT_SESSIONS),
+                        help="Concurrency levels to run, in order (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+                        help="Times each session runs its steps (default: %(default)s)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="Allowed p95 slowdown or throughput drop vs baseline, as a fraction (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if any(sessions <= 0 for sessions in args.sessions) or args.iterations <= 0:
+        raise SystemExit("--sessions and --iterations must be positive")
+
+    warm_up()
+    levels = []
+    print(f"{'sessions':>8} {'reruns':>7} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS +MiB':>9} {'errors':>6}")
+    for sessions in args.sessions:
+        level = run_level(sessions, args.iterations)
+        levels.append(level)
+        latencies = [level[f'p{percent}_seconds'] for percent in PERCENTILES]
+        latencies = ' '.join(f"{latency * 1000:>8,.1f}" if latency is not None else f"{'-':>8}" for latency in latencies)
+        growth = f"{level['rss_growth_mib']:>9,.1f}" if 'rss_growth_mib' in level else f"{'-':>9}"
+        print(f"{sessions:>8} {level['reruns']:>7} {level['reruns_per_second']:>9,.1f} {latencies} {growth} {len(level['errors']):>6}")
+
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'iterations': args.iterations,
+        'levels': levels,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    for level in levels:
+        for error in level['errors']:
+            print(f"ERROR ({level['sessions']} sessions) {error}")
+            failed = True
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['levels']
+        regressions = compare(levels, baseline, args.threshold)
+        for sessions, metric, before, after in regressions:
+            print(f"REGRESSION {sessions} sessions {metric}: {before:,.4f} -> {after:,.4f} ({after / before - 1:+.1%})")
+        if regressions:
+            failed = True
+        else:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
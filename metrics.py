@@ -0,0 +1,194 @@
+"""
+Optional hot-path instrumentation with OpenMetrics export.
+
+Disabled unless the TAXSAVVY_METRICS environment variable is set (to
+anything other than "" or "0") before the app modules are imported. While
+disabled, `instrument` returns the function unchanged and `timed` returns a
+shared no-op context manager, so instrumented code pays essentially nothing.
+
+When enabled, every instrumented name records a call count and a latency
+histogram. They can be exported in the OpenMetrics text format:
+  * render() returns the exposition text (tax_api serves it at /metrics)
+  * TAXSAVVY_METRICS_PORT=9464 serves it over HTTP from the Streamlit process
+  * TAXSAVVY_METRICS_FILE=metrics.txt writes it to a file at exit
+"""
+
+import atexit
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get('TAXSAVVY_METRICS', '') not in ('', '0')
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Upper bounds (seconds) of the latency histogram buckets; a final +Inf bucket is implied
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _Histogram:
+    __slots__ = ('bucket_counts', 'count', 'sum')
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+_lock = threading.Lock()
+_histograms = {}
+
+
+def observe(name, seconds):
+    """Records one call of `name` that took `seconds`."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _Histogram()
+        histogram.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram.count += 1
+        histogram.sum += seconds
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.name, time.perf_counter() - self.start)
+
+
+def timed(name):
+    """
+    Context manager that records the latency of its block under `name`.
+    """
+    if not ENABLED:
+        return _NULL_CONTEXT
+    return _Timer(name)
+
+
+def instrument(name):
+    """
+    Decorator that records the call count and latency of a function under `name`.
+    Returns the function itself when metrics are disabled.
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def reset():
+    """Clears all recorded metrics."""
+    with _lock:
+        _histograms.clear()
+
+
+def _escape(label_value):
+    return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render():
+    """
+    Returns all recorded metrics in the OpenMetrics text exposition format.
+    """
+    with _lock:
+        snapshot = {name: (list(h.bucket_counts), h.count, h.sum) for name, h in sorted(_histograms.items())}
+
+    lines = [
+        '# TYPE taxsavvy_calls counter',
+        '# HELP taxsavvy_calls Number of calls per instrumented function or UI section.',
+    ]
+    for name, (_, count, _) in snapshot.items():
+        lines.append(f'taxsavvy_calls_total{{name="{_escape(name)}"}} {count}')
+
+    lines += [
+        '# TYPE taxsavvy_latency_seconds histogram',
+        '# UNIT taxsavvy_latency_seconds seconds',
+        '# HELP taxsavvy_latency_seconds Latency per instrumented function or UI section.',
+    ]
+    for name, (bucket_counts, count, total) in snapshot.items():
+        label = _escape(name)
+        cumulative = 0
+        for upper_bound, bucket_count in zip(LATENCY_BUCKETS + ('+Inf',), bucket_counts):
+            cumulative += bucket_count
+            lines.append(f'taxsavvy_latency_seconds_bucket{{name="{label}",le="{upper_bound}"}} {cumulative}')
+        lines.append(f'taxsavvy_latency_seconds_count{{name="{label}"}} {count}')
+        lines.append(f'taxsavvy_latency_seconds_sum{{name="{label}"}} {total}')
+
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics_file(path):
+    """Writes the current metrics to `path` (atomically replacing any previous dump)."""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w') as f:
+        f.write(render())
+    os.replace(temp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Scrapes are frequent; keep them out of the app log
+
+
+_server = None
+
+
+def start_http_server(port, host='0.0.0.0'):
+    """
+    Serves the metrics over HTTP from a daemon thread. Only the first call per process starts a server.
+    """
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True).start()
+    return _server
+
+
+def start_from_env():
+    """
+    Starts the HTTP exporter if TAXSAVVY_METRICS_PORT is set.
+    Does nothing when metrics are disabled.
+    """
+    if not ENABLED:
+        return
+    port = os.environ.get('TAXSAVVY_METRICS_PORT')
+    if port:
+        start_http_server(int(port))
+
+
+if ENABLED and os.environ.get('TAXSAVVY_METRICS_FILE'):
+    atexit.register(write_metrics_file, os.environ['TAXSAVVY_METRICS_FILE'])
@@ -0,0 +1,199 @@
+"""
+Command-line payroll tax processor.
+
+Streams an employee income/deduction file (CSV or Parquet) through the batch
+tax engine in fixed-size chunks and writes the results as it goes, so memory
+stays bounded by the chunk size rather than the file size.
+
+Usage:
+    python payroll_cli.py employees.csv taxes.csv --chunk-size 100000
+    python payroll_cli.py employees.parquet taxes.parquet --workers 32
+
+With `--workers N` the input is split into N contiguous row ranges (Parquet
+row groups, or CSV byte ranges aligned to line boundaries). Each range is
+processed by its own worker process into a partition file, and the
+partitions are concatenated in input order. The output is identical to a
+single-process run.
+
+Input columns: `gross_total_income` (required), `regime`, `age_group` and any
+of the deduction columns in tax_batch.DEDUCTION_COLUMNS. Every input column is
+copied to the output, followed by the tax breakdown columns.
+
+With `--advise`, the input also needs an `investment_budget` column, and the
+investment plan columns from deduction_optimizer.PLAN_COLUMNS are appended:
+how to split each employee's budget across 80C/80CCD(1B)/80D and which
+regime to choose.
+
+`--financial-year 2025-26` applies that year's rules instead of the default
+year's. Repeat it to compare years side by side: the breakdown (and plan)
+columns are then written once per year, suffixed with the year
+(`total_2024-25`, `total_2025-26`, ...).
+
+With `--paise`, the breakdown is computed exactly in integer paise by
+tax_paise.py and the breakdown columns are int64 paise instead of float
+rupees. `python tax_paise.py` reconciles the two against each other.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from deduction_optimizer import optimize_deductions_frame
+from tabular_io import ChunkWriter, is_parquet, peak_rss_bytes, plan_shards, read_chunks
+from tax_batch import calculate_tax_frame
+from tax_paise import calculate_tax_frame_paise
+from tax_calculator import DEFAULT_FINANCIAL_YEAR, financial_years as available_financial_years
+
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def process_chunk(chunk, advise=False, financial_years=None, paise=False):
+    """
+    Appends the tax breakdown columns (and with `advise`, the investment plan columns)
+    to one chunk of employee rows, for each of `financial_years` (default: the default year).
+    With more than one year, each year's columns are suffixed with `_<year>`. With `paise`,
+    the breakdown columns are exact integer paise.
+    """
+    frames = [chunk]
+    tax_frame = calculate_tax_frame_paise if paise else calculate_tax_frame
+    for financial_year in financial_years or [None]:
+        year_frames = [tax_frame(chunk, financial_year=financial_year)]
+        if advise:
+            year_frames.append(optimize_deductions_frame(chunk, financial_year=financial_year))
+        if financial_years and len(financial_years) > 1:
+            year_frames = [frame.add_suffix(f'_{financial_year}') for frame in year_frames]
+        frames.extend(year_frames)
+    return pd.concat(frames, axis=1)
+
+
+def process_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, shard=None, advise=False, financial_years=None,
+                 paise=False):
+    """
+    Streams `input_path` (or one shard of it) through the tax engine into `output_path`.
+    Returns the number of rows processed.
+    """
+    rows = 0
+    with ChunkWriter(output_path) as writer:
+        for chunk in read_chunks(input_path, chunk_size, shard):
+            writer.write(process_chunk(chunk, advise, financial_years, paise))
+            rows += len(chunk)
+    return rows
+
+
+def merge_partitions(partition_paths, output_path):
+    """
+    Concatenates partition files, in the given order, into `output_path`.
+    """
+    # A shard with no rows leaves an empty partition file, with no header or schema
+    partition_paths = [path for path in partition_paths if os.path.getsize(path) > 0]
+    if not is_parquet(output_path):
+        with open(output_path, 'wb') as out:
+            header_written = False
+            for path in partition_paths:
+                with open(path, 'rb') as part:
+                    header = part.readline()
+                    if not header_written:
+                        out.write(header)
+                        header_written = True
+                    shutil.copyfileobj(part, out)
+        return
+
+    if not partition_paths:
+        open(output_path, 'w').close()
+        return
+    # Each partition's schema comes from its own first chunk, so a column can be int64 in one
+    # partition and double in another; write them all with the widest type of each column
+    schema = pa.unify_schemas([pq.read_schema(path) for path in partition_paths], promote_options='permissive')
+    writer = pq.ParquetWriter(output_path, schema)
+    try:
+        for path in partition_paths:
+            parquet_file = pq.ParquetFile(path)
+            for i in range(parquet_file.num_row_groups):
+                writer.write_table(parquet_file.read_row_group(i).cast(schema))
+    finally:
+        writer.close()
+
+
+def process_file_parallel(input_path, output_path, workers, chunk_size=DEFAULT_CHUNK_SIZE, advise=False, financial_years=None,
+                          paise=False):
+    """
+    Processes `input_path` with a pool of `workers` processes, one shard each,
+    then merges their partitions into `output_path` in input order.
+    Returns the number of rows processed.
+    """
+    shards = plan_shards(input_path, workers)
+    extension = os.path.splitext(output_path)[1]
+    partition_dir = tempfile.mkdtemp(prefix='.partitions-', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        partition_paths = [os.path.join(partition_dir, f'part-{i:05d}{extension}') for i in range(len(shards))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(process_file, input_path, partition_path, chunk_size, shard, advise, financial_years, paise)
+                for partition_path, shard in zip(partition_paths, shards)
+            ]
+            rows = sum(future.result() for future in futures)
+        if any(os.path.getsize(path) for path in partition_paths):
+            merge_partitions(partition_paths, output_path)
+        else:
+            # No shard had rows (e.g. a header-only CSV), so no partition has the header; the
+            # serial pass over the empty input writes the same output a single-process run would
+            process_file(input_path, output_path, chunk_size, advise=advise, financial_years=financial_years, paise=paise)
+    finally:
+        shutil.rmtree(partition_dir, ignore_errors=True)
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compute income tax for every employee in a payroll file.")
+    parser.add_argument("input", help="Input CSV or Parquet file")
+    parser.add_argument("output", help="Output CSV or Parquet file (format chosen by extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for sharded runs (default: %(default)s)")
+    parser.add_argument("--advise", action="store_true", help="Append an investment plan per employee (needs an investment_budget column)")
+    parser.add_argument("--financial-year", action="append", dest="financial_years", metavar="YEAR",
+                        help="Financial year whose rules to apply, e.g. 2025-26; repeat to compare years (default: %s)" % DEFAULT_FINANCIAL_YEAR)
+    parser.add_argument("--paise", action="store_true", help="Compute exactly in integer paise; breakdown columns are int64 paise")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.chunk_size <= 0:
+        raise SystemExit("--chunk-size must be a positive number of rows")
+    if args.workers <= 0:
+        raise SystemExit("--workers must be at least 1")
+    available = available_financial_years()
+    for financial_year in args.financial_years or []:
+        if financial_year not in available:
+            raise SystemExit(f"--financial-year must be one of {', '.join(available)}")
+
+    start = time.perf_counter()
+    if args.workers > 1:
+        rows = process_file_parallel(args.input, args.output, args.workers, args.chunk_size, advise=args.advise,
+                                     financial_years=args.financial_years, paise=args.paise)
+    else:
+        rows = process_file(args.input, args.output, args.chunk_size, advise=args.advise, financial_years=args.financial_years,
+                            paise=args.paise)
+    elapsed = time.perf_counter() - start
+
+    rows_per_second = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"Processed {rows:,} rows in {elapsed:,.2f}s ({rows_per_second:,.0f} rows/s)")
+    peak_rss = peak_rss_bytes()
+    if peak_rss is not None:
+        message = f"Peak RSS: {peak_rss / (1024 * 1024):,.1f} MiB"
+        if args.workers > 1:
+            # Workers run at the same time, so the run as a whole can use up to about `workers` times this
+            worker_rss = peak_rss_bytes(children=True)
+            message += f" in the main process, {worker_rss / (1024 * 1024):,.1f} MiB in the largest worker (not a total)"
+        print(message)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Chunked CSV and Parquet I/O shared by the command-line tools.
+
+read_chunks() streams a payroll input file as DataFrames of a fixed number
+of rows, optionally one shard of it from plan_shards(), and ChunkWriter
+appends DataFrame chunks to a CSV or Parquet output through Arrow's
+streaming writers. Kept out of payroll_cli.py so the capital gains and TDS
+tools don't import the payroll CLI.
+"""
+
+import io
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from tax_batch import DEDUCTION_COLUMNS
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+# Amounts are always read as floats, so a chunk of whole numbers (or, in Parquet, a batch
+# without nulls) has the same column types as the rest of the file
+AMOUNT_COLUMNS = ('gross_total_income', 'investment_budget') + DEDUCTION_COLUMNS
+CSV_DTYPES = {'regime': str, 'age_group': str, **{name: 'float64' for name in AMOUNT_COLUMNS}}
+
+
+def is_parquet(path):
+    """True if the path should be read/written as Parquet rather than CSV."""
+    return os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS
+
+
+def read_chunks(path, chunk_size, shard=None):
+    """
+    Yields the input file as DataFrames of at most `chunk_size` rows.
+    `shard` restricts reading to one entry of plan_shards(path, ...).
+    """
+    if is_parquet(path):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=shard):
+            chunk = batch.to_pandas()
+            amounts = [name for name in AMOUNT_COLUMNS if name in chunk]
+            chunk[amounts] = chunk[amounts].astype('float64')
+            yield chunk
+    elif shard is None:
+        # Labels are read as strings so a chunk of empty cells doesn't change column types
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=CSV_DTYPES)
+    else:
+        start, end = shard
+        columns = pd.read_csv(path, nrows=0).columns
+        with open(path, 'rb') as f:
+            reader = io.BufferedReader(_ByteRange(f, start, end))
+            yield from pd.read_csv(reader, chunksize=chunk_size, header=None, names=columns, dtype=CSV_DTYPES)
+
+
+class _ByteRange(io.RawIOBase):
+    """
+    Read-only view of bytes [start, end) of an open binary file.
+    """
+
+    def __init__(self, f, start, end):
+        f.seek(start)
+        self._f = f
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._f.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def plan_shards(path, workers):
+    """
+    Splits the input into at most `workers` contiguous row ranges, in file order.
+    Parquet shards are lists of row group indices; CSV shards are (start, end)
+    byte offsets that begin and end on line boundaries after the header.
+    """
+    if is_parquet(path):
+        metadata = pq.ParquetFile(path).metadata
+        row_counts = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        target = sum(row_counts) / workers
+        shards, current, current_rows = [], [], 0
+        for i, rows in enumerate(row_counts):
+            current.append(i)
+            current_rows += rows
+            # Close the shard once it reaches its share, keeping one shard per remaining worker
+            if current_rows >= target * (len(shards) + 1) and len(shards) < workers - 1:
+                shards.append(current)
+                current = []
+        if current:
+            shards.append(current)
+        return shards
+
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline() # Header
+        data_start = f.tell()
+        boundaries = [data_start]
+        for k in range(1, workers):
+            f.seek(max(data_start + (size - data_start) * k // workers, boundaries[-1]))
+            if f.tell() > data_start:
+                f.readline() # Move to the start of the next full line
+            boundaries.append(f.tell())
+        boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+class ChunkWriter:
+    """
+    Appends DataFrame chunks to a CSV or Parquet output file.
+    Both formats are written through Arrow's streaming writers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if self._writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._schema = table.schema
+            writer_class = pq.ParquetWriter if is_parquet(self.path) else pa_csv.CSVWriter
+            self._writer = writer_class(self.path, self._schema)
+        else:
+            # Later chunks are cast to the first chunk's schema so the output stays consistent
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            open(self.path, 'w').close() # Empty input still produces an (empty) output file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def peak_rss_bytes(children=False):
+    """
+    Peak resident set size of this process, or None if unavailable. With `children`, the peak of
+    the largest single finished child process instead; the OS doesn't report their total.
+    """
+    try:
+        import resource
+    except ImportError: # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,189 @@
+"""
+Headless HTTP API for the tax calculator.
+
+A small ASGI (Starlette) service for other systems such as the HR portal.
+It imports the calculation modules only, never Streamlit.
+
+Endpoints:
+    GET  /health       liveness check
+    POST /tax          one computation, returns a TaxBreakdown as JSON
+    POST /tax/batch    {"records": [...]} computed in one vectorized call per financial year
+    GET  /metrics      OpenMetrics text (empty unless TAXSAVVY_METRICS is set)
+
+A record is {"gross_total_income": 1200000, "regime": "Old Tax Regime",
+"age_group": "Below 60 years", "deductions": {"80C": 150000},
+"financial_year": "2024-25"}; only `gross_total_income` is required.
+
+Run with several worker processes for throughput:
+    uvicorn tax_api:app --workers 4
+
+Test in-process without a server:
+    from starlette.testclient import TestClient
+    TestClient(app).post("/tax", json={"gross_total_income": 750000}).json()
+"""
+
+import math
+from numbers import Real
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import metrics
+from tax_calculator import (
+    DEFAULT_FINANCIAL_YEAR,
+    NEW_REGIME,
+    OLD_REGIME,
+    OLD_REGIME_SLABS,
+    calculate_tax_breakdown,
+    financial_years,
+)
+from tax_batch import DEDUCTION_COLUMNS, RESULT_COLUMNS, calculate_tax_batch
+
+MAX_BATCH_RECORDS = 100000
+# Batches above this size are computed on a worker thread so they don't stall other requests
+INLINE_BATCH_RECORDS = 1000
+
+REGIMES = (NEW_REGIME, OLD_REGIME)
+AGE_GROUPS = tuple(OLD_REGIME_SLABS)
+FINANCIAL_YEARS = tuple(financial_years())
+
+
+class RequestError(ValueError):
+    """Invalid request payload; reported to the client as a 4xx response."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _amount(value, name):
+    # bool is a subclass of int, but `true` is never a valid amount. JSON also allows NaN and
+    # Infinity, and 1e400 parses as inf; integers too large for a float are just as unusable.
+    if not isinstance(value, Real) or isinstance(value, bool) or not _finite(value) or value < 0:
+        raise RequestError(f"'{name}' must be a non-negative number")
+    return value
+
+
+def _finite(value):
+    try:
+        return math.isfinite(value)
+    except OverflowError:
+        return False
+
+
+def parse_record(data):
+    """
+    Validates one record and returns (gross_total_income, regime, age_group, deductions, financial_year).
+    """
+    if not isinstance(data, dict):
+        raise RequestError("Each record must be a JSON object")
+    if 'gross_total_income' not in data:
+        raise RequestError("'gross_total_income' is required")
+    gross_total_income = _amount(data['gross_total_income'], 'gross_total_income')
+
+    regime = data.get('regime', NEW_REGIME)
+    if regime not in REGIMES:
+        raise RequestError(f"'regime' must be one of {list(REGIMES)}")
+    age_group = data.get('age_group', "Below 60 years")
+    if age_group not in AGE_GROUPS:
+        raise RequestError(f"'age_group' must be one of {list(AGE_GROUPS)}")
+
+    deductions = data.get('deductions') or {}
+    if not isinstance(deductions, dict):
+        raise RequestError("'deductions' must be a JSON object")
+    for name, value in deductions.items():
+        if name not in DEDUCTION_COLUMNS:
+            raise RequestError(f"Unknown deduction '{name}', expected one of {list(DEDUCTION_COLUMNS)}")
+        _amount(value, name)
+
+    financial_year = data.get('financial_year', DEFAULT_FINANCIAL_YEAR)
+    if financial_year not in FINANCIAL_YEARS:
+        raise RequestError(f"'financial_year' must be one of {list(FINANCIAL_YEARS)}")
+    return gross_total_income, regime, age_group, deductions, financial_year
+
+
+def compute_batch(records):
+    """
+    Validates and computes a list of records with the vectorized batch engine,
+    one call per financial year present. Returns one result dict per record, in order.
+    """
+    parsed = [parse_record(record) for record in records]
+    results = [None] * len(parsed)
+    for financial_year in dict.fromkeys(record[4] for record in parsed):
+        rows = [i for i, record in enumerate(parsed) if record[4] == financial_year]
+        year_records = [parsed[i] for i in rows]
+        deductions = {
+            name: [record[3].get(name, 0) for record in year_records]
+            for name in DEDUCTION_COLUMNS
+            if any(name in record[3] for record in year_records)
+        }
+        year_results = calculate_tax_batch(
+            [record[0] for record in year_records],
+            [record[1] for record in year_records],
+            [record[2] for record in year_records],
+            deductions,
+            financial_year,
+        )
+        columns = [year_results[name].tolist() for name in RESULT_COLUMNS]
+        for i, row in zip(rows, zip(*columns)):
+            results[i] = dict(zip(RESULT_COLUMNS, row))
+    return results
+
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except ValueError: # JSONDecodeError, or UnicodeDecodeError for a body that isn't UTF-8
+        raise RequestError("Request body must be valid JSON")
+
+
+async def health(request):
+    return JSONResponse({'status': 'ok'})
+
+
+async def tax(request):
+    gross_total_income, regime, age_group, deductions, financial_year = parse_record(await _read_json(request))
+    breakdown = calculate_tax_breakdown(gross_total_income, regime, age_group, deductions, financial_year)
+    return JSONResponse(breakdown._asdict())
+
+
+async def tax_batch(request):
+    body = await _read_json(request)
+    records = body.get('records') if isinstance(body, dict) else None
+    if not isinstance(records, list):
+        raise RequestError("Body must be an object with a 'records' list")
+    if len(records) > MAX_BATCH_RECORDS:
+        raise RequestError(f"At most {MAX_BATCH_RECORDS} records per batch", status_code=413)
+
+    if len(records) > INLINE_BATCH_RECORDS:
+        results = await run_in_threadpool(compute_batch, records)
+    else:
+        results = compute_batch(records)
+    return JSONResponse({'results': results})
+
+
+async def metrics_endpoint(request):
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def request_error(request, exc):
+    return JSONResponse({'error': str(exc)}, status_code=exc.status_code)
+
+
+app = Starlette(
+    routes=[
+        Route('/health', health, methods=['GET']),
+        Route('/tax', tax, methods=['POST']),
+        Route('/tax/batch', tax_batch, methods=['POST']),
+        Route('/metrics', metrics_endpoint, methods=['GET']),
+    ],
+    exception_handlers={RequestError: request_error},
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=8000)
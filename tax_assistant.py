@@ -0,0 +1,797 @@
+"""
+Local retrieval-augmented tax Q&A.
+
+The knowledge content (knowledge.py) is split into chunks, embedded once and
+stored as a FAISS index on disk. The app memory-maps that index on load
+instead of re-embedding anything, embeds only the question, retrieves the
+closest chunks and asks a local model to answer from them.
+
+Build (or rebuild) the index after editing the knowledge content:
+    python tax_assistant.py build
+
+Embeddings are cached next to the index, keyed by a hash of each chunk's
+content, so a rebuild only embeds new or changed chunks (use --full to
+re-embed everything).
+
+Ask from the command line:
+    python tax_assistant.py ask "What is the 80C limit?"
+
+Set TAXSAVVY_ASSISTANT_STUB=1 to use the deterministic stub embedder and
+generator instead of sentence-transformers and ollama (for tests and CI).
+
+faiss, ollama and sentence-transformers (torch) are imported only when a
+feature first needs them, and loaded models are shared process-wide, so
+importing this module costs no more than numpy.
+
+Answers are about one financial year (the default year unless asked),
+named in the prompt. They are cached (AnswerCache) per year by exact
+question and by question similarity, and the cache is invalidated
+whenever the index content changes.
+
+Generation goes through one InferenceClient per model and process, which
+runs at most TAXSAVVY_LLM_CONCURRENCY generations at once, queues the rest
+fairly across sessions and streams tokens back as they are produced. The
+ollama host comes from OLLAMA_HOST; fake_ollama.py stands in for it in tests.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import textwrap
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque, namedtuple
+
+import numpy as np
+
+import metrics
+from knowledge import load_documents
+from tax_rules import financial_years, rules_for
+
+INDEX_DIR = os.environ.get(
+    'TAXSAVVY_INDEX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tax_kb_index'),
+)
+EMBEDDING_MODEL = os.environ.get('TAXSAVVY_EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
+LLM_MODEL = os.environ.get('TAXSAVVY_LLM_MODEL', 'llama3.2')
+USE_STUB_MODELS = os.environ.get('TAXSAVVY_ASSISTANT_STUB', '') not in ('', '0')
+# Cosine similarity above which a different wording of a cached question reuses its answer
+ANSWER_CACHE_SIMILARITY = float(os.environ.get('TAXSAVVY_ANSWER_CACHE_SIMILARITY', '0.92'))
+# Generations run at once per process, and how many more may wait for a slot before callers are told it's busy
+LLM_CONCURRENCY = int(os.environ.get('TAXSAVVY_LLM_CONCURRENCY', '2'))
+LLM_MAX_WAITING = int(os.environ.get('TAXSAVVY_LLM_MAX_WAITING', '16'))
+LLM_QUEUE_TIMEOUT = 60.0
+
+INDEX_FILE = 'index.faiss'
+CHUNKS_FILE = 'chunks.json'
+EMBEDDINGS_FILE = 'embeddings.npy'
+EMBED_BATCH_SIZE = 64
+MAX_CHUNK_CHARS = 800
+TOP_K = 4
+# Above this many chunks an HNSW graph is built instead of a flat index, keeping search in the low milliseconds
+HNSW_MIN_CHUNKS = 10000
+HNSW_NEIGHBOURS = 32
+# Search-time breadth of the HNSW graph walk; FAISS's default of 16 misses close matches in dense corpora
+HNSW_EF_SEARCH = 64
+
+Chunk = namedtuple('Chunk', ['source', 'text'])
+# `cached` is None for a generated answer, otherwise 'exact' or 'similar'
+Answer = namedtuple('Answer', ['text', 'sources', 'cached'], defaults=(None,))
+BuildStats = namedtuple('BuildStats', ['chunks', 'embedded', 'reused', 'removed'])
+
+
+# --- Models ---
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder for tests: no model download, no torch.
+    """
+
+    def __init__(self, dim=384):
+        self.name = f'hashing-{dim}'
+        self.dim = dim
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r'[a-z0-9()]+', text.lower()):
+                vectors[row, zlib.crc32(token.encode('utf-8')) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+
+class SentenceTransformerEmbedder:
+    """
+    Embeds text with a local sentence-transformers model (normalized, for cosine similarity).
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts):
+        vectors = self.model.encode(list(texts), batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32)
+
+
+class StubGenerator:
+    """
+    Deterministic stand-in for the local LLM: answers with the best-matching context.
+    """
+
+    name = 'stub'
+
+    def stream(self, prompt):
+        context = prompt.split('Context:\n', 1)[-1].split('\n\nQuestion:', 1)[0]
+        first_chunk = context.split('\n\n', 1)[0]
+        words = f"Based on the tax notes: {first_chunk}".split(' ')
+        for i, word in enumerate(words):
+            yield word if i == 0 else f' {word}'
+
+    def generate(self, prompt):
+        return ''.join(self.stream(prompt))
+
+
+class OllamaGenerator:
+    """
+    Generates answers with a model served by a local ollama daemon (OLLAMA_HOST, or `host`).
+    """
+
+    def __init__(self, model=LLM_MODEL, host=None):
+        import ollama
+
+        self.name = model
+        self.client = ollama.Client(host=host)
+
+    def stream(self, prompt):
+        for part in self.client.generate(model=self.name, prompt=prompt, stream=True):
+            if part['response']:
+                yield part['response']
+
+    def generate(self, prompt):
+        return self.client.generate(model=self.name, prompt=prompt)['response']
+
+
+class InferenceBusy(RuntimeError):
+    """The model's queue is full, or a request waited longer than the queue timeout for a slot."""
+
+
+class _Ticket:
+    __slots__ = ('granted',)
+
+    def __init__(self):
+        self.granted = False
+
+
+class InferenceClient:
+    """
+    Process-wide gate in front of a generator.
+
+    At most `max_concurrent` generations run at once. Further requests wait
+    in per-session FIFO queues that are served round-robin, so one session
+    asking many questions cannot starve the others. When `max_waiting`
+    requests are already queued, or a request waits longer than
+    `queue_timeout` seconds, InferenceBusy is raised instead.
+    """
+
+    def __init__(self, generator, max_concurrent=LLM_CONCURRENCY, max_waiting=LLM_MAX_WAITING,
+                 queue_timeout=LLM_QUEUE_TIMEOUT):
+        self.generator = generator
+        self.name = generator.name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._queues = OrderedDict() # session -> deque of _Tickets; the first session is served next
+
+    def status(self):
+        with self._cond:
+            return {
+                'active': self._active,
+                'waiting': self._waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_waiting': self.max_waiting,
+            }
+
+    def is_busy(self):
+        """True if a new request would have to wait for a slot."""
+        with self._cond:
+            return self._active >= self.max_concurrent
+
+    def _dispatch(self):
+        # Called with the condition held: grants free slots to queued sessions in turn
+        granted = False
+        while self._active < self.max_concurrent and self._queues:
+            session, tickets = next(iter(self._queues.items()))
+            tickets.popleft().granted = True
+            if tickets:
+                self._queues.move_to_end(session)
+            else:
+                del self._queues[session]
+            self._active += 1
+            self._waiting -= 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _acquire(self, session):
+        with self._cond:
+            if self._waiting >= self.max_waiting:
+                raise InferenceBusy("The assistant is busy; please try again in a moment")
+            ticket = _Ticket()
+            self._queues.setdefault(session, deque()).append(ticket)
+            self._waiting += 1
+            self._dispatch()
+            if not self._cond.wait_for(lambda: ticket.granted, self.queue_timeout):
+                tickets = self._queues[session]
+                tickets.remove(ticket)
+                if not tickets:
+                    del self._queues[session]
+                self._waiting -= 1
+                raise InferenceBusy("The assistant is busy; please try again in a moment")
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._dispatch()
+
+    def stream(self, prompt, session=None):
+        """
+        Yields the answer in pieces as the model produces them, after waiting
+        for a slot. The slot is released when the stream ends or is closed.
+        """
+        start = time.perf_counter()
+        self._acquire(session)
+        try:
+            if metrics.ENABLED:
+                metrics.observe('assistant.queue_wait', time.perf_counter() - start)
+            first = True
+            for piece in self.generator.stream(prompt):
+                if first and metrics.ENABLED:
+                    metrics.observe('assistant.time_to_first_token', time.perf_counter() - start)
+                first = False
+                yield piece
+        finally:
+            self._release()
+
+    def generate(self, prompt, session=None):
+        return ''.join(self.stream(prompt, session))
+
+
+_models_lock = threading.Lock()
+_models = {}
+
+
+def shared_model(key, factory):
+    """
+    Returns the process-wide instance for `key`, creating it with `factory()` on first use.
+    Models are expensive to load and read-only afterwards, so every session shares one copy.
+    """
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = factory()
+        return model
+
+
+def default_embedder():
+    if USE_STUB_MODELS:
+        return shared_model('embedder:stub', HashingEmbedder)
+    return shared_model(f'embedder:{EMBEDDING_MODEL}', SentenceTransformerEmbedder)
+
+
+def default_generator():
+    if USE_STUB_MODELS:
+        return shared_model('generator:stub', StubGenerator)
+    return shared_model(f'generator:{LLM_MODEL}', OllamaGenerator)
+
+
+def default_inference_client():
+    """The process-wide InferenceClient for the default generator."""
+    generator = default_generator()
+    return shared_model(f'inference:{generator.name}', lambda: InferenceClient(generator))
+
+
+# --- Chunking ---
+
+def _clean(text):
+    text = textwrap.dedent(text).strip()
+    return re.sub(r'<[^>]+>', '', text) # Strip HTML tags (the disclaimer is HTML)
+
+
+def _split_long(text):
+    """Splits text longer than MAX_CHUNK_CHARS on line boundaries."""
+    if len(text) <= MAX_CHUNK_CHARS:
+        return [text]
+    pieces, current = [], ''
+    for line in text.split('\n'):
+        if current and len(current) + len(line) + 1 > MAX_CHUNK_CHARS:
+            pieces.append(current)
+            current = ''
+        current = f'{current}\n{line}' if current else line
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_document(source, text):
+    """
+    Splits one markdown document into chunks: each top-level bullet (with
+    its nested bullets) or paragraph becomes one chunk.
+    """
+    blocks, current = [], []
+    for line in _clean(text).split('\n'):
+        starts_block = line.startswith(('* ', '- ')) or (not line.strip() and current)
+        if starts_block and current:
+            blocks.append('\n'.join(current).strip())
+            current = []
+        if line.strip():
+            current.append(line)
+    if current:
+        blocks.append('\n'.join(current).strip())
+
+    return [Chunk(source, piece) for block in blocks if block for piece in _split_long(block)]
+
+
+def chunk_documents(documents):
+    """Chunks a list of (source, text) documents, preserving order."""
+    return [chunk for source, text in documents for chunk in chunk_document(source, text)]
+
+
+# --- Index ---
+
+def _chunk_input(chunk):
+    """Text that is embedded for a chunk: its source title gives short chunks context."""
+    return f'{chunk.source}: {chunk.text}'
+
+
+def chunk_hash(chunk):
+    """Content hash of the text embedded for a chunk; the embedding cache key."""
+    return hashlib.sha256(_chunk_input(chunk).encode('utf-8')).hexdigest()
+
+
+def load_embedding_cache(index_dir, embedding_model):
+    """
+    Returns {chunk hash: vector} from the previous build in `index_dir`, or {}
+    if there is none or it was built with a different embedding model.
+    """
+    try:
+        with open(os.path.join(index_dir, CHUNKS_FILE), encoding='utf-8') as f:
+            data = json.load(f)
+        vectors = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode='r')
+    except FileNotFoundError:
+        return {}
+    if data['embedding_model'] != embedding_model or len(vectors) != len(data['chunks']):
+        return {}
+    return {chunk['hash']: vectors[i] for i, chunk in enumerate(data['chunks']) if 'hash' in chunk}
+
+
+def embed_chunks(chunks, embedder, cache=None):
+    """
+    Returns (vectors, hashes, number of chunks embedded) for `chunks`. Vectors
+    found in `cache` are reused; the rest are embedded in batches of EMBED_BATCH_SIZE.
+    """
+    cache = cache or {}
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+    texts = {}
+    for chunk, key in zip(chunks, hashes):
+        if key not in cache:
+            texts.setdefault(key, _chunk_input(chunk)) # Identical chunks are embedded once
+
+    new_vectors = {}
+    missing = list(texts)
+    for start in range(0, len(missing), EMBED_BATCH_SIZE):
+        batch = missing[start:start + EMBED_BATCH_SIZE]
+        new_vectors.update(zip(batch, embedder.embed([texts[key] for key in batch])))
+
+    vectors = np.empty((len(chunks), embedder.dim), dtype=np.float32)
+    for row, key in enumerate(hashes):
+        vectors[row] = new_vectors[key] if key in new_vectors else cache[key]
+    return vectors, hashes, len(missing)
+
+
+def _replace_file(path, write):
+    """Writes a file through `write(temp_path)` and moves it into place, so readers never see a partial file."""
+    temp_path = f'{path}.tmp'
+    write(temp_path)
+    os.replace(temp_path, path)
+
+
+def build_index(chunks, embedder, index_dir=INDEX_DIR, incremental=True):
+    """
+    Embeds `chunks` and writes the FAISS index, chunk store and embedding
+    cache to `index_dir`. With `incremental`, chunks whose content is
+    unchanged since the previous build reuse their cached embeddings and
+    chunks no longer present are dropped. Returns BuildStats.
+    """
+    import faiss
+
+    cache = load_embedding_cache(index_dir, embedder.name) if incremental else {}
+    vectors, hashes, embedded = embed_chunks(chunks, embedder, cache)
+
+    # Rebuilding the FAISS structure from cached vectors takes milliseconds; embedding is the slow part
+    if len(chunks) >= HNSW_MIN_CHUNKS:
+        index = faiss.IndexHNSWFlat(embedder.dim, HNSW_NEIGHBOURS, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(embedder.dim)
+    index.add(vectors)
+
+    os.makedirs(index_dir, exist_ok=True)
+    _replace_file(os.path.join(index_dir, EMBEDDINGS_FILE), lambda path: _save_npy(path, vectors))
+    _replace_file(os.path.join(index_dir, INDEX_FILE), lambda path: faiss.write_index(index, path))
+    _replace_file(os.path.join(index_dir, CHUNKS_FILE), lambda path: _save_json(path, {
+        'embedding_model': embedder.name,
+        'chunks': [dict(chunk._asdict(), hash=key) for chunk, key in zip(chunks, hashes)],
+    }))
+
+    current = set(hashes)
+    return BuildStats(
+        chunks=len(chunks),
+        embedded=embedded,
+        reused=sum(1 for key in hashes if key in cache),
+        removed=sum(1 for key in cache if key not in current),
+    )
+
+
+def _save_npy(path, array):
+    with open(path, 'wb') as f: # A file object stops np.save from appending .npy to the temp name
+        np.save(f, array)
+
+
+def _save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class KnowledgeIndex:
+    """
+    A FAISS index of chunk embeddings plus the chunk texts it refers to.
+    """
+
+    def __init__(self, index, chunks, embedding_model, fingerprint=None, index_dir=None):
+        self.index = index
+        self.chunks = chunks
+        self.embedding_model = embedding_model
+        self.fingerprint = fingerprint # Changes whenever the indexed content or model changes
+        self.index_dir = index_dir
+        self._stamp = _file_stamp(os.path.join(index_dir, CHUNKS_FILE)) if index_dir else None
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        """
+        Loads a saved index. The vectors are memory-mapped read-only rather
+        than copied into memory, so loading is fast and shared between processes.
+        """
+        import faiss
+
+        index_path = os.path.join(index_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            raise FileNotFoundError(f"No knowledge index at {index_dir}; run `python tax_assistant.py build` first")
+        # IO_FLAG_MMAP_IFC maps flat vector storage in place (newer FAISS); IO_FLAG_MMAP covers older versions
+        mmap_flag = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP)
+        index = faiss.read_index(index_path, mmap_flag | faiss.IO_FLAG_READ_ONLY)
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = HNSW_EF_SEARCH # Not stored in the index file
+        with open(os.path.join(index_dir, CHUNKS_FILE), encoding='utf-8') as f:
+            data = json.load(f)
+        chunks = [Chunk(chunk['source'], chunk['text']) for chunk in data['chunks']]
+        fingerprint = hashlib.sha256(
+            '\n'.join([data['embedding_model']] + [chunk.get('hash', '') for chunk in data['chunks']]).encode('utf-8')
+        ).hexdigest()
+        return cls(index, chunks, data['embedding_model'], fingerprint, index_dir)
+
+    def is_stale(self):
+        """True if the index on disk has been rebuilt since this one was loaded."""
+        return self.index_dir is not None and _file_stamp(os.path.join(self.index_dir, CHUNKS_FILE)) != self._stamp
+
+    def search(self, query_vectors, k=TOP_K):
+        """
+        Returns, for each query vector, a list of (score, Chunk) best matches first.
+        """
+        scores, ids = self.index.search(np.ascontiguousarray(query_vectors, dtype=np.float32), k)
+        return [
+            [(float(score), self.chunks[i]) for score, i in zip(row_scores, row_ids) if i >= 0]
+            for row_scores, row_ids in zip(scores, ids)
+        ]
+
+
+# --- Question answering ---
+
+PROMPT_TEMPLATE = """You are TaxSavvy Assistant, a helpful guide to Indian income tax (FY {financial_year}).
+Answer the question using only the context below. If the context does not contain the answer, say so.
+Keep the answer short and mention the relevant section numbers.
+
+Context:
+{context}
+
+Question: {question}
+Answer:"""
+
+
+def build_prompt(question, chunks, financial_year):
+    context = '\n\n'.join(f'[{chunk.source}] {chunk.text}' for chunk in chunks)
+    return PROMPT_TEMPLATE.format(financial_year=financial_year, context=context, question=question.strip())
+
+
+def normalize_question(question):
+    """Exact-match cache key: case, spacing and trailing punctuation don't change the question."""
+    return ' '.join(question.lower().split()).rstrip('?.! ')
+
+
+class AnswerCache:
+    """
+    Thread-safe cache of generated answers, shared by every session.
+
+    A question hits if its normalized text was asked before, or if its
+    embedding is at least `similarity` (cosine) to a cached question's.
+    Least recently used entries are evicted beyond `max_entries` or
+    `max_bytes`, and entries expire after `ttl_seconds`. Cached answers
+    belong to one index fingerprint; a different fingerprint clears them.
+    Each entry has a `scope` (the financial year asked about), and a lookup
+    only matches entries of its own scope.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=16 * 1024 * 1024, ttl_seconds=24 * 3600,
+                 similarity=ANSWER_CACHE_SIMILARITY, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self.clock = clock
+        self.fingerprint = None
+        # `misses` counts lookups that missed both the exact and the similarity match
+        self.hits = self.similar_hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # (scope, question key) -> (answer, vector, expires_at, size), oldest first
+        self._bytes = 0
+        self._matrix = None # Stacked vectors of _entries, rebuilt lazily after changes
+        self._matrix_keys = None
+        self._matrix_scopes = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+            self.fingerprint = fingerprint
+
+    def _remove(self, key):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        self._matrix = None
+
+    def _live(self, key, now):
+        """Moves a live entry to the most recently used end; drops it if expired."""
+        entry = self._entries[key]
+        if entry[2] <= now:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_exact(self, question, fingerprint, scope=None):
+        key = (scope, normalize_question(question))
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            entry = self._live(key, self.clock()) if key in self._entries else None
+            if entry is None:
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def get_similar(self, vector, fingerprint, scope=None):
+        """Returns the answer to the most similar cached question of `scope` above the threshold, or None."""
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries)
+                self._matrix = np.stack([self._entries[key][1] for key in self._matrix_keys])
+                self._matrix_scopes = np.array([key[0] for key in self._matrix_keys], dtype=object)
+            keys = self._matrix_keys # _live drops expired entries, which resets the matrix
+            scores = np.where(self._matrix_scopes == scope, self._matrix @ vector, -np.inf)
+            # Best first among those above the threshold, skipping any that have expired
+            candidates = np.flatnonzero(scores >= self.similarity)
+            now = self.clock()
+            for i in candidates[np.argsort(-scores[candidates], kind='stable')]:
+                entry = self._live(keys[i], now)
+                if entry is not None:
+                    self.similar_hits += 1
+                    return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, question, vector, answer, fingerprint, scope=None):
+        key = (scope, normalize_question(question))
+        size = (len(key[1]) + len(answer.text) + sum(len(source) for source in answer.sources)) * 2 + vector.nbytes
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (answer, vector, self.clock() + self.ttl_seconds, size)
+            self._bytes += size
+            self._matrix = None
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'similar_hits': self.similar_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+            }
+
+
+class StreamingAnswer:
+    """
+    An answer whose text arrives in pieces: iterate it to receive them.
+    `text` is complete once iteration finishes; `sources` and `cached` are known up front.
+    """
+
+    def __init__(self, pieces, sources, cached=None, on_complete=None):
+        self.sources = sources
+        self.cached = cached
+        self.text = None
+        self._pieces = pieces
+        self._on_complete = on_complete
+
+    def __iter__(self):
+        parts = []
+        for piece in self._pieces:
+            parts.append(piece)
+            yield piece
+        self.text = ''.join(parts).strip()
+        if self._on_complete is not None:
+            self._on_complete(self.result())
+
+    def result(self):
+        return Answer(self.text, self.sources, self.cached)
+
+
+class TaxAssistant:
+    """
+    Retrieves the most relevant knowledge chunks for a question and asks the generator to answer from them.
+    Answers go through `answer_cache` when one is given. A plain generator is
+    wrapped in its own InferenceClient; pass a shared one to limit concurrency process-wide.
+    """
+
+    def __init__(self, knowledge_index, embedder, generator, top_k=TOP_K, answer_cache=None):
+        self._check_model(knowledge_index, embedder)
+        self.knowledge_index = knowledge_index
+        self.embedder = embedder
+        self.inference = generator if isinstance(generator, InferenceClient) else InferenceClient(generator)
+        self.top_k = top_k
+        self.answer_cache = answer_cache
+        self._reload_lock = threading.Lock()
+
+    @staticmethod
+    def _check_model(knowledge_index, embedder):
+        if knowledge_index.embedding_model != embedder.name:
+            raise ValueError(
+                f"Index was built with '{knowledge_index.embedding_model}' but the embedder is "
+                f"'{embedder.name}'; rebuild the index with `python tax_assistant.py build`"
+            )
+
+    def _current_index(self):
+        """The loaded index, reloaded first if it has been rebuilt on disk (a stat per question)."""
+        if self.knowledge_index.is_stale():
+            with self._reload_lock:
+                if self.knowledge_index.is_stale():
+                    knowledge_index = KnowledgeIndex.load(self.knowledge_index.index_dir)
+                    self._check_model(knowledge_index, self.embedder)
+                    self.knowledge_index = knowledge_index
+        return self.knowledge_index
+
+    def retrieve(self, question, vector=None):
+        """Returns the best-matching (score, Chunk) pairs for `question`."""
+        if vector is None:
+            vector = self.embedder.embed([question])[0]
+        return self._current_index().search(vector[np.newaxis], self.top_k)[0]
+
+    def answer_stream(self, question, session=None, financial_year=None):
+        """
+        Returns a StreamingAnswer for `question` about `financial_year` (None
+        for the default year). Cached answers arrive as one piece; otherwise
+        generation starts (after queueing for a model slot) when iteration
+        begins, and may raise InferenceBusy. `session` identifies the asker
+        for fair queueing.
+        """
+        financial_year = rules_for(financial_year).financial_year
+        knowledge_index = self._current_index()
+        # The generator is part of the key: a different model gives different answers
+        fingerprint = f'{knowledge_index.fingerprint}:{self.inference.name}'
+        cache = self.answer_cache
+        if cache is not None:
+            cached = cache.get_exact(question, fingerprint, financial_year)
+            if cached is not None:
+                return StreamingAnswer([cached.text], cached.sources, cached='exact')
+
+        vector = self.embedder.embed([question])[0]
+        if cache is not None:
+            cached = cache.get_similar(vector, fingerprint, financial_year)
+            if cached is not None:
+                return StreamingAnswer([cached.text], cached.sources, cached='similar')
+
+        chunks = [chunk for _, chunk in knowledge_index.search(vector[np.newaxis], self.top_k)[0]]
+        pieces = self.inference.stream(build_prompt(question, chunks, financial_year), session)
+        on_complete = (
+            (lambda answer: cache.put(question, vector, answer, fingerprint, financial_year)) if cache is not None else None
+        )
+        return StreamingAnswer(pieces, [chunk.source for chunk in chunks], on_complete=on_complete)
+
+    def answer(self, question, session=None, financial_year=None):
+        stream = self.answer_stream(question, session, financial_year)
+        for _ in stream:
+            pass
+        return stream.result()
+
+
+def load_assistant(index_dir=INDEX_DIR):
+    """
+    Loads the saved index with the default (or stub) models, the process-wide
+    inference client and a fresh answer cache.
+    """
+    return TaxAssistant(
+        KnowledgeIndex.load(index_dir), default_embedder(), default_inference_client(), answer_cache=AnswerCache(),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TaxSavvy knowledge index and Q&A.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    build = subcommands.add_parser('build', help="Embed the knowledge content and save the index")
+    build.add_argument('--index-dir', default=INDEX_DIR)
+    build.add_argument('--full', action='store_true', help="Ignore the embedding cache and re-embed every chunk")
+    ask = subcommands.add_parser('ask', help="Answer a question from the saved index")
+    ask.add_argument('question')
+    ask.add_argument('--index-dir', default=INDEX_DIR)
+    ask.add_argument('--financial-year', choices=financial_years(),
+                     help="Financial year the question is about (default: the default year)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        chunks = chunk_documents(load_documents())
+        stats = build_index(chunks, default_embedder(), args.index_dir, incremental=not args.full)
+        print(
+            f"Indexed {stats.chunks} chunks into {args.index_dir} "
+            f"({stats.embedded} embedded, {stats.reused} reused from cache, {stats.removed} removed)"
+        )
+    else:
+        answer = load_assistant(args.index_dir).answer_stream(args.question, financial_year=args.financial_year)
+        for piece in answer:
+            print(piece, end='', flush=True)
+        print(f"\n\nSources: {', '.join(dict.fromkeys(answer.sources))}")
+
+
+if __name__ == "__main__":
+    main()
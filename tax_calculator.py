@@ -0,0 +1,254 @@
+"""
+Income tax calculation logic for TaxSavvy Assistant.
+
+Kept free of any Streamlit imports so the same functions can be reused by the
+UI, the batch engine and command-line tools.
+"""
+
+from bisect import bisect_left
+from collections import namedtuple
+
+from metrics import instrument
+from tax_rules import (
+    NEW_REGIME,
+    OLD_REGIME,
+    SENIOR_AGE_GROUPS,
+    DEFAULT_FINANCIAL_YEAR,
+    SlabTable,
+    SurchargeTable,
+    compile_slabs,
+    compile_surcharge_tiers,
+    financial_years,
+    rules_for,
+)
+
+# --- Tax Rules ---
+# Each financial year's rules are loaded from rules/fy<year>.json and compiled
+# once by tax_rules. Every function below takes an optional `financial_year`
+# ('2024-25'); None means tax_rules.DEFAULT_FINANCIAL_YEAR.
+# The names below are the default year's rules, for callers that don't pick a year.
+
+DEFAULT_RULES = rules_for(DEFAULT_FINANCIAL_YEAR)
+
+NEW_REGIME_STANDARD_DEDUCTION = DEFAULT_RULES.new_regime_standard_deduction
+NEW_REGIME_SLABS = DEFAULT_RULES.new_regime_slabs
+OLD_REGIME_SLABS = DEFAULT_RULES.old_regime_slabs
+# Section 87A Rebate: (total income limit, maximum rebate), checked against income before deductions
+REBATE_87A = DEFAULT_RULES.rebate_87a
+# Surcharge tiers are (income threshold, rate) pairs: the rate applies once income is above the threshold
+SURCHARGE_TIERS = DEFAULT_RULES.surcharge_tiers
+CESS_RATE = DEFAULT_RULES.cess_rate
+
+NEW_REGIME_TABLE = DEFAULT_RULES.new_regime_table
+OLD_REGIME_TABLES = DEFAULT_RULES.old_regime_tables
+SURCHARGE_TABLES = DEFAULT_RULES.surcharge_tables
+
+
+def slab_tax(table, taxable_income):
+    """
+    Tax on `taxable_income` under a compiled SlabTable, before any rebate.
+    """
+    # Slab upper bounds are inclusive, so an income equal to a lower bound belongs to the slab below it
+    i = max(bisect_left(table.lower_bounds, taxable_income) - 1, 0)
+    return table.base_tax[i] + (taxable_income - table.lower_bounds[i]) * table.rates[i]
+
+
+def taxable_income_for_slab_tax(table, tax):
+    """
+    Inverse of slab_tax: the smallest taxable income whose slab tax reaches `tax`.
+    Returns 0 for a tax of 0 or less.
+    """
+    if tax <= 0:
+        return 0
+    for lower, rate, base, next_base in zip(table.lower_bounds, table.rates, table.base_tax, table.base_tax[1:] + (float('inf'),)):
+        if rate > 0 and base <= tax < next_base:
+            return lower + (tax - base) / rate
+    return float('inf')
+
+
+# The public functions below resolve the year's RuleSet once per call (DEFAULT_RULES directly for
+# the default year) and pass it down to these private helpers.
+
+def _rebate_87a(rules, tax, gross_total_income, regime):
+    income_limit, max_rebate = rules.rebate_87a[regime]
+    if gross_total_income <= income_limit:
+        return min(tax, max_rebate)
+    return 0
+
+
+def _capped_deductions_old_regime(rules, gross_total_income, age_group, deductions):
+    return {
+        section: min(deductions.get(section, 0), gross_total_income if cap is None else cap)
+        for section, cap in rules.deduction_limits[age_group in SENIOR_AGE_GROUPS]
+    }
+
+
+def _surcharge(rules, tax_amount, income, regime):
+    table = rules.surcharge_tables[OLD_REGIME if regime == OLD_REGIME else NEW_REGIME]
+    return tax_amount * table.rates[bisect_left(table.thresholds, income)]
+
+
+def rebate_87a(tax, gross_total_income, regime, financial_year=None):
+    """
+    Section 87A rebate: lesser of the tax and the regime's maximum rebate,
+    if total income (before deductions) is within the regime's limit.
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    return _rebate_87a(rules, tax, gross_total_income, regime)
+
+
+# --- Tax Calculation Logic ---
+
+TaxBreakdown = namedtuple('TaxBreakdown', [
+    'regime',
+    'gross_total_income',
+    'deductions', # Per-section deductions after applying their caps
+    'taxable_income',
+    'slab_tax', # Tax on taxable income before the 87A rebate
+    'rebate',
+    'tax', # Slab tax after rebate, before surcharge & cess
+    'surcharge',
+    'cess',
+    'total',
+    'financial_year',
+])
+
+
+def capped_deductions_new_regime(financial_year=None):
+    """
+    Deductions allowed under the New Tax Regime: only the Standard Deduction.
+    """
+    # Standard Deduction (only for salaried income, but applied to GTI for simplicity in this calculator)
+    # In a real scenario, Standard Deduction is only on Salary Income.
+    # For this calculator, we apply it to GTI to simplify the flow.
+    return {'standard_deduction': rules_for(financial_year).new_regime_standard_deduction}
+
+
+def capped_deductions_old_regime(gross_total_income, age_group, deductions, financial_year=None):
+    """
+    Applies the Old Tax Regime caps to each claimed deduction.
+    Returns a dict of section -> deduction allowed, in the order they are summed.
+    """
+    # Chapter VI-A deductions and Section 24(b) home loan interest (treated as a general deduction
+    # for simplicity). Caps without an amount (80E, 80G) are only limited by gross total income.
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    return _capped_deductions_old_regime(rules, gross_total_income, age_group, deductions)
+
+
+@instrument('calculate_tax_breakdown')
+def calculate_tax_breakdown(gross_total_income, regime, age_group="Below 60 years", deductions=None, financial_year=None):
+    """
+    Calculates the full tax breakdown for one taxpayer in a single pass.
+    `age_group` and `deductions` are only used for the Old Tax Regime.
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    if regime == OLD_REGIME:
+        capped = _capped_deductions_old_regime(rules, gross_total_income, age_group, deductions or {})
+        table = rules.old_regime_tables.get(age_group) # Unknown age groups have no slab table and pay no slab tax
+    else:
+        regime = NEW_REGIME
+        capped = {'standard_deduction': rules.new_regime_standard_deduction}
+        table = rules.new_regime_table
+
+    taxable_income = max(0, gross_total_income - sum(capped.values()))
+    return _breakdown(rules, gross_total_income, regime, table, capped, taxable_income)
+
+
+def _breakdown(rules, gross_total_income, regime, table, capped, taxable_income):
+    tax_before_rebate = slab_tax(table, taxable_income) if table else 0
+    rebate = _rebate_87a(rules, tax_before_rebate, gross_total_income, regime)
+    tax = max(0, tax_before_rebate - rebate) # Ensure tax is not negative
+
+    surcharge = _surcharge(rules, tax, gross_total_income, regime)
+    tax_plus_surcharge = tax + surcharge
+    cess = tax_plus_surcharge * rules.cess_rate
+
+    return TaxBreakdown(
+        regime=regime,
+        gross_total_income=gross_total_income,
+        deductions=capped,
+        taxable_income=taxable_income,
+        slab_tax=tax_before_rebate,
+        rebate=rebate,
+        tax=tax,
+        surcharge=surcharge,
+        cess=cess,
+        total=tax_plus_surcharge + cess,
+        financial_year=rules.financial_year,
+    )
+
+
+def tax_breakdown_from_taxable_income(gross_total_income, regime, age_group, capped, taxable_income, financial_year=None):
+    """
+    The rest of calculate_tax_breakdown for a caller that already has the
+    capped deductions and taxable income (the calculator graph's nodes).
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    if regime == OLD_REGIME:
+        table = rules.old_regime_tables.get(age_group)
+    else:
+        regime = NEW_REGIME
+        table = rules.new_regime_table
+    return _breakdown(rules, gross_total_income, regime, table, capped, taxable_income)
+
+
+# The scalar entry points below compute only the tax, without building a TaxBreakdown or a
+# dict of capped deductions; each step matches calculate_tax_breakdown, so the results are equal.
+
+@instrument('calculate_tax_new_regime')
+def calculate_tax_new_regime(gross_total_income, financial_year=None):
+    """
+    Calculates income tax as per the New Tax Regime for a financial year (default FY 2024-25).
+    Includes Standard Deduction for salaried individuals and Section 87A rebate.
+    Returns the tax before surcharge & cess; see calculate_tax_breakdown for the full breakdown.
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    taxable_income = max(0, gross_total_income - rules.new_regime_standard_deduction)
+    tax = slab_tax(rules.new_regime_table, taxable_income)
+    income_limit, max_rebate = rules.rebate_87a[NEW_REGIME]
+    if gross_total_income <= income_limit:
+        tax -= min(tax, max_rebate)
+    return max(0, tax)
+
+
+@instrument('calculate_tax_old_regime')
+def calculate_tax_old_regime(gross_total_income, age_group, deductions, financial_year=None):
+    """
+    Calculates income tax as per the Old Tax Regime for a financial year (default FY 2024-25).
+    Accounts for various deductions.
+    Returns the tax before surcharge & cess; see calculate_tax_breakdown for the full breakdown.
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    total_deductions = 0
+    for section, cap in rules.deduction_limits[age_group in SENIOR_AGE_GROUPS]:
+        total_deductions += min(deductions.get(section, 0), gross_total_income if cap is None else cap)
+    taxable_income = max(0, gross_total_income - total_deductions)
+
+    # Unknown age groups have no slab table and pay no slab tax
+    table = rules.old_regime_tables.get(age_group)
+    tax = slab_tax(table, taxable_income) if table else 0
+    income_limit, max_rebate = rules.rebate_87a[OLD_REGIME]
+    if gross_total_income <= income_limit:
+        tax -= min(tax, max_rebate)
+    return max(0, tax)
+
+
+@instrument('calculate_surcharge')
+def calculate_surcharge(tax_amount, income, regime, financial_year=None):
+    """
+    Calculates surcharge based on income and regime.
+    New Regime has capped surcharge at 25% for highest income bracket.
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    # Same as _surcharge, inlined to save a call on this hot path
+    table = rules.surcharge_tables[OLD_REGIME if regime == OLD_REGIME else NEW_REGIME]
+    return tax_amount * table.rates[bisect_left(table.thresholds, income)]
+
+
+@instrument('calculate_cess')
+def calculate_cess(tax_plus_surcharge, financial_year=None):
+    """
+    Calculates Health and Education Cess (4%).
+    """
+    rules = DEFAULT_RULES if financial_year is None else rules_for(financial_year)
+    return tax_plus_surcharge * rules.cess_rate
@@ -0,0 +1,266 @@
+"""
+Reactive dependency graph for the calculator's derived values.
+
+The UI's inputs (salary, other income, deductions, regime, age group, year)
+are the graph's inputs. Everything computed from them - house property
+income, gross total income, capped deductions, taxable income and the final
+tax breakdown - is a node with a function of the nodes it depends on.
+
+update() marks only the nodes downstream of inputs whose value actually
+changed as dirty, and get() recomputes dirty nodes lazily. A node that
+recomputes to the same value as before doesn't force its dependents to
+recompute (early cutoff), so the work done is proportional to what changed.
+The graph's structure is built once per process; each session only keeps
+its values, in a GraphSession with slots and fixed-size arrays. Kept free
+of Streamlit so it can be used and timed on its own.
+"""
+
+from array import array
+
+from tax_calculator import (
+    NEW_REGIME,
+    OLD_REGIME,
+    SENIOR_AGE_GROUPS,
+    capped_deductions_new_regime,
+    capped_deductions_old_regime,
+    tax_breakdown_from_taxable_income,
+)
+
+HOUSE_PROPERTY_STANDARD_DEDUCTION_RATE = 0.30 # Of Net Annual Value
+
+# Input name -> default value
+CALCULATOR_INPUTS = {
+    'gross_salary': 0,
+    'regime': NEW_REGIME,
+    'age_group': "Below 60 years",
+    'financial_year': None,
+    'hp_gross_rent': 0,
+    'hp_municipal_tax': 0,
+    'hp_interest_loan': 0,
+    'income_ltcg': 0,
+    'income_stcg': 0,
+    'pnbp': 0,
+    'interest_income': 0,
+    'dividend_income': 0,
+    'casual_income': 0,
+    'deduction_80C': 0,
+    'deduction_80D': 0,
+    'deduction_80CCD(1B)': 0,
+    'deduction_24b_interest': 0,
+    'deduction_80E': 0,
+    'deduction_80G': 0,
+    'deduction_80TTA': 0,
+    'deduction_80TTB': 0, # Only claimed by seniors
+}
+
+# Other income sources, in the order they are added to gross total income
+OTHER_INCOME_SOURCES = (
+    ('house_property', 'house_property_income'),
+    ('capital_gains_long_term', 'income_ltcg'),
+    ('capital_gains_short_term', 'income_stcg'),
+    ('pnbp_income', 'pnbp'),
+    ('interest_income', 'interest_income'),
+    ('dividend_income', 'dividend_income'),
+    ('casual_income', 'casual_income'),
+)
+
+DEDUCTION_SECTIONS = ('80C', '80D', '80CCD(1B)', '24b_interest', '80E', '80G', '80TTA')
+
+
+class DependencyGraph:
+    """
+    Named inputs plus derived nodes, each a function of other nodes' values.
+    Nodes must be added after the nodes they depend on, so the graph is acyclic.
+
+    The graph only holds the structure, shared by every session; each session's
+    values live in a compact GraphSession from session().
+    """
+
+    def __init__(self):
+        self.index = {} # Node name -> position
+        self.names = []
+        self.defaults = [] # Default value per input (None for derived nodes)
+        self.functions = [] # None for inputs
+        self.dependencies = [] # Positions of each node's dependencies
+        self.downstream = [] # Bitmask of every node that depends on each node, directly or not
+
+    def _add(self, name, default, function, dependencies):
+        position = len(self.names)
+        self.index[name] = position
+        self.names.append(name)
+        self.defaults.append(default)
+        self.functions.append(function)
+        self.dependencies.append(tuple(self.index[dependency] for dependency in dependencies))
+        self.downstream.append(0)
+        # A node is downstream of its dependencies and of everything they are downstream of
+        bit = 1 << position
+        upstream = 0
+        for dependency in self.dependencies[position]:
+            upstream |= 1 << dependency
+        for other in range(position):
+            if upstream & (1 << other) or self.downstream[other] & upstream:
+                self.downstream[other] |= bit
+
+    def add_input(self, name, default=None):
+        self._add(name, default, None, ())
+
+    def add_node(self, name, function, dependencies):
+        """Adds a derived node computed as function(*values of dependencies)."""
+        self._add(name, None, function, dependencies)
+
+    def session(self, **values):
+        """A new GraphSession with the inputs' defaults overridden by `values`."""
+        return GraphSession(self, values)
+
+
+class GraphSession:
+    """
+    One session's values for a DependencyGraph: a fixed-size list of values,
+    two arrays of ticks and a bitmask of dirty nodes.
+    """
+
+    __slots__ = ('graph', 'values', '_changed_at', '_checked_at', '_dirty', 'tick', 'recomputations')
+
+    def __init__(self, graph, values):
+        size = len(graph.names)
+        self.graph = graph
+        self.values = [values.get(name, default) for name, default in zip(graph.names, graph.defaults)]
+        self._changed_at = array('q', bytes(8 * size)) # Tick of each node's last value change
+        self._checked_at = array('q', [-1]) * size # Tick each derived node was last brought up to date
+        self._dirty = sum(1 << i for i, function in enumerate(graph.functions) if function is not None)
+        self.tick = 0
+        self.recomputations = 0 # Derived node evaluations so far
+
+    def update(self, values):
+        """
+        Sets input values. Returns the names of the inputs whose value changed;
+        only their downstream nodes will be recomputed.
+        """
+        self.tick += 1
+        changed = []
+        for name, value in values.items():
+            i = self.graph.index[name]
+            if self.graph.functions[i] is not None:
+                raise KeyError(f"'{name}' is a derived node, not an input")
+            if self.values[i] != value:
+                self.values[i] = value
+                self._changed_at[i] = self.tick
+                self._dirty |= self.graph.downstream[i]
+                changed.append(name)
+        return changed
+
+    def get(self, name):
+        """The current value of an input or node, recomputing it first if needed."""
+        return self._get(self.graph.index[name])
+
+    def changed_at(self, name):
+        """Tick at which the node's value last changed (call get() first for an up-to-date answer)."""
+        return self._changed_at[self.graph.index[name]]
+
+    def _get(self, i):
+        if self._dirty >> i & 1:
+            self._refresh(i)
+        return self.values[i]
+
+    def _refresh(self, i):
+        dependencies = self.graph.dependencies[i]
+        arguments = [self._get(dependency) for dependency in dependencies]
+        checked_at = self._checked_at[i]
+        # Early cutoff: skip the function if every dependency recomputed to the value this node last saw
+        if checked_at < 0 or any(self._changed_at[dependency] > checked_at for dependency in dependencies):
+            value = self.graph.functions[i](*arguments)
+            self.recomputations += 1
+            if checked_at < 0 or value != self.values[i]:
+                self.values[i] = value
+                self._changed_at[i] = self.tick
+        self._checked_at[i] = self.tick
+        self._dirty &= ~(1 << i)
+
+
+def _effective_age_group(regime, age_group):
+    # Age group only matters, and is only asked for, under the Old Tax Regime
+    return age_group if regime == OLD_REGIME else "Below 60 years"
+
+
+def _claimed_deductions(age_group, *amounts):
+    deductions = dict(zip(DEDUCTION_SECTIONS, amounts[:-1]))
+    if age_group in SENIOR_AGE_GROUPS:
+        deductions['80TTB'] = amounts[-1]
+    return deductions
+
+
+def _gross_total_income(regime, gross_salary, other_income_sources):
+    total = gross_salary
+    if regime == OLD_REGIME:
+        for amount in other_income_sources.values():
+            total = total + amount
+    return total
+
+
+def _applied_deductions(regime, deductions):
+    # The New Tax Regime ignores claimed deductions, so changing them there changes nothing downstream
+    return deductions if regime == OLD_REGIME else {}
+
+
+def _capped_deductions(regime, gross_total_income, age_group, deductions, financial_year):
+    if regime == OLD_REGIME:
+        return capped_deductions_old_regime(gross_total_income, age_group, deductions, financial_year)
+    return capped_deductions_new_regime(financial_year)
+
+
+def _build_calculator_graph():
+    """
+    The calculator's DependencyGraph, with the inputs in CALCULATOR_INPUTS and nodes:
+      net_annual_value, house_property_standard_deduction, house_property_income,
+      other_income_sources, age_group_applied, claimed_deductions, applied_deductions,
+      gross_total_income, capped_deductions, taxable_income, breakdown
+    """
+    graph = DependencyGraph()
+    for name, default in CALCULATOR_INPUTS.items():
+        graph.add_input(name, default)
+
+    graph.add_node('net_annual_value', lambda rent, municipal_tax: max(0, rent - municipal_tax), ('hp_gross_rent', 'hp_municipal_tax'))
+    graph.add_node('house_property_standard_deduction', lambda nav: nav * HOUSE_PROPERTY_STANDARD_DEDUCTION_RATE, ('net_annual_value',))
+    # Simplified house property income: rent less municipal taxes and home loan interest
+    graph.add_node(
+        'house_property_income',
+        lambda rent, municipal_tax, interest: rent - municipal_tax - interest,
+        ('hp_gross_rent', 'hp_municipal_tax', 'hp_interest_loan'),
+    )
+    graph.add_node(
+        'other_income_sources',
+        lambda *amounts: {source: amount for (source, _), amount in zip(OTHER_INCOME_SOURCES, amounts)},
+        tuple(node for _, node in OTHER_INCOME_SOURCES),
+    )
+    graph.add_node('age_group_applied', _effective_age_group, ('regime', 'age_group'))
+    graph.add_node(
+        'claimed_deductions',
+        _claimed_deductions,
+        ('age_group_applied',) + tuple(f'deduction_{section}' for section in DEDUCTION_SECTIONS) + ('deduction_80TTB',),
+    )
+    graph.add_node('applied_deductions', _applied_deductions, ('regime', 'claimed_deductions'))
+    graph.add_node('gross_total_income', _gross_total_income, ('regime', 'gross_salary', 'other_income_sources'))
+    graph.add_node(
+        'capped_deductions',
+        _capped_deductions,
+        ('regime', 'gross_total_income', 'age_group_applied', 'applied_deductions', 'financial_year'),
+    )
+    graph.add_node(
+        'taxable_income',
+        lambda gross_total_income, capped: max(0, gross_total_income - sum(capped.values())),
+        ('gross_total_income', 'capped_deductions'),
+    )
+    graph.add_node(
+        'breakdown',
+        tax_breakdown_from_taxable_income,
+        ('gross_total_income', 'regime', 'age_group_applied', 'capped_deductions', 'taxable_income', 'financial_year'),
+    )
+    return graph
+
+
+CALCULATOR_GRAPH = _build_calculator_graph()
+
+
+def calculator_graph(**values):
+    """A new session of the calculator graph, with inputs from CALCULATOR_INPUTS overridden by `values`."""
+    return CALCULATOR_GRAPH.session(**values)
@@ -0,0 +1,166 @@
+"""
+Tax rule registry, keyed by financial year.
+
+Each year's slabs, 87A rebate, surcharge tiers, cess rate and deduction caps
+live in a declarative data file, rules/fy<year>.json (e.g. rules/fy2024-25.json).
+rules_for() parses and compiles a year's file into a RuleSet of lookup
+tables the first time it is asked for and returns the cached RuleSet after
+that, so calculator and batch calls only pay for a dict lookup.
+
+Set TAXSAVVY_RULES_DIR to read the files from another directory and
+TAXSAVVY_FINANCIAL_YEAR to change the year used when none is given.
+"""
+
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+
+NEW_REGIME = "New Tax Regime"
+OLD_REGIME = "Old Tax Regime"
+SENIOR_AGE_GROUPS = ("60 to 80 years", "Above 80 years")
+
+RULES_DIR = os.environ.get('TAXSAVVY_RULES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules'))
+RULES_FILE_PATTERN = re.compile(r'^fy(\d{4}-\d{2})\.json$')
+DEFAULT_FINANCIAL_YEAR = os.environ.get('TAXSAVVY_FINANCIAL_YEAR', '2024-25')
+
+# --- Compiled Lookup Tables ---
+
+SlabTable = namedtuple('SlabTable', ['lower_bounds', 'rates', 'base_tax'])
+SurchargeTable = namedtuple('SurchargeTable', ['thresholds', 'rates'])
+
+# `cap` is a rupee amount, or None when the deduction is only limited by gross total income
+DeductionCap = namedtuple('DeductionCap', ['section', 'cap', 'senior_cap', 'seniors_only'])
+
+RuleSet = namedtuple('RuleSet', [
+    'financial_year',
+    'assessment_year',
+    'new_regime_standard_deduction',
+    'new_regime_slabs', # (lower bound, rate) pairs, as in the data file
+    'old_regime_slabs', # Age group -> (lower bound, rate) pairs
+    'surcharge_tiers', # Regime -> (threshold, rate) pairs
+    'new_regime_table',
+    'old_regime_tables', # Age group -> SlabTable
+    'surcharge_tables', # Regime -> SurchargeTable
+    'rebate_87a', # Regime -> (total income limit, maximum rebate)
+    'cess_rate',
+    'deduction_caps', # Old regime DeductionCaps, in the order they are summed
+    'deduction_limits', # Senior (True/False) -> ((section, cap), ...) that apply, in the same order
+])
+
+
+def compile_slabs(slabs):
+    """
+    Compiles (lower bound, rate) slabs into a SlabTable.
+    `base_tax[i]` is the cumulative tax on all income up to `lower_bounds[i]`,
+    so a lookup is a bisect plus one multiply-add.
+    """
+    lower_bounds = tuple(lower for lower, _ in slabs)
+    rates = tuple(rate for _, rate in slabs)
+    base_tax = [0.0]
+    for i in range(1, len(slabs)):
+        base_tax.append(base_tax[-1] + (lower_bounds[i] - lower_bounds[i - 1]) * rates[i - 1])
+    return SlabTable(lower_bounds, rates, tuple(base_tax))
+
+
+def compile_surcharge_tiers(tiers):
+    """
+    Compiles (threshold, rate) tiers into a SurchargeTable.
+    `rates[i]` applies when income is above exactly `i` thresholds.
+    """
+    thresholds = tuple(threshold for threshold, _ in tiers)
+    rates = (0.0,) + tuple(rate for _, rate in tiers)
+    return SurchargeTable(thresholds, rates)
+
+
+# --- Loading ---
+
+def _pairs(values, what, path):
+    """(bound, rate) pairs from a data file, checked to be increasing with rates in [0, 1]."""
+    pairs = tuple((bound, rate) for bound, rate in values)
+    bounds = [bound for bound, _ in pairs]
+    if bounds != sorted(set(bounds)) or any(not 0 <= rate <= 1 for _, rate in pairs):
+        raise ValueError(f"{path}: {what} must have increasing bounds and rates between 0 and 1")
+    return pairs
+
+
+def _deduction_cap(entry):
+    cap = entry['cap']
+    if cap == 'gross_total_income':
+        cap = None
+    return DeductionCap(entry['section'], cap, entry.get('senior_cap', cap), entry.get('seniors_only', False))
+
+
+def load_rule_set(path):
+    """
+    Parses and compiles one rules data file into a RuleSet.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    new, old = data['new_regime'], data['old_regime']
+
+    new_regime_slabs = _pairs(new['slabs'], 'new regime slabs', path)
+    old_regime_slabs = {age_group: _pairs(slabs, f'old regime slabs ({age_group})', path) for age_group, slabs in old['slabs'].items()}
+    for slabs in (new_regime_slabs,) + tuple(old_regime_slabs.values()):
+        if slabs[0][0] != 0:
+            raise ValueError(f"{path}: slabs must start at 0")
+    deduction_caps = tuple(_deduction_cap(entry) for entry in old['deductions'])
+    surcharge_tiers = {
+        NEW_REGIME: _pairs(new['surcharge'], 'new regime surcharge', path),
+        OLD_REGIME: _pairs(old['surcharge'], 'old regime surcharge', path),
+    }
+
+    return RuleSet(
+        financial_year=data['financial_year'],
+        assessment_year=data['assessment_year'],
+        new_regime_standard_deduction=new['standard_deduction'],
+        new_regime_slabs=new_regime_slabs,
+        old_regime_slabs=old_regime_slabs,
+        surcharge_tiers=surcharge_tiers,
+        new_regime_table=compile_slabs(new_regime_slabs),
+        old_regime_tables={age_group: compile_slabs(slabs) for age_group, slabs in old_regime_slabs.items()},
+        surcharge_tables={regime: compile_surcharge_tiers(tiers) for regime, tiers in surcharge_tiers.items()},
+        rebate_87a={
+            NEW_REGIME: (new['rebate_87a']['income_limit'], new['rebate_87a']['max_rebate']),
+            OLD_REGIME: (old['rebate_87a']['income_limit'], old['rebate_87a']['max_rebate']),
+        },
+        cess_rate=data['cess_rate'],
+        deduction_caps=deduction_caps,
+        deduction_limits={
+            senior: tuple(
+                (cap.section, cap.senior_cap if senior else cap.cap)
+                for cap in deduction_caps
+                if senior or not cap.seniors_only
+            )
+            for senior in (False, True)
+        },
+    )
+
+
+def financial_years(rules_dir=None):
+    """Financial years with a rules file, oldest first (e.g. ['2023-24', '2024-25'])."""
+    names = os.listdir(rules_dir or RULES_DIR)
+    return sorted(match.group(1) for match in map(RULES_FILE_PATTERN.match, names) if match)
+
+
+_rule_sets = {}
+_rule_sets_lock = threading.Lock()
+
+
+def rules_for(financial_year=None):
+    """
+    The compiled RuleSet for a financial year ('2024-25'), or for
+    DEFAULT_FINANCIAL_YEAR when None. Each file is compiled at most once per process.
+    """
+    financial_year = financial_year or DEFAULT_FINANCIAL_YEAR
+    rule_set = _rule_sets.get(financial_year)
+    if rule_set is None:
+        with _rule_sets_lock:
+            rule_set = _rule_sets.get(financial_year)
+            if rule_set is None:
+                path = os.path.join(RULES_DIR, f'fy{financial_year}.json')
+                if not os.path.exists(path):
+                    raise ValueError(f"No tax rules for FY {financial_year}; available: {', '.join(financial_years())}")
+                rule_set = _rule_sets[financial_year] = load_rule_set(path)
+    return rule_set
@@ -0,0 +1,138 @@
+"""
+Income sweeps and regime break-even analysis.
+
+income_sweep() evaluates the total tax (including surcharge and cess) of
+both regimes over an income grid, one vectorized call per regime, e.g.
+₹0 to ₹5 crore in ₹1,000 steps.
+
+break_even_incomes() finds exactly where the cheaper regime changes. Total
+tax in each regime is piecewise linear in gross total income: slab bounds,
+the zero-tax point and the 87A rebate cap are kinks, while the 87A income
+limit and the surcharge thresholds are jumps. Between consecutive
+breakpoints the difference between the regimes is linear, so each segment
+is fitted from two exact evaluations and solved for its root.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from tax_calculator import (
+    NEW_REGIME,
+    OLD_REGIME,
+    capped_deductions_old_regime,
+    rules_for,
+    taxable_income_for_slab_tax,
+)
+from tax_batch import calculate_tax_batch
+
+SWEEP_MAX_INCOME = 50000000 # ₹5 crore
+SWEEP_STEP = 1000
+# Tax differences within this many rupees count as equal (float rounding in the slab arithmetic)
+TIE_TOLERANCE = 0.01
+
+# `cheaper_below` / `cheaper_above` are NEW_REGIME, OLD_REGIME or None (both cost the same)
+BreakEven = namedtuple('BreakEven', ['income', 'cheaper_below', 'cheaper_above'])
+
+
+def income_sweep(stop=SWEEP_MAX_INCOME, step=SWEEP_STEP, start=0, age_group="Below 60 years", deductions=None,
+                 financial_year=None):
+    """
+    Total tax of both regimes at every income from `start` to `stop` (inclusive) in `step`s.
+    Returns {'income': incomes, NEW_REGIME: totals, OLD_REGIME: totals} as arrays.
+    """
+    incomes = start + step * np.arange(int((stop - start) // step) + 1, dtype=np.float64)
+    return {
+        'income': incomes,
+        NEW_REGIME: calculate_tax_batch(incomes, NEW_REGIME, financial_year=financial_year)['total'],
+        OLD_REGIME: calculate_tax_batch(incomes, OLD_REGIME, age_group, deductions, financial_year)['total'],
+    }
+
+
+def _regime_breakpoints(regime, table, total_deductions, rules):
+    """Gross incomes at which a regime's total tax changes slope or jumps."""
+    points = [total_deductions] # Taxable income becomes positive
+    if table is not None:
+        points += [total_deductions + lower for lower in table.lower_bounds]
+        income_limit, max_rebate = rules.rebate_87a[regime]
+        points.append(income_limit)
+        points.append(total_deductions + taxable_income_for_slab_tax(table, max_rebate))
+    points += rules.surcharge_tables[regime].thresholds
+    return points
+
+
+def _old_regime_deduction_offset(age_group, deductions, financial_year=None):
+    """
+    80E and 80G are capped at gross income, but taxable income is still
+    max(0, income - uncapped total), so the offset is the same at every income.
+    """
+    return sum(capped_deductions_old_regime(float('inf'), age_group, deductions or {}, financial_year).values())
+
+
+def regime_breakpoints(regime, age_group="Below 60 years", deductions=None, financial_year=None):
+    """
+    Sorted gross incomes at which one regime's total tax changes slope or jumps.
+    """
+    rules = rules_for(financial_year)
+    if regime == OLD_REGIME:
+        offset = _old_regime_deduction_offset(age_group, deductions, financial_year)
+        points = _regime_breakpoints(OLD_REGIME, rules.old_regime_tables.get(age_group), offset, rules)
+    else:
+        points = _regime_breakpoints(NEW_REGIME, rules.new_regime_table, rules.new_regime_standard_deduction, rules)
+    return sorted(set(points))
+
+
+def breakpoints(age_group="Below 60 years", deductions=None, financial_year=None):
+    """
+    Sorted gross incomes at which either regime's total tax changes slope or jumps.
+    """
+    return sorted(set(
+        regime_breakpoints(NEW_REGIME, financial_year=financial_year)
+        + regime_breakpoints(OLD_REGIME, age_group, deductions, financial_year)
+    ))
+
+
+def _cheaper(difference):
+    """Which regime is cheaper given new-regime tax minus old-regime tax."""
+    if difference < -TIE_TOLERANCE:
+        return NEW_REGIME
+    if difference > TIE_TOLERANCE:
+        return OLD_REGIME
+    return None
+
+
+def break_even_incomes(age_group="Below 60 years", deductions=None, stop=SWEEP_MAX_INCOME, start=0, financial_year=None):
+    """
+    Incomes in [start, stop] at which the cheaper regime changes, as BreakEven
+    tuples in increasing order. At a jump (the 87A limit or a surcharge
+    threshold) the break-even is the jump itself: the regime in
+    `cheaper_below` applies up to and including that income.
+    """
+    edges = [start] + [point for point in breakpoints(age_group, deductions, financial_year) if start < point < stop] + [stop]
+    lows = np.array(edges[:-1], dtype=np.float64)
+    highs = np.array(edges[1:], dtype=np.float64)
+
+    # The difference is linear inside each segment: fit it from two interior evaluations
+    probes = np.concatenate([lows + (highs - lows) / 4, lows + 3 * (highs - lows) / 4])
+    difference = (
+        calculate_tax_batch(probes, NEW_REGIME, financial_year=financial_year)['total']
+        - calculate_tax_batch(probes, OLD_REGIME, age_group, deductions, financial_year)['total']
+    )
+    first, second = np.split(difference, 2)
+    slopes = (second - first) / ((highs - lows) / 2)
+    intercepts = first - slopes * (lows + (highs - lows) / 4)
+
+    regions = [] # (start of region, cheaper regime), in increasing order
+    for low, high, slope, intercept in zip(lows, highs, slopes, intercepts):
+        root = -intercept / slope if slope != 0 else None
+        if root is not None and low < root < high:
+            regions.append((low, _cheaper(intercept + slope * (low + root) / 2)))
+            regions.append((root, _cheaper(intercept + slope * (root + high) / 2)))
+        else:
+            regions.append((low, _cheaper(intercept + slope * (low + high) / 2)))
+
+    return [
+        BreakEven(float(income), below, above)
+        for (_, below), (income, above) in zip(regions, regions[1:])
+        if above != below
+    ]
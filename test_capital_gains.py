@@ -0,0 +1,21 @@
+import pytest
+
+from capital_gains import ledger_chunks, match_ledger
+
+HEADER = "date,security,side,quantity,price\n"
+
+
+@pytest.mark.parametrize('rows', ["", "2024-05-01,INFY,buy,0,1500\n"], ids=['header-only', 'zero-quantity'])
+def test_nothing_to_match(tmp_path, rows):
+    ledger, realized = tmp_path / 'ledger.csv', tmp_path / 'realized.csv'
+    ledger.write_text(HEADER + rows)
+    matcher = match_ledger(ledger_chunks(str(ledger)), str(realized))
+    assert matcher.gains == {}
+    assert realized.read_text() == ""
+
+
+def test_first_chunk_without_sales(tmp_path):
+    ledger, realized = tmp_path / 'ledger.csv', tmp_path / 'realized.parquet'
+    ledger.write_text(HEADER + "2024-05-01,INFY,buy,10,1500\n2024-06-01,INFY,sell,4,1600\n")
+    matcher = match_ledger(ledger_chunks(str(ledger), chunk_size=1), str(realized))
+    assert matcher.gains['2024-25'].short_term == 400
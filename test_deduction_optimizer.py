@@ -0,0 +1,48 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from deduction_optimizer import INVESTMENT_SECTIONS, investment_limits, optimize_deductions
+from tax_batch import calculate_tax_batch
+from tax_calculator import NEW_REGIME, OLD_REGIME
+from tax_rules import financial_years
+
+AGE_GROUPS = ("Below 60 years", "60 to 80 years", "Above 80 years")
+# Amounts are multiples of the step, and so are the zero-tax points, so the greedy plan is on the grid
+STEP = 5000
+
+
+def _brute_force_total(income, budget, age_group, deductions, financial_year):
+    """Least total tax over every allocation of the budget on the grid, in either regime."""
+    caps = investment_limits(financial_year).section_caps[age_group]
+    ranges = [range(0, int(max(caps[section] - deductions.get(section, 0), 0)) + 1, STEP) for section in INVESTMENT_SECTIONS]
+    allocations = np.array([amounts for amounts in itertools.product(*ranges) if sum(amounts) <= budget], dtype=np.float64)
+    size = len(allocations)
+    invested = {name: np.full(size, float(value)) for name, value in deductions.items()}
+    for i, section in enumerate(INVESTMENT_SECTIONS):
+        invested[section] = invested.get(section, np.zeros(size)) + allocations[:, i]
+    old = calculate_tax_batch(np.full(size, float(income)), OLD_REGIME, age_group, invested, financial_year)['total']
+    new = calculate_tax_batch(np.array([float(income)]), NEW_REGIME, financial_year=financial_year)['total'][0]
+    return min(old.min(), new)
+
+
+@pytest.mark.parametrize('financial_year', financial_years())
+def test_greedy_matches_brute_force(financial_year):
+    rng = np.random.default_rng(16)
+    for _ in range(40):
+        income = STEP * int(rng.integers(300000 // STEP, 6000000 // STEP))
+        budget = STEP * int(rng.integers(0, 250000 // STEP))
+        age_group = AGE_GROUPS[rng.integers(len(AGE_GROUPS))]
+        deductions = {
+            '80C': STEP * int(rng.integers(0, 160000 // STEP)),
+            '80D': STEP * int(rng.integers(0, 30000 // STEP)),
+            '24b_interest': STEP * int(rng.integers(0, 250000 // STEP)),
+        }
+        plan = optimize_deductions(income, budget, age_group, deductions, financial_year)
+        case = (income, budget, age_group, deductions)
+        assert plan.recommended_total == pytest.approx(
+            _brute_force_total(income, budget, age_group, deductions, financial_year), abs=0.01), case
+        assert plan.invest_total <= budget
+        if plan.recommended_regime == NEW_REGIME:
+            assert plan.invest_total == 0
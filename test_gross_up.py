@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from gross_up import gross_for_take_home, gross_for_tax, tax_curve
+from tax_batch import calculate_tax_batch
+from tax_calculator import NEW_REGIME, OLD_REGIME
+from tax_rules import financial_years
+from tax_sweep import regime_breakpoints
+
+PROFILES = [
+    (NEW_REGIME, "Below 60 years", None),
+    (OLD_REGIME, "Below 60 years", {'80C': 150000.0, '80D': 25000.0}),
+    (OLD_REGIME, "60 to 80 years", {'80C': 150000.0, '80D': 50000.0, '24b_interest': 200000.0}),
+    (OLD_REGIME, "Above 80 years", None),
+]
+TOLERANCE = 1e-6 # Rupees; float rounding only
+
+
+@pytest.mark.parametrize('financial_year', financial_years())
+@pytest.mark.parametrize('regime, age_group, deductions', PROFILES)
+def test_round_trip(financial_year, regime, age_group, deductions):
+    rng = np.random.default_rng(17)
+    # Random incomes up to 10 crore, plus each cliff and kink and a paisa either side
+    points = np.array(regime_breakpoints(regime, age_group, deductions, financial_year))
+    incomes = np.concatenate([
+        np.round(np.exp(rng.uniform(np.log(1e4), np.log(1e8), 5000)), 2),
+        np.maximum(0, np.concatenate([points - 0.01, points, points + 0.01])),
+    ])
+
+    def total_tax(gross):
+        return calculate_tax_batch(gross, regime, age_group, deductions, financial_year)['total']
+
+    curve = tax_curve(regime, age_group, deductions, financial_year)
+    take_home = incomes - total_tax(incomes)
+    gross = gross_for_take_home(curve, take_home)
+    # Forward again, the take-home is the target; at a cliff, a smaller gross can reach it
+    assert np.abs(gross - total_tax(gross) - take_home).max() <= TOLERANCE
+    assert (gross <= incomes + TOLERANCE).all()
+
+    tax = total_tax(incomes)
+    gross = gross_for_tax(curve, tax)
+    # Where tax is flat (e.g. zero below the first slab), a larger gross can have the same tax
+    assert np.abs(total_tax(gross) - tax).max() <= TOLERANCE
+    assert (gross >= incomes - TOLERANCE).all()
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from investment_simulator import INSTRUMENTS, project_investments
+
+ELSS, PPF, _, FD, _ = INSTRUMENTS
+
+
+@pytest.mark.parametrize('instrument', [ELSS, PPF, FD], ids=lambda instrument: instrument.name)
+def test_unlocked_at_the_end_of_the_lock_in(instrument):
+    # The first contribution, made at the start of year 1, is free at the end of year `lock_in_years`
+    horizon = instrument.lock_in_years
+    projection = project_investments(150000, 1200000, horizon=horizon, paths=50, seed=1, instruments=(instrument,))
+    locked = projection.locked_share[0]
+    assert (locked[:, :-1] == 1).all()
+    assert (locked[:, -1] < 1).all()
+
+
+def test_fd_locks_the_last_contributions():
+    # No volatility: after 5 years the contributions from years 2 to 5 are locked, the first isn't
+    projection = project_investments(100000, 1200000, horizon=5, paths=1, instruments=(FD,))
+    growth = (1 + FD.mean_return * (1 - projection.marginal_rate)) ** np.arange(5, 0, -1)
+    assert projection.locked_share[0, 0, -1] == pytest.approx(growth[1:].sum() / growth.sum())
@@ -0,0 +1,54 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from payroll_cli import merge_partitions, process_file, process_file_parallel
+from tax_batch import calculate_tax_frame
+
+# The first chunk (two rows) has only whole amounts; a later chunk has fractions
+EMPLOYEES_CSV = """gross_total_income,regime,80C
+800000,Old Tax Regime,150000
+1200000,Old Tax Regime,100000
+950000.75,Old Tax Regime,1234.5
+1500000,Old Tax Regime,0
+"""
+
+
+def test_integer_first_chunk(tmp_path):
+    input_path, output_path = tmp_path / 'employees.csv', tmp_path / 'taxes.csv'
+    input_path.write_text(EMPLOYEES_CSV)
+
+    assert process_file(str(input_path), str(output_path), chunk_size=2) == 4
+    employees = pd.read_csv(input_path)
+    taxes = pd.read_csv(output_path)
+    assert taxes['80C'].tolist() == [150000, 100000, 1234.5, 0]
+    assert taxes['total'].tolist() == calculate_tax_frame(employees)['total'].tolist()
+
+
+def test_merge_skips_empty_partitions(tmp_path):
+    # An empty shard leaves a zero-byte partition; the next partition's header must still be written
+    empty, part = tmp_path / 'part-0.csv', tmp_path / 'part-1.csv'
+    empty.write_text('')
+    part.write_text(EMPLOYEES_CSV)
+    output_path = tmp_path / 'merged.csv'
+    merge_partitions([str(empty), str(part)], str(output_path))
+    assert output_path.read_text() == EMPLOYEES_CSV
+
+
+def test_merge_parquet_partitions_with_different_types(tmp_path):
+    first, second = tmp_path / 'part-0.parquet', tmp_path / 'part-1.parquet'
+    pq.write_table(pa.table({'employee_id': pa.array([1, 2], pa.int64())}), first)
+    pq.write_table(pa.table({'employee_id': pa.array([3.5], pa.float64())}), second)
+    output_path = tmp_path / 'merged.parquet'
+    merge_partitions([str(first), str(second)], str(output_path))
+    assert pq.read_table(output_path).column('employee_id').to_pylist() == [1.0, 2.0, 3.5]
+
+
+def test_parallel_header_only_csv(tmp_path):
+    input_path = tmp_path / 'employees.csv'
+    input_path.write_text(EMPLOYEES_CSV.splitlines(keepends=True)[0])
+    serial, parallel = tmp_path / 'serial.csv', tmp_path / 'parallel.csv'
+    assert process_file(str(input_path), str(serial)) == 0
+    assert process_file_parallel(str(input_path), str(parallel), workers=2) == 0
+    assert parallel.read_text() == serial.read_text()
+    assert serial.read_text().startswith('"gross_total_income","regime","80C","taxable_income"')
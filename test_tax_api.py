@@ -0,0 +1,32 @@
+import pytest
+from starlette.testclient import TestClient
+
+from tax_api import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize('amount', ['NaN', 'Infinity', '-Infinity', '1e400', '1' + '0' * 400], ids=['nan', 'inf', '-inf', '1e400', 'huge-int'])
+def test_non_finite_amounts_are_rejected(amount):
+    for body in (
+        f'{{"gross_total_income": {amount}}}',
+        f'{{"gross_total_income": 750000, "deductions": {{"80C": {amount}}}}}',
+    ):
+        response = client.post('/tax', content=body, headers={'content-type': 'application/json'})
+        assert response.status_code == 400
+        response = client.post('/tax/batch', content=f'{{"records": [{body}]}}', headers={'content-type': 'application/json'})
+        assert response.status_code == 400
+
+
+def test_valid_amount():
+    response = client.post('/tax', json={'gross_total_income': 750000})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('body', [b'{"gross_total_income": 7500', b'\xff\xfe{"gross_total_income": 750000}', b'{"a": "\xe9"}'],
+                         ids=['truncated', 'bad-bom', 'latin-1'])
+def test_invalid_body_is_rejected(body):
+    for path in ('/tax', '/tax/batch'):
+        response = client.post(path, content=body, headers={'content-type': 'application/json'})
+        assert response.status_code == 400
+        assert response.json()['error'] == "Request body must be valid JSON"
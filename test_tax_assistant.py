@@ -0,0 +1,109 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from fake_ollama import DEFAULT_REPLY, start_fake_ollama
+from tax_assistant import Answer, AnswerCache, InferenceBusy, InferenceClient, OllamaGenerator
+
+
+def test_similar_falls_through_expired_best_match():
+    now = [0.0]
+    cache = AnswerCache(ttl_seconds=10, similarity=0.9, clock=lambda: now[0])
+    cache.put("How much can I claim under 80C?", np.array([1.0, 0.0]), Answer('closest', []), 'index')
+    now[0] = 5.0
+    cache.put("What is the 80C limit?", np.array([0.96, 0.28]), Answer('live', []), 'index')
+
+    # The closest match has expired; the next one above the threshold is still live
+    now[0] = 12.0
+    assert cache.get_similar(np.array([1.0, 0.0]), 'index').text == 'live'
+    assert len(cache) == 1
+
+    now[0] = 16.0
+    assert cache.get_similar(np.array([1.0, 0.0]), 'index') is None
+
+
+# --- InferenceClient against the fake ollama server ---
+
+@pytest.fixture
+def server():
+    server = start_fake_ollama(token_delay=0.01)
+    yield server
+    server.shutdown()
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _ask(client, session, finished):
+    def run():
+        assert client.generate("What is 80C?", session) == DEFAULT_REPLY
+        finished.append(session)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_concurrency_is_bounded(server):
+    client = InferenceClient(OllamaGenerator(host=server.url), max_concurrent=2)
+    finished = []
+    threads = [_ask(client, f'session-{i % 3}', finished) for i in range(6)]
+    for thread in threads:
+        thread.join()
+    assert len(finished) == 6
+    assert server.requests == 6
+    assert server.max_concurrent == 2
+    assert client.status()['active'] == 0
+
+
+def test_sessions_are_served_round_robin(server):
+    client = InferenceClient(OllamaGenerator(host=server.url), max_concurrent=1)
+    finished = []
+    threads = [_ask(client, 'a', finished)]
+    _wait_for(lambda: client.status()['active'] == 1)
+    for expected_waiting, session in enumerate(['a', 'a', 'b'], start=1):
+        threads.append(_ask(client, session, finished))
+        _wait_for(lambda: client.status()['waiting'] == expected_waiting)
+    for thread in threads:
+        thread.join()
+    # First in, first out would serve b last
+    assert finished == ['a', 'a', 'b', 'a']
+
+
+def test_busy_when_queue_is_full_or_wait_is_too_long(server):
+    server.first_token_delay = 0.5
+    client = InferenceClient(OllamaGenerator(host=server.url), max_concurrent=1, max_waiting=1, queue_timeout=0.1)
+    running = threading.Thread(target=client.generate, args=("What is 80C?", 'a'))
+    running.start()
+    _wait_for(lambda: client.status()['active'] == 1)
+
+    timed_out = []
+    def wait_for_slot():
+        try:
+            client.generate("What is 80D?", 'b')
+        except InferenceBusy:
+            timed_out.append(True)
+    waiting = threading.Thread(target=wait_for_slot)
+    waiting.start()
+    _wait_for(lambda: client.status()['waiting'] == 1)
+    with pytest.raises(InferenceBusy):
+        client.generate("What is 80E?", 'c') # The one waiting place is taken
+    waiting.join()
+    running.join()
+    assert timed_out # Gave up before the running answer finished
+    assert client.status() == {'active': 0, 'waiting': 0, 'max_concurrent': 1, 'max_waiting': 1}
+
+
+def test_abandoned_stream_releases_its_slot(server):
+    client = InferenceClient(OllamaGenerator(host=server.url), max_concurrent=1, queue_timeout=5)
+    stream = client.stream("What is 80C?", 'a')
+    assert next(stream) == DEFAULT_REPLY.split(' ')[0]
+    assert client.is_busy()
+    stream.close() # The reader went away mid-answer, e.g. the user reran the app
+    assert not client.is_busy()
+    assert client.generate("What is 80D?", 'b') == DEFAULT_REPLY
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from tax_batch import DEDUCTION_COLUMNS, RESULT_COLUMNS, calculate_tax_batch
+from tax_calculator import NEW_REGIME, OLD_REGIME, calculate_tax_breakdown
+from tax_rules import financial_years, rules_for
+
+AGE_GROUPS = ("Below 60 years", "60 to 80 years", "Above 80 years")
+
+
+def _boundary_incomes(rules):
+    """Incomes at and either side of every slab, rebate and surcharge boundary of a year."""
+    boundaries = [limit for limit, _ in rules.rebate_87a.values()]
+    for table in (rules.new_regime_table,) + tuple(rules.old_regime_tables.values()):
+        # As gross total income, these are taxable incomes plus the deductions that apply
+        boundaries += [lower + rules.new_regime_standard_deduction for lower in table.lower_bounds]
+        boundaries += list(table.lower_bounds)
+    for table in rules.surcharge_tables.values():
+        boundaries += list(table.thresholds)
+    return [max(0.0, boundary + delta) for boundary in boundaries for delta in (-1, -0.01, 0, 0.01, 1)]
+
+
+@pytest.mark.parametrize('financial_year', financial_years())
+def test_batch_equals_scalar(financial_year):
+    rng = np.random.default_rng(2024)
+    rules = rules_for(financial_year)
+    # Every boundary under every regime and age group, then random incomes
+    boundaries = [(income, regime, age_group) for income in _boundary_incomes(rules)
+                  for regime in (NEW_REGIME, OLD_REGIME) for age_group in AGE_GROUPS]
+    random_incomes = np.concatenate([
+        np.round(rng.uniform(1200000, 1500000, 2000), 2), # Around the new regime's rebate limit
+        np.round(np.exp(rng.uniform(np.log(1e5), np.log(1e8), 4000)), 2),
+    ])
+    incomes = np.concatenate([[income for income, _, _ in boundaries], random_incomes])
+    regimes = np.concatenate([np.array([regime for _, regime, _ in boundaries], dtype=object),
+                              rng.choice(np.array([NEW_REGIME, OLD_REGIME], dtype=object), len(random_incomes))])
+    age_groups = np.concatenate([np.array([age_group for _, _, age_group in boundaries], dtype=object),
+                                 rng.choice(np.array(AGE_GROUPS, dtype=object), len(random_incomes))])
+    size = len(incomes)
+    # Zero, under and over each cap, half of them with paise
+    deductions = {}
+    for name in DEDUCTION_COLUMNS:
+        amounts = np.round(rng.uniform(0, 300000, size), 2)
+        amounts = np.where(rng.random(size) < 0.5, np.floor(amounts), amounts)
+        deductions[name] = np.where(rng.random(size) < 0.3, 0.0, amounts)
+
+    batch = calculate_tax_batch(incomes, regimes, age_groups, deductions, financial_year)
+    for row in range(size):
+        scalar = calculate_tax_breakdown(incomes[row], regimes[row], age_groups[row],
+                                         {name: values[row] for name, values in deductions.items()}, financial_year)
+        for name in RESULT_COLUMNS:
+            assert batch[name][row] == getattr(scalar, name), (row, name, incomes[row], regimes[row], age_groups[row])
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from tax_calculator import NEW_REGIME, OLD_REGIME, calculate_tax_breakdown
+from tax_graph import calculator_graph
+from tax_rules import financial_years
+
+AGE_GROUPS = ("Below 60 years", "60 to 80 years", "Above 80 years")
+
+
+def _recomputed_by(session, values):
+    """Derived nodes re-evaluated to refresh the breakdown after an update."""
+    session.get('breakdown')
+    before = session.recomputations
+    session.update(values)
+    session.get('breakdown')
+    return session.recomputations - before
+
+
+def test_unchanged_inputs_recompute_nothing():
+    session = calculator_graph(gross_salary=1500000)
+    assert _recomputed_by(session, {}) == 0
+    assert _recomputed_by(session, {'gross_salary': 1500000}) == 0
+
+
+def test_deduction_under_new_regime_stops_at_applied_deductions():
+    session = calculator_graph(gross_salary=1500000, regime=NEW_REGIME)
+    breakdown = session.get('breakdown')
+    changed_at = session.changed_at('breakdown')
+    # claimed_deductions and applied_deductions re-run; applied is still {} so the rest is cut off
+    assert _recomputed_by(session, {'deduction_80C': 150000}) == 2
+    assert session.changed_at('breakdown') == changed_at
+    assert session.get('breakdown') is breakdown
+
+
+def test_only_downstream_nodes_recompute():
+    session = calculator_graph(gross_salary=1500000, regime=OLD_REGIME)
+    # gross_total_income, capped_deductions, taxable_income, breakdown
+    assert _recomputed_by(session, {'gross_salary': 1600000}) == 4
+    # house_property_income, other_income_sources, gross_total_income, capped_deductions,
+    # taxable_income, breakdown; net_annual_value isn't on the breakdown's path
+    assert _recomputed_by(session, {'hp_gross_rent': 240000}) == 6
+    # Under the new regime other income is ignored, so gross_total_income cuts off the rest
+    session.update({'regime': NEW_REGIME})
+    assert _recomputed_by(session, {'hp_gross_rent': 300000}) == 3
+
+
+@pytest.mark.parametrize('financial_year', financial_years())
+def test_breakdown_equals_calculate_tax_breakdown(financial_year):
+    rng = np.random.default_rng(19)
+    session = calculator_graph(financial_year=financial_year)
+    for _ in range(100):
+        regime = (NEW_REGIME, OLD_REGIME)[rng.integers(2)]
+        session.update({
+            'gross_salary': float(np.round(rng.uniform(0, 6e6), 2)),
+            'regime': regime,
+            'age_group': AGE_GROUPS[rng.integers(3)],
+            'deduction_80C': float(rng.integers(0, 200000)),
+            'deduction_80D': float(rng.integers(0, 100000)),
+            'hp_gross_rent': float(rng.integers(0, 2)) * 300000,
+        })
+        expected = calculate_tax_breakdown(session.get('gross_total_income'), regime,
+                                           session.get('age_group_applied'),
+                                           session.get('applied_deductions'), financial_year)
+        assert session.get('breakdown') == expected
@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from tax_calculator import NEW_REGIME, OLD_REGIME
+from tax_paise import (
+    MAX_BATCH_PAISE,
+    MISMATCH_SAMPLE,
+    Reconciliation,
+    calculate_tax_batch_paise,
+    calculate_tax_paise,
+    paise_rules,
+    reconcile,
+    slab_tax_batch_paise,
+    slab_tax_paise,
+    to_paise,
+    to_paise_batch,
+)
+from tax_rules import financial_years
+
+AGE_GROUPS = ("Below 60 years", "60 to 80 years", "Above 80 years")
+
+
+def _random_payroll(rng, size):
+    incomes = to_paise_batch(np.round(np.exp(rng.uniform(np.log(1e5), np.log(1e8), size)), 2))
+    regimes = rng.choice(np.array([NEW_REGIME, OLD_REGIME], dtype=object), size)
+    age_groups = rng.choice(np.array(AGE_GROUPS, dtype=object), size)
+    deductions = {
+        '80C': rng.integers(0, 20000000, size),
+        '80D': rng.integers(0, 6000000, size),
+        '24b_interest': rng.integers(0, 25000000, size),
+        '80TTB': rng.integers(0, 6000000, size),
+    }
+    return incomes, regimes, age_groups, deductions
+
+
+@pytest.mark.parametrize('financial_year', financial_years())
+def test_scalar_equals_batch(financial_year):
+    incomes, regimes, age_groups, deductions = _random_payroll(np.random.default_rng(0), 2000)
+    batch = calculate_tax_batch_paise(incomes, regimes, age_groups, deductions, financial_year)
+    for row in range(len(incomes)):
+        scalar = calculate_tax_paise(int(incomes[row]), regimes[row], age_groups[row],
+                                     {name: int(values[row]) for name, values in deductions.items()}, financial_year)
+        for name, values in batch.items():
+            assert getattr(scalar, name) == values[row], (row, name)
+            assert isinstance(getattr(scalar, name), int)
+
+
+def test_to_paise_rounds_half_away_from_zero():
+    # Halves of a paisa that floats hold exactly
+    assert to_paise(0.125) == 13
+    assert to_paise(-0.375) == -38
+    assert to_paise(0.0625) == 6
+    assert to_paise(Decimal('0.005')) == 1
+    assert to_paise(Decimal('-0.005')) == -1
+    assert to_paise(12) == 1200
+    assert to_paise_batch([0.125, -0.375, 0.0625]).tolist() == [13, -38, 6]
+
+
+def test_slab_tax_rounds_half_paisa_up():
+    table = paise_rules().new_regime_table
+    arrays = paise_rules().new_regime_arrays
+    # 10 paise into a 5% slab is exactly half a paisa of tax
+    i = table.rates.index(500)
+    lower = table.lower_bounds[i]
+    base = slab_tax_paise(table, lower)
+    assert slab_tax_paise(table, lower + 9) == base # 0.45 paise
+    assert slab_tax_paise(table, lower + 10) == base + 1 # 0.5 paise
+    assert slab_tax_batch_paise(arrays, np.array([lower + 9, lower + 10])).tolist() == [base, base + 1]
+
+
+def test_batch_overflow_guard():
+    with pytest.raises(ValueError, match="overflow"):
+        calculate_tax_batch_paise(np.array([MAX_BATCH_PAISE + 1]))
+    batch = calculate_tax_batch_paise(np.array([MAX_BATCH_PAISE]))
+    assert batch['total'][0] == calculate_tax_paise(MAX_BATCH_PAISE, NEW_REGIME).total
+    # The scalar path uses Python ints, so it has no limit
+    assert calculate_tax_paise(MAX_BATCH_PAISE * 10, NEW_REGIME).total > batch['total'][0]
+
+
+def test_reconciliation_over_chunks():
+    rng = np.random.default_rng(0)
+    size = 3000
+    incomes = np.round(rng.uniform(2e5, 6e7, size), 2)
+    regimes = rng.choice(np.array([NEW_REGIME, OLD_REGIME], dtype=object), size)
+    deductions = {'80C': np.round(rng.uniform(0, 2e5, size), 2)}
+    whole = reconcile(incomes, regimes, "Below 60 years", deductions)
+    assert whole.columns['total'].mismatched > MISMATCH_SAMPLE
+
+    chunked = Reconciliation()
+    mismatched_rows = []
+    for rows in np.array_split(np.arange(size), 4):
+        mismatched = chunked.add(incomes[rows], regimes[rows], "Below 60 years",
+                                 {name: values[rows] for name, values in deductions.items()})
+        mismatched_rows.extend(rows[mismatched])
+    assert chunked.rows == size
+    assert chunked.columns == whole.columns # Row numbers in the samples run across chunks
+    for column in chunked.columns.values():
+        assert len(column.sample) <= MISMATCH_SAMPLE
+        assert {row for row, _, _ in column.sample} <= set(mismatched_rows)
+    assert not chunked.matched
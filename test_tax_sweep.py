@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from tax_batch import calculate_tax_batch
+from tax_calculator import NEW_REGIME, OLD_REGIME
+from tax_rules import financial_years
+from tax_sweep import _cheaper, break_even_incomes, income_sweep
+
+SCENARIOS = [
+    ("Below 60 years", None),
+    ("Below 60 years", {'80C': 150000, '80D': 25000}),
+    ("Below 60 years", {'80C': 150000, '80CCD(1B)': 50000, '80D': 50000, '24b_interest': 200000, '80E': 400000}),
+    ("60 to 80 years", {'80C': 150000, '80D': 50000, '80TTB': 50000}),
+    ("Above 80 years", {'80C': 100000}),
+    # The old regime is cheaper until its 37% surcharge starts at ₹5 crore
+    ("Below 60 years", {'80C': 150000, '80E': 300000}),
+]
+# Past the ₹5 crore surcharge threshold
+STOP = 60000000
+
+
+def _cheaper_at(income, age_group, deductions, financial_year):
+    incomes = np.array([income], dtype=np.float64)
+    difference = (calculate_tax_batch(incomes, NEW_REGIME, financial_year=financial_year)['total']
+                  - calculate_tax_batch(incomes, OLD_REGIME, age_group, deductions, financial_year)['total'])
+    return _cheaper(difference[0])
+
+
+@pytest.mark.parametrize('financial_year', financial_years())
+@pytest.mark.parametrize('age_group, deductions', SCENARIOS)
+def test_break_evens_match_brute_force(financial_year, age_group, deductions):
+    sweep = income_sweep(STOP, age_group=age_group, deductions=deductions, financial_year=financial_year)
+    incomes = sweep['income']
+    cheaper = [_cheaper(difference) for difference in sweep[NEW_REGIME] - sweep[OLD_REGIME]]
+    break_evens = break_even_incomes(age_group, deductions, stop=incomes[-1], financial_year=financial_year)
+
+    # Every change of the cheaper regime between two sweep points has a break-even between them
+    for i in np.flatnonzero([before != after for before, after in zip(cheaper, cheaper[1:])]):
+        assert any(incomes[i] <= point.income <= incomes[i + 1] for point in break_evens), incomes[i]
+    # And each break-even separates the regimes it names
+    for point in break_evens:
+        assert _cheaper_at(point.income - 1, age_group, deductions, financial_year) == point.cheaper_below
+        assert _cheaper_at(point.income + 1, age_group, deductions, financial_year) == point.cheaper_above
+    assert break_evens == sorted(break_evens)
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from tds_projection import TdsStore, main
+
+
+@pytest.mark.parametrize('column', ['salary', 'bonus', '80C'])
+def test_negative_amount_leaves_store_unchanged(column):
+    store = TdsStore()
+    store.apply_month(pd.DataFrame({'employee_id': ['E1'], 'salary': [100000.0]}))
+    delta = pd.DataFrame({'employee_id': ['E1', 'E2'], column: [50000.0, -100000.0]})
+    with pytest.raises(ValueError, match="can't be negative"):
+        store.apply_month(delta)
+    assert store.months_processed == 1
+    assert list(store.employee_ids) == ['E1']
+    assert store.columns['monthly_salary'].tolist() == [100000.0]
+
+
+def test_unknown_financial_year(tmp_path):
+    delta = tmp_path / 'delta.csv'
+    delta.write_text("employee_id,salary\nE1,100000\n")
+    with pytest.raises(SystemExit, match="--financial-year must be one of"):
+        main([str(delta), str(tmp_path / 'tds.csv'), '--state', str(tmp_path / 'state.parquet'),
+              '--financial-year', '2019-20'])
+
+
+def test_over_deduction_is_reported():
+    store = TdsStore()
+    store.apply_month(pd.DataFrame({'employee_id': ['E1', 'E2'], 'salary': [300000.0, 300000.0]}))
+    # E1's salary is cut after April, so the TDS deducted then exceeds the tax on the year's income
+    tds = store.apply_month(pd.DataFrame({'employee_id': ['E1'], 'salary': [10000.0]}))
+    for _ in range(10):
+        tds = store.apply_month(pd.DataFrame({'employee_id': pd.Series([], dtype=str)}))
+    assert tds['month'].iloc[0] == 'Mar'
+    excess = tds.set_index('employee_id')['excess_tds']
+    assert excess['E1'] > 0
+    assert excess['E1'] == pytest.approx(tds['ytd_tds'].iloc[0] - tds['projected_tax'].iloc[0])
+    assert excess['E2'] == 0